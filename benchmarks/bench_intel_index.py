@@ -0,0 +1,88 @@
+"""
+Benchmark: which sessions reported an indicator, scan vs index.
+
+Fills the in-memory store with sessions that each report a few UPI IDs
+and phone numbers out of a shared pool, then compares finding every
+session with a given UPI ID by scanning get_all_sessions() (the only way
+before src/intel_index.py) with lookup_indicator(). Also times
+update_session with the intelligence it now indexes.
+
+Usage:
+    python -m benchmarks.bench_intel_index
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.intel_index import MemoryIntelIndex, lookup_indicator, set_intel_index
+from src.session import clear_all_sessions, create_session, get_all_sessions, set_store, update_session
+from src.session_store import MemorySessionStore
+
+LOOKUPS = 200
+
+
+def fill(sessions: int, rng: random.Random) -> float:
+    """Create sessions with intelligence; returns ms per update_session"""
+    pool = max(10, sessions // 20)
+    elapsed = 0.0
+    for number in range(sessions):
+        session_id = f"bench-{number}"
+        create_session(session_id)
+        extracted = {
+            "upiIds": [f"pay{rng.randrange(pool)}@ybl" for _ in range(2)],
+            "phoneNumbers": [f"9{rng.randrange(10 ** 9):09d}"]
+        }
+        started = time.perf_counter()
+        update_session(session_id, extracted_intelligence=extracted)
+        elapsed += time.perf_counter() - started
+    return elapsed / sessions * 1000
+
+
+def scan(upi_id: str) -> list:
+    """The previous approach: copy every session and check each one"""
+    return [
+        session_id for session_id, session in get_all_sessions().items()
+        if upi_id in session.extracted_intelligence["upiIds"]
+    ]
+
+
+def main():
+    original = (Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.INTEL_INDEX_MAX_SESSIONS)
+    Config.SESSION_MAX_COUNT = Config.SESSION_MAX_BYTES = Config.INTEL_INDEX_MAX_SESSIONS = 0
+    previous_store = set_store(MemorySessionStore())
+    previous_index = set_intel_index(MemoryIntelIndex())
+
+    print(f"{'sessions':>9} {'update (ms)':>12} {'scan (ms)':>10} {'index (ms)':>11}")
+    try:
+        for sessions in [1000, 10000, 50000]:
+            clear_all_sessions()
+            set_intel_index(MemoryIntelIndex())
+            rng = random.Random(3)
+            update_ms = fill(sessions, rng)
+            targets = [f"pay{rng.randrange(max(10, sessions // 20))}@ybl" for _ in range(LOOKUPS)]
+
+            started = time.perf_counter()
+            scanned = [scan(upi_id) for upi_id in targets[:20]]
+            scan_ms = (time.perf_counter() - started) * 1000 / 20
+
+            started = time.perf_counter()
+            found = [lookup_indicator(upi_id, "upiIds") for upi_id in targets]
+            index_ms = (time.perf_counter() - started) * 1000 / LOOKUPS
+
+            for by_scan, matches in zip(scanned, found):
+                assert sorted(by_scan) == sorted(matches[0]["sessions"] if matches else [])
+            print(f"{sessions:>9} {update_ms:>12.3f} {scan_ms:>10.2f} {index_ms:>11.4f}")
+    finally:
+        clear_all_sessions()
+        set_store(previous_store)
+        set_intel_index(previous_index)
+        Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.INTEL_INDEX_MAX_SESSIONS = original
+
+
+if __name__ == '__main__':
+    main()
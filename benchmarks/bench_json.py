@@ -0,0 +1,132 @@
+"""
+Benchmark: JSON encoding and decoding, stdlib vs orjson.
+
+Times the payloads the service actually moves - /honeypot request bodies
+with 10, 50 and 200 messages of conversationHistory, a /honeypot/batch
+body, a /session dump and a GUVI callback payload - through:
+
+- flask:  Flask's default provider settings (stdlib json, sorted keys),
+          what request.get_json() and jsonify() used before
+- stdlib: src/jsonio.py with JSON_BACKEND=stdlib
+- orjson: src/jsonio.py with JSON_BACKEND=orjson (skipped if missing)
+
+Usage:
+    python -m benchmarks.bench_json
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import jsonio
+from benchmarks.corpus import generate_texts
+
+
+def history(count: int, texts) -> list:
+    """Alternating scammer and agent messages"""
+    return [
+        {
+            "sender": "scammer" if n % 2 == 0 else "user",
+            "text": texts[n % len(texts)],
+            "timestamp": 1770005528731 + n * 1000
+        }
+        for n in range(count)
+    ]
+
+
+def build_payloads() -> dict:
+    texts = generate_texts(500)
+    intelligence = {
+        "upiIds": [f"refund{n}@ybl" for n in range(50)],
+        "bankAccounts": [str(10 ** 11 + n) for n in range(50)],
+        "phoneNumbers": [f"+9198765{n:05d}" for n in range(50)],
+        "ifscCodes": [f"SBIN0{n:06d}" for n in range(20)],
+        "phishingLinks": [f"https://sbi-kyc-{n}.xyz/verify" for n in range(50)],
+        "suspiciousKeywords": ["urgent", "verify", "blocked", "otp", "kyc"],
+    }
+
+    def turn(session: int, messages: int) -> dict:
+        return {
+            "sessionId": f"session-{session}",
+            "message": {"sender": "scammer", "text": texts[session], "timestamp": 1770005528731},
+            "conversationHistory": history(messages, texts),
+            "metadata": {"channel": "SMS", "language": "English", "locale": "IN"},
+        }
+
+    return {
+        "turn[10 messages]": turn(1, 10),
+        "turn[50 messages]": turn(2, 50),
+        "turn[200 messages]": turn(3, 200),
+        "batch[100 turns x 10]": [turn(n, 10) for n in range(100)],
+        "session dump": {
+            "status": "success",
+            "session": {
+                "sessionId": "session-1",
+                "messageCount": 200,
+                "scamDetected": True,
+                "confidence": 0.93,
+                "indicators": ["urgency", "payment_request"],
+                "extractedIntelligence": intelligence,
+                "conversationLength": 200,
+            },
+        },
+        "callback": {
+            "sessionId": "session-1",
+            "scamDetected": True,
+            "totalMessagesExchanged": 18,
+            "extractedIntelligence": intelligence,
+            "agentNotes": "Scammer used urgency tactics and payment redirection.",
+        },
+    }
+
+
+def backends() -> list:
+    """(name, dumps, loads) for each encoder available here"""
+    flask_encoder = json.JSONEncoder(ensure_ascii=True, sort_keys=True)
+    found = [
+        ("flask", lambda obj: flask_encoder.encode(obj).encode("utf-8"), json.loads),
+        ("stdlib", jsonio._stdlib_dumps, json.loads),
+    ]
+    try:
+        name, dumps, loads = jsonio._load_orjson()
+        found.append((name, dumps, loads))
+    except ImportError:
+        print("⚠️ orjson not installed, timing stdlib only\n")
+    return found
+
+
+def time_per_call(func, arg, budget: float = 0.2) -> float:
+    """Microseconds per call, repeating for about `budget` seconds"""
+    func(arg)
+    calls, started = 0, time.perf_counter()
+    while True:
+        func(arg)
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed > budget:
+            return elapsed / calls * 1e6
+
+
+def main():
+    payloads = build_payloads()
+    found = backends()
+
+    header = f"{'payload':<24} {'KB':>7}"
+    for name, _, _ in found:
+        header += f" {name + ' enc':>11} {name + ' dec':>11}"
+    print(header + "   (us per call)")
+
+    for label, payload in payloads.items():
+        encoded = json.dumps(payload).encode("utf-8")
+        row = f"{label:<24} {len(encoded) / 1024:>7.1f}"
+        for _, dumps, loads in found:
+            assert loads(dumps(payload)) == payload
+            row += f" {time_per_call(dumps, payload):>11.1f} {time_per_call(loads, encoded):>11.1f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
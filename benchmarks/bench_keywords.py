@@ -0,0 +1,64 @@
+"""
+Benchmark: Aho-Corasick keyword automaton vs substring loop.
+
+Compares src.keywords.KeywordAutomaton with the previous
+`[kw for kw in keywords if kw in message_lower]` loop, for the shipped
+lexicon and for a synthetic lexicon of several thousand phrases.
+
+Usage:
+    python -m benchmarks.bench_keywords
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.keywords import KeywordAutomaton, KeywordEntry, SCAM_LEXICON
+from benchmarks.bench_patterns import build_message
+
+
+def synthetic_lexicon(size: int, seed: int = 7) -> list:
+    """Random two- and three-word phrases plus the shipped lexicon"""
+    rng = random.Random(seed)
+    syllables = ["ka", "ro", "na", "pe", "ji", "tu", "sa", "mo", "li", "da"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+    entries = list(SCAM_LEXICON.entries.values())
+    while len(entries) < size:
+        phrase = " ".join(word() for _ in range(rng.randint(2, 3)))
+        entries.append(KeywordEntry(phrase, "synthetic", 0.2))
+    return entries
+
+
+def substring_loop(keywords: list, message: str) -> list:
+    """The previous approach: one substring search per keyword"""
+    message_lower = message.lower()
+    return [kw for kw in keywords if kw in message_lower]
+
+
+def bench(func, number: int) -> float:
+    """Returns the best per-call time in microseconds"""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    message = build_message(1024)
+
+    print(f"{'lexicon':>8} {'loop (us)':>12} {'automaton (us)':>15}")
+    for size in [len(SCAM_LEXICON.entries), 1000, 5000]:
+        entries = synthetic_lexicon(size)
+        automaton = KeywordAutomaton(entries)
+        keywords = automaton.keywords
+
+        old = bench(lambda: substring_loop(keywords, message), 200)
+        new = bench(lambda: automaton.find_all(message), 200)
+        print(f"{len(keywords):>8} {old:>12.1f} {new:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: agent prompt size against conversation length.
+
+Replays conversations of increasing length and compares the estimated
+prompt tokens of the previous full-history prompt with the windowed
+prompt from src/context.py (recent turns verbatim, older turns in a
+rolling summary folded turn by turn, as the pipeline does).
+
+Usage:
+    python -m benchmarks.bench_prompt_tokens
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import build_messages, build_system_prompt
+from src.context import fold_history, message_tokens
+
+SCAMMER_LINES = [
+    "Your SBI account will be blocked today. Verify KYC immediately.",
+    "Send your OTP now, otherwise your account will be suspended permanently.",
+    "Pay the Rs 99 verification fee to fraud.verify@ybl to unblock your account.",
+    "Click http://sbi-kyc-update.xyz/verify and enter your card details.",
+    "Call our officer at 9876543210, he will help you complete the process.",
+]
+AGENT_LINES = [
+    "Oh dear, this is very worrying! What happened to my account?",
+    "I don't understand these technical things. Can you explain more simply?",
+    "Let me write this down. What was that number again?",
+]
+
+
+def full_history_messages(current_message: str, history: list) -> list:
+    """The previous prompt: every message in the conversation"""
+    messages = [{"role": "system", "content": build_system_prompt()}]
+    for message in history:
+        role = "user" if message["sender"] == "scammer" else "assistant"
+        messages.append({"role": role, "content": message["text"]})
+    messages.append({"role": "user", "content": current_message})
+    return messages
+
+
+def main():
+    print(f"{'turns':>6} {'full (tokens)':>14} {'windowed (tokens)':>18} {'build (us)':>11}")
+
+    history, summary = [], None
+    for turn in range(1, 101):
+        current = SCAMMER_LINES[turn % len(SCAMMER_LINES)]
+
+        started = time.perf_counter()
+        summary = fold_history(summary, history)
+        windowed = build_messages(current, history, summary=summary)
+        elapsed = (time.perf_counter() - started) * 1e6
+
+        if turn in (1, 5, 10, 20, 50, 100):
+            full = message_tokens(full_history_messages(current, history))
+            print(f"{turn:>6} {full:>14} {message_tokens(windowed):>18} {elapsed:>11.1f}")
+
+        history.append({"sender": "scammer", "text": current})
+        history.append({"sender": "agent", "text": AGENT_LINES[turn % len(AGENT_LINES)]})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: merging intelligence into a session, list vs OrderedSet.
+
+Replays a long conversation that grows every intelligence category to
+10k values, each turn repeating some values seen earlier, and compares
+the previous list-backed merge (`if value not in list`) with the
+OrderedSet-backed merge in src/session.py.
+
+Usage:
+    python -m benchmarks.bench_session_merge
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.session import SessionData, merge_intelligence
+
+CATEGORIES = [
+    "upiIds", "bankAccounts", "phoneNumbers",
+    "ifscCodes", "phishingLinks", "suspiciousKeywords"
+]
+
+
+def build_turns(items_per_category: int, per_turn: int = 20, seed: int = 7) -> list:
+    """Per-turn extraction results; half of each turn repeats earlier values"""
+    rng = random.Random(seed)
+    turns = []
+    added = 0
+
+    while added < items_per_category:
+        fresh = [f"value-{added + i}" for i in range(per_turn // 2)]
+        repeats = [f"value-{rng.randrange(added + 1)}" for _ in range(per_turn // 2)]
+        turns.append({key: fresh + repeats for key in CATEGORIES})
+        added += len(fresh)
+
+    return turns
+
+
+def list_merge(intelligence: dict, extracted: dict) -> None:
+    """The previous approach: linear membership test on each list"""
+    for key, values in extracted.items():
+        for value in values:
+            if value not in intelligence[key]:
+                intelligence[key].append(value)
+
+
+def main():
+    print(f"{'items':>7} {'list (ms)':>11} {'OrderedSet (ms)':>16}")
+    for items in [1000, 10000]:
+        turns = build_turns(items)
+
+        intelligence = {key: [] for key in CATEGORIES}
+        started = time.perf_counter()
+        for extracted in turns:
+            list_merge(intelligence, extracted)
+        old = (time.perf_counter() - started) * 1000
+
+        session = SessionData(session_id="bench", created_at=datetime.now())
+        started = time.perf_counter()
+        for extracted in turns:
+            merge_intelligence(session, extracted)
+        new = (time.perf_counter() - started) * 1000
+
+        assert session.intelligence_lists() == intelligence
+        print(f"{items:>7} {old:>11.1f} {new:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
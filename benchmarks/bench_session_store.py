@@ -0,0 +1,88 @@
+"""
+Benchmark: session store turn latency per backend.
+
+Replays the store traffic of one /honeypot turn - get the session, then
+one atomic update with both messages and the turn's results - against
+the in-memory store and the SQLite store, for conversations of growing
+length.
+
+Usage:
+    python -m benchmarks.bench_session_store
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.session import _apply_update
+from src.session_store import MemorySessionStore, SQLiteSessionStore
+from src.extractor import extract_new_messages
+from benchmarks.bench_patterns import build_message
+
+
+def run_turns(store, sessions: int, turns: int, message: str) -> list:
+    """Plays `turns` turns on each of `sessions` sessions; returns per-turn ms"""
+    latencies = []
+
+    for n in range(sessions):
+        store.create(f"bench-{n}")
+
+    for turn in range(turns):
+        for n in range(sessions):
+            session_id = f"bench-{n}"
+            text = f"{message} turn {turn}"
+            started = time.perf_counter()
+
+            session = store.get(session_id)
+            scanned = extract_new_messages(
+                [{"sender": "scammer", "text": text}],
+                session.message_extractions
+            )
+            store.update(session_id, lambda s: _apply_update(
+                s,
+                s.message_count + 2,
+                True,
+                0.9,
+                [
+                    {"sender": "scammer", "text": text, "timestamp": turn},
+                    {"sender": "agent", "text": "Which account?", "timestamp": turn}
+                ],
+                None,
+                ["urgency"],
+                scanned
+            ))
+
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    return latencies
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    message = build_message(512)
+    directory = tempfile.mkdtemp()
+
+    print(f"{'backend':>8} {'turns':>6} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+    for turns in [5, 10, 20]:
+        backends = [
+            ("memory", MemorySessionStore()),
+            ("sqlite", SQLiteSessionStore(os.path.join(directory, f"bench-{turns}.db")))
+        ]
+        for name, store in backends:
+            latencies = run_turns(store, sessions=50, turns=turns, message=message)
+            print(
+                f"{name:>8} {turns:>6} "
+                f"{percentile(latencies, 0.5):>10.3f} {percentile(latencies, 0.99):>10.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
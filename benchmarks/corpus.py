@@ -0,0 +1,88 @@
+"""
+Synthetic scam message corpus for benchmarks.
+
+Messages are built from scam script templates (KYC, OTP, payment,
+lottery, Hinglish variants) filled with random UPI IDs, phone numbers,
+bank accounts, IFSC codes and links, mixed with ordinary messages. The
+same seed always gives the same corpus, so runs are comparable.
+
+Usage:
+    python -m benchmarks.corpus 10000 > corpus.jsonl
+"""
+
+import json
+import random
+import sys
+from typing import Dict, List
+
+SCAM_TEMPLATES = [
+    "Dear customer your {bank} account is blocked due to pending KYC. Verify immediately at {url}",
+    "Your account will be suspended today. Share the OTP sent to your number to avoid this.",
+    "Pay Rs {amount} verification fee to {upi} to unblock your account urgently.",
+    "Congratulations! You won a lottery of Rs {amount}. Call {phone} to claim your prize.",
+    "This is {bank} head office. Transfer Rs {amount} to account {account} IFSC {ifsc} for refund.",
+    "aapka {bank} khata band ho jayega, turant OTP bhejo ya {phone} par call karo",
+    "Your electricity connection will be cut tonight. Pay now at {url} or call {phone}.",
+    "Income tax refund of Rs {amount} pending. Update details at {url} within 24 hours.",
+]
+
+NORMAL_TEMPLATES = [
+    "Hi, are we still meeting for lunch tomorrow?",
+    "The parcel was delivered to your neighbour, please collect it.",
+    "Can you send me the notes from yesterday's class?",
+    "Happy birthday! Have a wonderful day with the family.",
+    "Your appointment is confirmed for Monday at {hour} pm.",
+    "Mom said dinner is at {hour}, don't be late.",
+]
+
+BANKS = ["SBI", "HDFC", "ICICI", "Axis", "PNB", "Kotak"]
+UPI_HANDLES = ["ybl", "paytm", "okaxis", "oksbi", "upi", "ibl"]
+TLDS = ["xyz", "in", "top", "online", "site"]
+
+
+def fill(template: str, rng: random.Random) -> str:
+    """Fill a template's placeholders with random identifiers"""
+    bank = rng.choice(BANKS)
+    return template.format(
+        bank=bank,
+        amount=rng.choice([99, 499, 1999, 25000, 100000]),
+        upi=f"{rng.choice(['refund', 'kyc', 'help', 'verify'])}{rng.randrange(1000)}@{rng.choice(UPI_HANDLES)}",
+        phone=f"{rng.choice('6789')}{rng.randrange(10 ** 8, 10 ** 9)}",
+        account=str(rng.randrange(10 ** 11, 10 ** 12)),
+        ifsc=f"{bank[:4].upper():X<4}0{rng.randrange(100000, 999999)}",
+        url=f"https://{bank.lower()}-kyc-{rng.randrange(100)}.{rng.choice(TLDS)}/verify?id={rng.randrange(10 ** 6)}",
+        hour=rng.randrange(1, 12),
+    )
+
+
+def generate_messages(count: int, scam_ratio: float = 0.7, seed: int = 1) -> List[Dict]:
+    """
+    Generate a labeled corpus.
+
+    Args:
+        count: Number of messages
+        scam_ratio: Fraction of scam messages
+        seed: Random seed
+
+    Returns:
+        [{"id", "text", "label"}] with label 1 for scam messages
+    """
+    rng = random.Random(seed)
+    messages = []
+
+    for n in range(count):
+        scam = rng.random() < scam_ratio
+        template = rng.choice(SCAM_TEMPLATES if scam else NORMAL_TEMPLATES)
+        messages.append({"id": n, "text": fill(template, rng), "label": int(scam)})
+
+    return messages
+
+
+def generate_texts(count: int, scam_ratio: float = 0.7, seed: int = 1) -> List[str]:
+    """Just the texts of generate_messages"""
+    return [message["text"] for message in generate_messages(count, scam_ratio, seed)]
+
+
+if __name__ == '__main__':
+    for message in generate_messages(int(sys.argv[1]) if len(sys.argv) > 1 else 1000):
+        sys.stdout.write(json.dumps(message) + "\n")
@@ -0,0 +1,158 @@
+"""
+Timing, JSON results and baseline comparison for the benchmark suite.
+
+Each benchmark produces one result:
+
+    {"name": "patterns.find_upi_ids", "calls": 2000, "opsPerSec": ...,
+     "meanUs": ..., "p50Us": ..., "p95Us": ..., "p99Us": ...}
+
+Results are written as JSON with the run's environment, and a later run
+can be compared against them: a benchmark regresses when its p50 grew by
+more than the tolerance.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(name: str, latencies: List[float], wall: Optional[float] = None) -> Dict:
+    """
+    Result entry for a benchmark.
+
+    Args:
+        name: Benchmark name
+        latencies: Seconds per call
+        wall: Total seconds for all calls (defaults to their sum; give it
+            when calls overlap or the loop itself costs time)
+    """
+    ordered = sorted(latencies)
+    wall = wall if wall is not None else sum(ordered)
+    return {
+        "name": name,
+        "calls": len(ordered),
+        "opsPerSec": round(len(ordered) / wall, 1) if wall else 0.0,
+        "meanUs": round(sum(ordered) / len(ordered) * 1e6, 2),
+        "p50Us": round(percentile(ordered, 0.5) * 1e6, 2),
+        "p95Us": round(percentile(ordered, 0.95) * 1e6, 2),
+        "p99Us": round(percentile(ordered, 0.99) * 1e6, 2),
+    }
+
+
+def time_calls(
+    name: str,
+    func: Callable,
+    inputs: Iterable,
+    repeat: int = 3,
+    warmup: int = 10
+) -> Dict:
+    """
+    Time func(item) for every item, `repeat` times over the inputs.
+
+    Args:
+        name: Benchmark name
+        func: Function under test, called with one input
+        inputs: Inputs (a list, reused each round)
+        repeat: Rounds over the inputs
+        warmup: Untimed calls first (caches, lazy imports)
+    """
+    inputs = list(inputs)
+    for item in inputs[:warmup]:
+        func(item)
+
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for _ in range(repeat):
+        for item in inputs:
+            before = clock()
+            func(item)
+            latencies.append(clock() - before)
+
+    return summarize(name, latencies, clock() - started)
+
+
+def environment() -> Dict:
+    """Where the results came from"""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def write_results(path: str, results: List[Dict]) -> None:
+    """Write results (with the environment) as JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+        f.write("\n")
+
+
+def load_results(path: str) -> List[Dict]:
+    """Results from a file written by write_results"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = 0.15) -> List[Dict]:
+    """
+    Compare results with a baseline run.
+
+    Args:
+        results: This run's results
+        baseline: Earlier results (benchmarks missing from either side
+            are skipped)
+        tolerance: Allowed p50 growth, as a fraction
+
+    Returns:
+        One entry per common benchmark: name, baseline and current p50
+        (microseconds), change (fraction) and regressed
+    """
+    before = {result["name"]: result for result in baseline}
+    rows = []
+
+    for result in results:
+        old = before.get(result["name"])
+        if not old or not old["p50Us"]:
+            continue
+        change = result["p50Us"] / old["p50Us"] - 1
+        rows.append({
+            "name": result["name"],
+            "baselineP50Us": old["p50Us"],
+            "p50Us": result["p50Us"],
+            "change": round(change, 3),
+            "regressed": change > tolerance,
+        })
+
+    return rows
+
+
+def print_results(results: List[Dict]) -> None:
+    """Results as a table"""
+    print(f"{'benchmark':<36} {'calls':>7} {'ops/s':>11} {'p50 (us)':>10} {'p95 (us)':>10} {'p99 (us)':>10}")
+    for result in results:
+        print(
+            f"{result['name']:<36} {result['calls']:>7} {result['opsPerSec']:>11.1f} "
+            f"{result['p50Us']:>10.2f} {result['p95Us']:>10.2f} {result['p99Us']:>10.2f}"
+        )
+
+
+def print_comparison(rows: List[Dict]) -> None:
+    """Baseline comparison as a table"""
+    print(f"\n{'benchmark':<36} {'baseline p50':>13} {'p50':>10} {'change':>8}")
+    for row in rows:
+        flag = "  ⚠️ regressed" if row["regressed"] else ""
+        print(
+            f"{row['name']:<36} {row['baselineP50Us']:>13.2f} {row['p50Us']:>10.2f} "
+            f"{row['change']:>+8.1%}{flag}"
+        )
@@ -0,0 +1,263 @@
+"""
+Load test: /honeypot latency under overload, with and without admission
+control.
+
+Serves the Flask app the way it is deployed - gunicorn with
+gunicorn.conf.py in a subprocess (one worker of --threads threads, with
+the memory session store) - with the LLM replaced by a fake OpenAI-compatible server
+that answers in --llm-ms and handles at most --llm-capacity requests at
+once (like a provider's rate limit, the rest queue), and callbacks going
+to a local sink. Sends turns open loop at --rate requests per second for
+--duration seconds - a mix of new sessions and further turns of earlier
+ones - once with ADMISSION_MAX_IN_FLIGHT=0 (admission control off) and
+once with --max-in-flight, and prints status counts, where replies came
+from (scraped from /metrics) and latency percentiles.
+
+By default turns wait for the LLM however long it takes
+(--reply-deadline-ms 0): with the LLM saturated, every handler thread
+waits on it and requests queue for a thread, so latency without
+admission control grows for as long as the overload lasts. With it,
+turns switch to template replies once requests wait too long for a
+thread and new sessions are shed with 503, so p99 stays bounded.
+(REPLY_DEADLINE_MS alone caps the wait for the LLM, but every turn
+still pays it.)
+
+The load generator and the fake LLM share the machine with the server,
+so this tests LLM saturation, not CPU saturation.
+
+Usage:
+    python -m benchmarks.load_test --rate 60 --duration 10
+    python -m benchmarks.load_test --reply-deadline-ms 3000
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from src.config import Config
+from benchmarks.corpus import generate_texts
+from benchmarks.harness import percentile
+
+API_KEY = "load-secret"
+
+# honeypot_replies_total{source="llm"} 12.0
+REPLIES_LINE = re.compile(r'^honeypot_replies_total\{source="(\w+)"\} ([0-9.e+]+)$', re.MULTILINE)
+
+
+class FakeLLM(BaseHTTPRequestHandler):
+    """Streams a short reply after the server's delay, `capacity` at a time"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.capacity:
+            time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = {
+            "id": "chatcmpl-load", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": "Which bank is this?"},
+                         "finish_reason": None}]
+        }
+        try:
+            for data in (f"data: {json.dumps(chunk)}\n\n".encode(), b"data: [DONE]\n\n", b""):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class CallbackSink(BaseHTTPRequestHandler):
+    """Accepts every callback"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(server) -> None:
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def start_fakes(llm_ms: int, llm_capacity: int) -> dict:
+    """Fake LLM and callback sink; returns the app's environment for them"""
+    fake = ThreadingHTTPServer(("127.0.0.1", 0), FakeLLM)
+    fake.daemon_threads = True
+    fake.delay = llm_ms / 1000
+    fake.capacity = threading.Semaphore(llm_capacity)
+    serve(fake)
+
+    sink = ThreadingHTTPServer(("127.0.0.1", 0), CallbackSink)
+    sink.daemon_threads = True
+    serve(sink)
+
+    return {
+        "GROQ_API_KEY": "load-test",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{fake.server_port}",
+        "GROQ_HEDGE_AFTER_MS": "0",
+        "GUVI_CALLBACK_URL": f"http://127.0.0.1:{sink.server_port}/callback",
+    }
+
+
+def start_gunicorn(env: dict) -> tuple:
+    """Run gunicorn -c gunicorn.conf.py with env; returns (process, base URL)"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            **env,
+            "API_SECRET_KEY": API_KEY,
+            "API_RATE_PER_SEC": "0",  # no per-key limits: test admission only
+            "API_MAX_CONCURRENT": "0",
+            "CALLBACK_SPOOL_DIR": tempfile.mkdtemp(prefix="load-callbacks-"),
+            "LOG_LEVEL": "WARNING",
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def reply_sources(base_url: str) -> dict:
+    """Replies by source, from the server's /metrics (queued behind any turns left)"""
+    text = requests.get(f"{base_url}/metrics", timeout=600).text
+    return {source: int(float(count)) for source, count in REPLIES_LINE.findall(text)}
+
+
+def run(base_url: str, rate: float, duration: float, new_share: float, texts) -> dict:
+    """Open-loop load; returns latencies and status counts"""
+    rng = random.Random(5)
+    http = requests.Session()
+    http.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=512))
+    headers = {"x-api-key": API_KEY}
+    sessions, lock = [], threading.Lock()
+    results = []
+
+    def send(number: int) -> None:
+        with lock:
+            if sessions and rng.random() > new_share:
+                session_id = rng.choice(sessions)
+            else:
+                session_id = f"load-{number}"
+                sessions.append(session_id)
+        body = {"sessionId": session_id, "message": {
+            "sender": "scammer", "text": texts[number % len(texts)], "timestamp": number}}
+        started = time.perf_counter()
+        try:
+            status = http.post(f"{base_url}/honeypot", json=body, headers=headers, timeout=60).status_code
+        except requests.RequestException:
+            status = 0
+        results.append((status, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=512) as pool:
+        for number in range(int(rate * duration)):
+            delay = started + number / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, number)
+
+    return summarize(results)
+
+
+def summarize(results) -> dict:
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    answered = sorted(latency for status, latency in results if status == 200)
+    every = sorted(latency for _, latency in results)
+    return {
+        "statuses": statuses,
+        "okP50Ms": round(percentile(answered, 0.5) * 1000, 1) if answered else None,
+        "okP99Ms": round(percentile(answered, 0.99) * 1000, 1) if answered else None,
+        "allP99Ms": round(percentile(every, 0.99) * 1000, 1) if every else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=60, help="requests per second (default: 60)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run (default: 10)")
+    parser.add_argument("--new-share", type=float, default=0.3, help="share of turns starting a session (default: 0.3)")
+    parser.add_argument("--llm-ms", type=int, default=800, help="fake LLM latency (default: 800)")
+    parser.add_argument("--llm-capacity", type=int, default=8, help="fake LLM concurrent requests (default: 8)")
+    parser.add_argument("--reply-deadline-ms", type=int, default=0,
+                        help="REPLY_DEADLINE_MS (default: 0, wait for the LLM)")
+    parser.add_argument("--max-in-flight", type=int, default=Config.ADMISSION_MAX_IN_FLIGHT,
+                        help=f"ADMISSION_MAX_IN_FLIGHT for the second run (default: {Config.ADMISSION_MAX_IN_FLIGHT})")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("GUNICORN_THREADS", "4")),
+                        help="GUNICORN_THREADS (default: as deployed, 4)")
+    args = parser.parse_args(argv)
+
+    env = start_fakes(args.llm_ms, args.llm_capacity)
+    env["REPLY_DEADLINE_MS"] = str(args.reply_deadline_ms)
+    env["GUNICORN_THREADS"] = str(args.threads)
+    texts = generate_texts(1000)
+    print(f"LLM: {args.llm_ms} ms, {args.llm_capacity} at a time "
+          f"(~{args.llm_capacity * 1000 / args.llm_ms:.0f} replies/s); gunicorn: {args.threads} threads; "
+          f"load: {args.rate:g} requests/s\n")
+    print(f"{'admission':<20} {'200':>6} {'503':>6} {'other':>6} {'llm':>6} {'template':>9} "
+          f"{'ok p50 ms':>10} {'ok p99 ms':>10} {'all p99 ms':>11}")
+
+    for label, max_in_flight in (("off", 0), (f"max in flight {args.max_in_flight}", args.max_in_flight)):
+        # A fresh server per run: no sessions, cache or latency history
+        process, base_url = start_gunicorn({**env, "ADMISSION_MAX_IN_FLIGHT": str(max_in_flight)})
+        try:
+            result = run(base_url, args.rate, args.duration, args.new_share, texts)
+            replies = reply_sources(base_url)
+        finally:
+            process.send_signal(signal.SIGINT)  # quick shutdown
+            process.wait(timeout=30)
+
+        statuses = result["statuses"]
+        other = sum(count for status, count in statuses.items() if status not in (200, 503))
+        print(f"{label:<20} {statuses.get(200, 0):>6} {statuses.get(503, 0):>6} {other:>6} "
+              f"{replies.get('llm', 0):>6} {replies.get('template', 0):>9} "
+              f"{result['okP50Ms']!s:>10} {result['okP99Ms']!s:>10} {result['allP99Ms']!s:>11}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Benchmark suite for the hot path.
+
+Microbenchmarks for each find_* function, extract_intelligence,
+detect_scam (one message and batched), update_session on both session
+store backends, and an end-to-end /honeypot run through the Flask test
+client - with the LLM replaced by persona templates (no GROQ_API_KEY)
+and callbacks delivered to a local sink - over a synthetic corpus (see
+benchmarks/corpus.py).
+
+Results are written as JSON and can be compared with an earlier run;
+the exit status is 1 if any benchmark's p50 regressed beyond the
+tolerance:
+
+    python -m benchmarks.suite -o baseline.json
+    python -m benchmarks.suite -o current.json --baseline baseline.json
+
+The bench_*.py scripts next to this one compare specific old and new
+implementations; this suite tracks the current code over time.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings for the end-to-end run, before the app reads them
+os.environ.setdefault("API_SECRET_KEY", "bench-secret")
+os.environ["CALLBACK_SPOOL_DIR"] = tempfile.mkdtemp(prefix="bench-callbacks-")
+os.environ["API_RATE_PER_SEC"] = "0"  # time the pipeline, not the rate limiter
+
+from src.config import Config
+from src.detector import detect_scam, detect_scam_batch
+from src.extractor import extract_intelligence, extract_new_messages
+from src.patterns import (
+    find_bank_accounts,
+    find_ifsc_codes,
+    find_phone_numbers,
+    find_scam_keywords,
+    find_upi_ids,
+    find_urls
+)
+from src.session import create_session, set_store, update_session
+from src.session_store import MemorySessionStore, SQLiteSessionStore
+from benchmarks.corpus import generate_texts
+from benchmarks.harness import (
+    compare,
+    load_results,
+    print_comparison,
+    print_results,
+    summarize,
+    time_calls,
+    write_results
+)
+
+# Scammer messages per session in the end-to-end run
+TURNS_PER_SESSION = 4
+
+
+class CallbackSink(BaseHTTPRequestHandler):
+    """Accepts every callback"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_functions(texts, repeat):
+    """Microbenchmarks for the per-message functions"""
+    functions = [
+        ("patterns.find_upi_ids", find_upi_ids),
+        ("patterns.find_bank_accounts", find_bank_accounts),
+        ("patterns.find_phone_numbers", find_phone_numbers),
+        ("patterns.find_ifsc_codes", find_ifsc_codes),
+        ("patterns.find_urls", find_urls),
+        ("patterns.find_scam_keywords", find_scam_keywords),
+        ("extractor.extract_intelligence", extract_intelligence),
+        ("detector.detect_scam", detect_scam),
+    ]
+    results = [time_calls(name, func, texts, repeat) for name, func in functions]
+
+    # Batched detection, timed per batch of 100 messages
+    batches = [texts[i:i + 100] for i in range(0, len(texts), 100)]
+    result = time_calls("detector.detect_scam_batch[100]", detect_scam_batch, batches, repeat)
+    results.append(result)
+
+    return results
+
+
+def bench_update_session(texts, repeat):
+    """One turn's update_session (both messages and results) per backend"""
+    results = []
+    directory = tempfile.mkdtemp(prefix="bench-sessions-")
+    backends = [
+        ("memory", MemorySessionStore()),
+        ("sqlite", SQLiteSessionStore(os.path.join(directory, "sessions.db"))),
+    ]
+
+    for name, store in backends:
+        previous = set_store(store)
+        try:
+            def turn(item):
+                number, text = item
+                session_id = f"bench-{number % 200}"
+                session = store.get(session_id) or create_session(session_id)
+                update_session(
+                    session_id,
+                    message_count=session.message_count + 2,
+                    scam_detected=True,
+                    confidence=0.9,
+                    new_messages=[
+                        {"sender": "scammer", "text": text, "timestamp": number},
+                        {"sender": "agent", "text": "Which account?", "timestamp": number}
+                    ],
+                    message_extractions=extract_new_messages(
+                        [{"text": text}], session.message_extractions
+                    ),
+                    indicators=["urgency"]
+                )
+
+            # Fresh sessions each round, so conversations stay short
+            latencies = []
+            for _ in range(repeat):
+                store.clear()
+                items = list(enumerate(texts))
+                result = time_calls(f"session.update_session[{name}]", turn, items, 1, warmup=0)
+                latencies.append(result)
+            results.append(_merge(latencies))
+        finally:
+            set_store(previous)
+
+    return results
+
+
+def bench_endpoint(texts):
+    """End-to-end /honeypot turns through the Flask test client"""
+    from src.app import app
+    from src.dispatcher import get_dispatcher
+    from src.reply_cache import reply_cache
+    from src.session import clear_all_sessions
+
+    sink = ThreadingHTTPServer(("127.0.0.1", 0), CallbackSink)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    os.environ["GUVI_CALLBACK_URL"] = f"http://127.0.0.1:{sink.server_port}/callback"
+
+    original_key = Config.GROQ_API_KEY
+    Config.GROQ_API_KEY = ""  # persona templates instead of the LLM
+    client = app.test_client()
+    headers = {"x-api-key": os.environ["API_SECRET_KEY"]}
+    clear_all_sessions()
+    reply_cache.clear()
+
+    latencies = []
+    started = time.perf_counter()
+    try:
+        for number, text in enumerate(texts):
+            body = {
+                "sessionId": f"bench-e2e-{number // TURNS_PER_SESSION}",
+                "message": {"sender": "scammer", "text": text, "timestamp": number}
+            }
+            before = time.perf_counter()
+            response = client.post("/honeypot", json=body, headers=headers)
+            latencies.append(time.perf_counter() - before)
+            assert response.status_code == 200, response.data
+        wall = time.perf_counter() - started
+    finally:
+        Config.GROQ_API_KEY = original_key
+        get_dispatcher().stop()
+        sink.shutdown()
+        clear_all_sessions()
+
+    return [summarize("endpoint.honeypot", latencies, wall)]
+
+
+def _merge(results):
+    """One result from several rounds of the same benchmark"""
+    calls = sum(result["calls"] for result in results)
+    merged = dict(results[0])
+    merged["calls"] = calls
+    merged["opsPerSec"] = round(calls / sum(r["calls"] / r["opsPerSec"] for r in results), 1)
+    for key in ("meanUs", "p50Us", "p95Us", "p99Us"):
+        merged[key] = round(sum(r[key] * r["calls"] for r in results) / calls, 2)
+    return merged
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed p50 growth before a regression (default: 0.15)")
+    parser.add_argument("-n", "--messages", type=int, default=2000, help="corpus size (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per microbenchmark (default: 3)")
+    parser.add_argument("--only", help="run benchmarks whose group (patterns, extractor, "
+                                       "detector, session, endpoint) is listed, comma separated")
+    args = parser.parse_args(argv)
+
+    texts = generate_texts(args.messages)
+    groups = set(args.only.split(",")) if args.only else None
+
+    def wanted(*names):
+        return groups is None or groups & set(names)
+
+    results = []
+    if wanted("patterns", "extractor", "detector"):
+        results += [
+            result for result in bench_functions(texts, args.repeat)
+            if groups is None or result["name"].split(".")[0] in groups
+        ]
+    if wanted("session"):
+        results += bench_update_session(texts, args.repeat)
+    if wanted("endpoint"):
+        results += bench_endpoint(texts)
+
+    print_results(results)
+
+    if args.output:
+        write_results(args.output, results)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.tolerance)
+        print_comparison(rows)
+        if any(row["regressed"] for row in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
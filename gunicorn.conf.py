@@ -0,0 +1,80 @@
+"""
+Gunicorn settings for the Flask app (render.yaml runs `gunicorn -c
+gunicorn.conf.py`).
+
+The app is built and warmed up once in the master (preload_app) and the
+workers are forked from it, so the imported modules, the keyword
+automaton, compiled patterns and the memory-mapped scam model are shared
+copy-on-write instead of loaded again by every worker. That keeps worker
+boot fast and memory per worker low, which decides how many workers fit
+on an instance.
+
+Workers are gthread workers (src/gunicorn_worker.py) that stamp each
+request with the time it was queued for a thread, so admission control
+sees requests waiting behind busy threads (see src/admission.py).
+
+Anything holding threads, sockets or files is created per worker after
+the fork (post_fork -> src.warmup.open_connections). Metrics and
+admission state reset themselves in forked children (os.register_at_fork
+in src/metrics.py and src/admission.py).
+
+Several workers need SESSION_BACKEND=sqlite: with the per-process memory
+backend each worker would hold its own copy of a session, and a stale
+copy evicted later would send a second, partial final callback. So the
+default is 1 worker with the memory backend and 2 with sqlite, and more
+than 1 worker with the memory backend fails at startup. render.yaml sets
+SESSION_BACKEND=sqlite.
+
+Settings from the environment:
+    PORT                Port to bind (default: 5000)
+    WEB_CONCURRENCY     Worker processes (default: 2 with sqlite, else 1)
+    GUNICORN_THREADS    Threads per worker (default: 4); a turn mostly
+                        waits on the LLM, so one thread per worker
+                        leaves it idle
+    GUNICORN_TIMEOUT    Seconds before a silent worker is restarted
+                        (default: 30)
+"""
+
+import gc
+import os
+
+from src.config import Config  # also loads .env
+
+_session_backend = Config.SESSION_BACKEND.lower()
+
+wsgi_app = "src.app:create_app()"
+worker_class = "src.gunicorn_worker.QueueTimedWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2" if _session_backend == "sqlite" else "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = True
+
+if workers > 1 and _session_backend == "memory":
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers} needs SESSION_BACKEND=sqlite: memory sessions "
+        "are per worker (see gunicorn.conf.py)"
+    )
+
+
+def on_starting(server):
+    """Before the app is loaded: drop the previous run's metric snapshots"""
+    from src.metrics import clear_snapshots
+
+    clear_snapshots()
+
+
+def when_ready(server):
+    """
+    App loaded, workers not forked yet: move everything allocated so far
+    out of the garbage collector's reach, so collections in the workers
+    don't write to (and copy) the shared pages.
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """In each new worker: its own connection pools, threads and store"""
+    from src.warmup import open_connections
+
+    open_connections()
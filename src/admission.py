@@ -0,0 +1,239 @@
+"""
+Admission control for /honeypot turns.
+
+Every turn is admitted before any detection, extraction or LLM work.
+The controller watches these signals in this process:
+
+- Queue pressure, the larger of: turns in flight, as a fraction of
+  ADMISSION_MAX_IN_FLIGHT, and the average time requests waited before
+  a handler picked them up, as a fraction of ADMISSION_QUEUE_WAIT_MS
+- An exponentially weighted moving average of turn latency (queue wait
+  included), as a fraction of ADMISSION_TARGET_MS (latency pressure)
+
+Under gunicorn a worker runs at most GUNICORN_THREADS turns at once and
+the rest wait for a thread, so in-flight turns never reach the limit
+and the overload shows up as queue wait instead. The wait is measured
+from the X-Request-Start header (set by a proxy in front, or by the
+worker class in src/gunicorn_worker.py when the connection is queued
+for a thread; see request_queue_wait). Under the ASGI app every request
+is in flight at once, so the in-flight count is the signal there.
+
+and admits each turn in one of three ways:
+
+    full      the normal path, LLM included
+    degraded  queue pressure at ADMISSION_DEGRADE_AT or latency over
+              target: the reply comes from the cache or a persona
+              template, never the LLM
+    shed      queue pressure at the turn's shedding threshold: 503 with
+              Retry-After, before anything is created or stored
+
+Turns are shed by priority. New sessions go first (at 1x the in-flight
+limit), then ongoing ones (1.5x), and turns that could complete their
+session and trigger its callback go last (2x, see session.near_callback).
+New sessions are also shed while latency is twice the target. Degraded
+turns are fast, so the average comes back down and the LLM path resumes
+on its own; with no turns finishing, it (and the queue wait average)
+halves every LATENCY_HALF_LIFE seconds, so shedding never outlives the
+overload.
+
+ADMISSION_MAX_IN_FLIGHT=0 turns admission control off.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.config import Config
+from src.metrics import ADMISSIONS, TURNS_IN_FLIGHT
+from src.session import SessionData, near_callback
+
+# Turn priorities, lowest first
+NEW, ONGOING, CLOSING = "new", "ongoing", "closing"
+
+# Queue pressure at which turns of each priority are shed
+SHED_AT = {NEW: 1.0, ONGOING: 1.5, CLOSING: 2.0}
+
+# Latency pressure at which new sessions are shed
+LATENCY_SHED_AT = 2.0
+
+# Weight of the newest turn in the latency average
+EWMA_ALPHA = 0.1
+
+# Seconds for the latency average to halve while no turn finishes
+LATENCY_HALF_LIFE = 5.0
+
+# X-Request-Start values above these are in microseconds / milliseconds
+# since the epoch; smaller ones are in seconds
+_MICROSECONDS_FROM = 1e15
+_MILLISECONDS_FROM = 1e12
+
+
+class Overloaded(Exception):
+    """Turn shed by admission control; becomes a 503 response"""
+
+    def __init__(self, priority: str, retry_after: float):
+        super().__init__(f"Overloaded, shedding {priority} turns")
+        self.priority = priority
+        # Whole seconds, as the Retry-After header wants them
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    def response(self) -> Tuple[Dict, int]:
+        return {
+            "status": "error",
+            "message": "Service overloaded, retry later",
+            "retryAfter": self.retry_after
+        }, 503
+
+
+class Admission:
+    """An admitted turn; release() it when the turn is done"""
+
+    __slots__ = ("controller", "degraded", "started", "_released")
+
+    def __init__(self, controller: "AdmissionController", degraded: bool, queued: float = 0.0):
+        self.controller = controller
+        self.degraded = degraded
+        # The turn's latency counts from when the request was queued
+        self.started = time.perf_counter() - queued
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller.finish(time.perf_counter() - self.started)
+
+
+class AdmissionController:
+    """In-flight count and queue wait and latency averages for this process"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over (in a forked child: the parent's turns aren't ours)"""
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._latency = 0.0  # seconds, EWMA as of _updated
+        self._updated = time.monotonic()
+        self._wait = 0.0  # seconds, EWMA as of _waited
+        self._waited = time.monotonic()
+
+    @property
+    def latency(self) -> float:
+        """Average turn latency in seconds, decayed since the last turn"""
+        idle = time.monotonic() - self._updated
+        return self._latency * 0.5 ** (idle / LATENCY_HALF_LIFE)
+
+    @property
+    def queue_wait(self) -> float:
+        """Average queue wait in seconds, decayed since the last turn"""
+        idle = time.monotonic() - self._waited
+        return self._wait * 0.5 ** (idle / LATENCY_HALF_LIFE)
+
+    def pressure(self) -> Tuple[float, float]:
+        """(queue pressure, latency pressure); see the module docstring"""
+        return (
+            max(
+                self.in_flight / Config.ADMISSION_MAX_IN_FLIGHT,
+                self.queue_wait * 1000 / Config.ADMISSION_QUEUE_WAIT_MS
+            ),
+            self.latency * 1000 / Config.ADMISSION_TARGET_MS
+        )
+
+    def admit(self, priority: str, queued: float = 0.0) -> Admission:
+        """
+        Admit a turn, degraded or not.
+
+        Args:
+            priority: NEW, ONGOING or CLOSING (see turn_priority)
+            queued: Seconds the request waited before a handler picked
+                it up (see request_queue_wait)
+
+        Raises:
+            Overloaded: If turns of this priority are being shed
+        """
+        if Config.ADMISSION_MAX_IN_FLIGHT <= 0:
+            return Admission(self, degraded=False)
+
+        with self._lock:
+            wait = self.queue_wait
+            self._wait = wait + EWMA_ALPHA * (queued - wait)
+            self._waited = time.monotonic()
+            queue, latency = self.pressure()
+
+            if queue >= SHED_AT[priority] or (priority == NEW and latency >= LATENCY_SHED_AT):
+                ADMISSIONS.inc(decision="shed", priority=priority)
+                raise Overloaded(priority, latency * Config.ADMISSION_TARGET_MS / 1000)
+
+            degraded = queue >= Config.ADMISSION_DEGRADE_AT or latency >= 1
+            self.in_flight += 1
+
+        ADMISSIONS.inc(decision="degraded" if degraded else "full", priority=priority)
+        return Admission(self, degraded, queued)
+
+    def finish(self, elapsed: float) -> None:
+        """Record a finished turn (Admission.release)"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            latency = self.latency
+            self._latency = latency + EWMA_ALPHA * (elapsed - latency)
+            self._updated = time.monotonic()
+
+
+controller = AdmissionController()
+os.register_at_fork(after_in_child=controller.reset)
+TURNS_IN_FLIGHT.set_function(lambda: controller.in_flight)
+
+
+def turn_priority(session: Optional[SessionData]) -> str:
+    """Priority of a turn for the session it belongs to (None if new)"""
+    if session is None:
+        return NEW
+    if near_callback(session):
+        return CLOSING
+    return ONGOING
+
+
+def admit_turn(session: Optional[SessionData], queued: float = 0.0) -> Admission:
+    """
+    Admit a turn of this session (None if new).
+
+    Args:
+        session: The turn's session, None if new
+        queued: Seconds the request waited for a handler
+
+    Raises:
+        Overloaded: If the turn is shed
+    """
+    return controller.admit(turn_priority(session), queued)
+
+
+def request_queue_wait(request_start: Optional[str], now: float = None) -> float:
+    """
+    Seconds a request waited before reaching its handler.
+
+    Args:
+        request_start: X-Request-Start header: "t=<time since the epoch>"
+            (or the bare number) in seconds, milliseconds or
+            microseconds, as proxies write it
+        now: Current time.time() (defaults to now)
+
+    Returns:
+        The wait, or 0 without a usable header
+    """
+    if not request_start:
+        return 0.0
+
+    try:
+        started = float(request_start.strip().removeprefix("t="))
+    except ValueError:
+        return 0.0
+
+    if started >= _MICROSECONDS_FROM:
+        started /= 1e6
+    elif started >= _MILLISECONDS_FROM:
+        started /= 1e3
+
+    return max(0.0, (now or time.time()) - started)
@@ -1,26 +1,87 @@
 """
 Groq LLM agent for generating responses
 Owner: Member A
+
+The agent plays a trusting, slightly confused elderly person so the
+scammer keeps talking (and keeps handing over UPI IDs, numbers and
+links). Replies come from the Groq LLM (see src/llm.py for deadlines
+and hedging); without a GROQ_API_KEY, or when the call fails or runs
+past the latency budget, they come from persona templates (see
+src/templates.py).
+
+With REPLY_DEADLINE_MS set, a turn waits at most that long for the LLM
+and answers from a template if it is still running; the LLM keeps going
+in the background (up to REPLY_LATENCY_BUDGET_MS) and its late reply is
+handed back so it can shape the next turn. The LLM's deadline is set
+when the reply is queued for a reply thread, and a reply still queued
+when it passes is dropped rather than started late.
+LLM replies are cached (see src/reply_cache.py), so templated scam
+openers rarely reach the LLM. Only replies to prompts without
+session-specific context are cached (see _cacheable): a reply may repeat
+a session's UPI ID, summary or late reply, and must not be replayed to
+another session.
 """
-from typing import List, Dict
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+from src.config import Config
+from src.context import build_context, compact_intelligence
+from src.llm import LLMTimeout, complete, complete_async, reply_deadline
+from src.log import get_logger
+from src.metrics import REPLIES
+from src.reply_cache import reply_cache, reply_cache_key
+from src.templates import template_reply, used_replies
+
+log = get_logger(__name__)
+
+# Longest reply we send back, in words
+MAX_REPLY_WORDS = 100
+
+
+# Callback for a reply that arrives after the turn was answered
+LateReplyHook = Callable[[str], None]
+
+# Worker threads for LLM replies (see get_reply_executor)
+_reply_executor: Optional[ThreadPoolExecutor] = None
+_reply_executor_pid: Optional[int] = None
+_reply_executor_lock = threading.Lock()
+
 
 def generate_agent_reply(
     current_message: str,
     conversation_history: List[Dict],
-    scam_indicators: List[str] = None
+    scam_indicators: List[str] = None,
+    late_reply: str = None,
+    on_late_reply: LateReplyHook = None,
+    summary: Dict = None,
+    extracted_intelligence: Dict = None,
+    use_llm: bool = True
 ) -> str:
     """
     Generates believable honeypot response using Groq LLM
-    
+
     Args:
         current_message: Latest scammer message
         conversation_history: List of previous messages
             [{"sender": "scammer", "text": "..."}, {"sender": "user", "text": "..."}]
         scam_indicators: Detected scam types (for context)
-    
+        late_reply: LLM reply that arrived too late for the previous turn
+        on_late_reply: Called with the LLM reply if it misses
+            REPLY_DEADLINE_MS and the turn is answered from a template
+        summary: Rolling summary of older turns (see src/context.py);
+            only turns after it are sent verbatim
+        extracted_intelligence: Details the scammer already gave
+        use_llm: False to answer from the reply cache or a template
+            only (admission control does this under load)
+
     Returns:
         Agent reply string (max 100 words, human-like)
-    
+
     Example:
         >>> generate_agent_reply(
         ...     "Your account is blocked!",
@@ -29,11 +90,243 @@ def generate_agent_reply(
         ... )
         "Oh no! What happened to my account? I'm very worried..."
     """
-    pass  # Member A implements
+    if not Config.GROQ_API_KEY:
+        REPLIES.inc(source="template")
+        return template_reply(conversation_history, scam_indicators)
+
+    key = reply_cache_key(current_message, scam_indicators, len(conversation_history or []))
+    cached = reply_cache.get(key, avoid=used_replies(conversation_history))
+    if cached:
+        REPLIES.inc(source="cache")
+        return cached
+
+    if not use_llm:
+        REPLIES.inc(source="template")
+        return template_reply(conversation_history, scam_indicators)
+
+    messages = build_messages(
+        current_message, conversation_history, scam_indicators,
+        late_reply, summary, extracted_intelligence
+    )
+    if not _cacheable(late_reply, summary, extracted_intelligence):
+        key = None
+    # The budget runs from now, not from when a reply thread is free
+    future = get_reply_executor().submit(_llm_reply, key, messages, reply_deadline())
+
+    try:
+        reply = future.result(timeout=_soft_deadline())
+        REPLIES.inc(source="llm")
+        return reply
+
+    except FutureTimeoutError:
+        log.info("llm past soft deadline, using template", deadlineMs=Config.REPLY_DEADLINE_MS)
+        _hand_over_late_reply(future, on_late_reply)
+
+    except Exception as e:
+        log.warning("llm reply failed, using template", error=str(e))
+
+    REPLIES.inc(source="template")
+    return template_reply(conversation_history, scam_indicators)
+
+
+async def generate_agent_reply_async(
+    current_message: str,
+    conversation_history: List[Dict],
+    scam_indicators: List[str] = None,
+    late_reply: str = None,
+    on_late_reply: LateReplyHook = None,
+    summary: Dict = None,
+    extracted_intelligence: Dict = None,
+    use_llm: bool = True
+) -> str:
+    """
+    Async version of generate_agent_reply, for the ASGI app.
+
+    Awaiting the LLM call leaves the event loop free to serve other
+    conversations.
+    """
+    if not Config.GROQ_API_KEY:
+        REPLIES.inc(source="template")
+        return template_reply(conversation_history, scam_indicators)
+
+    key = reply_cache_key(current_message, scam_indicators, len(conversation_history or []))
+    cached = reply_cache.get(key, avoid=used_replies(conversation_history))
+    if cached:
+        REPLIES.inc(source="cache")
+        return cached
+
+    if not use_llm:
+        REPLIES.inc(source="template")
+        return template_reply(conversation_history, scam_indicators)
+
+    messages = build_messages(
+        current_message, conversation_history, scam_indicators,
+        late_reply, summary, extracted_intelligence
+    )
+    if not _cacheable(late_reply, summary, extracted_intelligence):
+        key = None
+    task = asyncio.ensure_future(_llm_reply_async(key, messages, reply_deadline()))
+
+    try:
+        reply = await asyncio.wait_for(asyncio.shield(task), _soft_deadline())
+        REPLIES.inc(source="llm")
+        return reply
+
+    except asyncio.TimeoutError:
+        log.info("llm past soft deadline, using template", deadlineMs=Config.REPLY_DEADLINE_MS)
+        _hand_over_late_reply(task, on_late_reply)
+
+    except Exception as e:
+        log.warning("llm reply failed, using template", error=str(e))
+
+    REPLIES.inc(source="template")
+    return template_reply(conversation_history, scam_indicators)
+
+
+def get_reply_executor() -> ThreadPoolExecutor:
+    """Process-wide threads running LLM replies (recreated after a fork)"""
+    global _reply_executor, _reply_executor_pid
+
+    with _reply_executor_lock:
+        if _reply_executor is None or _reply_executor_pid != os.getpid():
+            _reply_executor = ThreadPoolExecutor(
+                max_workers=Config.GROQ_POOL_SIZE,
+                thread_name_prefix="reply"
+            )
+            _reply_executor_pid = os.getpid()
+
+    return _reply_executor
+
+
+def _soft_deadline() -> Optional[float]:
+    """Seconds a turn waits for the LLM (None = until the LLM's deadline)"""
+    return Config.REPLY_DEADLINE_MS / 1000 if Config.REPLY_DEADLINE_MS else None
+
+
+def _cacheable(
+    late_reply: Optional[str],
+    summary: Optional[Dict],
+    extracted_intelligence: Optional[Dict]
+) -> bool:
+    """
+    Whether an LLM reply may be cached for other sessions: only if its
+    prompt carried no late reply, summary or collected intelligence of
+    this session, which the reply could repeat.
+    """
+    return not (
+        late_reply
+        or (summary and summary.get("lines"))
+        or compact_intelligence(extracted_intelligence)
+    )
+
+
+def _llm_reply(key: Optional[tuple], messages: List[Dict[str, str]], deadline: float) -> str:
+    """
+    LLM reply, cleaned and cached (runs on the reply executor).
+
+    Raises:
+        LLMTimeout: If the deadline passed while the reply was queued;
+            its turn was answered from a template already
+    """
+    if time.monotonic() >= deadline:
+        raise LLMTimeout("deadline passed while queued")
+    return _cache_reply(key, complete(messages, deadline))
+
+
+async def _llm_reply_async(key: Optional[tuple], messages: List[Dict[str, str]], deadline: float) -> str:
+    """LLM reply, cleaned and cached"""
+    return _cache_reply(key, await complete_async(messages, deadline))
+
+
+def _cache_reply(key: Optional[tuple], reply: Optional[str]) -> str:
+    """
+    Clean an LLM reply and store it as a variant for key (None = don't
+    cache it).
+
+    Raises:
+        ValueError: If the reply is empty
+    """
+    reply = clean_reply(reply)
+    if not reply:
+        raise ValueError("empty LLM reply")
+
+    if key is not None:
+        reply_cache.add(key, reply)
+    return reply
+
+
+def _hand_over_late_reply(pending, on_late_reply: Optional[LateReplyHook]) -> None:
+    """Pass the reply of a still-running future or task to on_late_reply"""
+
+    def done(finished) -> None:
+        # Checking exception() also marks a failed task as handled
+        if finished.cancelled() or finished.exception() is not None:
+            return
+        if on_late_reply is None:
+            return
+        try:
+            on_late_reply(finished.result())
+        except Exception as e:
+            log.warning("late reply hook failed", error=str(e))
+
+    pending.add_done_callback(done)
 
 
 def build_system_prompt() -> str:
     """
     Returns the system prompt for elderly persona
     """
-    pass  # Member A implements
\ No newline at end of file
+    return (
+        "You are Kamala, a 67-year-old retired school teacher from Chennai "
+        "chatting over SMS. You are polite, trusting and not good with "
+        "technology. The person messaging you is a scammer, but you must "
+        "never say so or reveal that you suspect anything.\n"
+        "Your goal is to keep them talking and get them to share details: "
+        "UPI IDs, bank account numbers, IFSC codes, phone numbers and links. "
+        "Ask them to repeat or spell out payment details, say an app is "
+        "not working, ask for another number or account to try.\n"
+        "Never share real personal data, OTPs, PINs or passwords; stall "
+        "instead (you cannot find your glasses, the message has not come).\n"
+        f"Reply in at most {MAX_REPLY_WORDS // 2} words, in simple English, "
+        "with no lists or formatting."
+    )
+
+
+def build_messages(
+    current_message: str,
+    conversation_history: List[Dict],
+    scam_indicators: List[str] = None,
+    late_reply: str = None,
+    summary: Dict = None,
+    extracted_intelligence: Dict = None
+) -> List[Dict[str, str]]:
+    """
+    Builds the chat messages for the LLM, within PROMPT_TOKEN_BUDGET.
+
+    Scammer turns become "user" messages and our own turns "assistant"
+    messages; turns covered by the summary are only summarized (see
+    src/context.py). A late reply (see generate_agent_reply) is passed
+    on as what the persona had wanted to say last turn.
+    """
+    system = build_system_prompt()
+    if scam_indicators:
+        system += f"\nTactics the scammer is using: {', '.join(scam_indicators)}."
+    if late_reply:
+        system += (
+            "\nLast turn you only managed a short answer; what you had "
+            f"wanted to say was: \"{late_reply}\". Stay consistent with it."
+        )
+
+    return build_context(
+        system,
+        current_message,
+        conversation_history or [],
+        summary=summary,
+        extracted_intelligence=extracted_intelligence
+    )
+
+
+def clean_reply(reply: Optional[str]) -> str:
+    """Trims an LLM reply to MAX_REPLY_WORDS ("" if it is empty)"""
+    words = (reply or "").strip().strip('"').split()
+    return " ".join(words[:MAX_REPLY_WORDS])
@@ -7,143 +7,107 @@ This is the main honeypot API that:
 3. Extracts intelligence
 4. Generates agent replies
 5. Sends callback when complete
+
+Routes live on the `api` blueprint; create_app() builds an app around it
+after warming up (src/warmup.py). `src.app:app` is built on first access,
+so `gunicorn src.app:app` and `from src.app import app` keep working.
+Environment variables (.env) are loaded by src/config.py.
 """
 
 import os
-from flask import Flask, request, jsonify
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+import time
+from flask import Blueprint, Flask, Response, g, request, jsonify
+from flask.json.provider import JSONProvider
 
 # Import our modules
-from src.auth import validate_api_key
-from src.session import (
-    get_session,
-    create_session,
-    update_session,
-    should_send_callback,
-    delete_session
-)
-from src.callback import send_final_callback
+from src.admission import request_queue_wait
+from src.auth import RateLimited, authenticate, load_keys, validate_api_key
+from src.jsonio import dumps, loads
+from src.metrics import CONTENT_TYPE, REQUESTS, REQUEST_SECONDS, STAGE_SECONDS, render
+from src.pipeline import batch_size, handle_batch, handle_turn, intel_lookup, session_info, service_stats
+from src.warmup import warm_up
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by src/jsonio.py (orjson when installed),
+    used by request.get_json() and jsonify().
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        # Bytes straight into the response, without a str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype="application/json")
 
-# Import Member A's modules (will be added later)
-# from src.detector import detect_scam
-# from src.extractor import extract_intelligence
-# from src.agent import generate_agent_reply
 
-# Create Flask app
-app = Flask(__name__)
+# Routes, registered on the app by create_app()
+api = Blueprint("api", __name__)
 
 
 # ============================================
-# TEMPORARY PLACEHOLDER FUNCTIONS
-# These will be replaced by Member A's code
+# REQUEST METRICS
 # ============================================
 
-def detect_scam(message: str, conversation_history: list = None):
-    """
-    PLACEHOLDER - Will be replaced by Member A's detector.py
-    
-    Returns: (is_scam, confidence, indicators)
-    """
-    # Simple keyword-based detection for now
-    scam_keywords = [
-        'blocked', 'suspended', 'verify', 'urgent', 'immediately',
-        'account', 'bank', 'otp', 'pin', 'password', 'lottery',
-        'winner', 'prize', 'claim', 'expire', 'limited time',
-        'act now', 'transfer', 'pay', 'upi', 'kyc'
-    ]
-    
-    message_lower = message.lower()
-    found_keywords = [kw for kw in scam_keywords if kw in message_lower]
-    
-    if len(found_keywords) >= 2:
-        confidence = min(0.5 + (len(found_keywords) * 0.1), 0.99)
-        return True, confidence, found_keywords
-    elif len(found_keywords) == 1:
-        return True, 0.4, found_keywords
-    else:
-        return False, 0.1, []
+@api.before_app_request
+def start_timer():
+    g.started = time.perf_counter()
 
 
-def extract_intelligence(message: str):
-    """
-    PLACEHOLDER - Will be replaced by Member A's extractor.py
-    
-    Returns: dict with extracted data
-    """
-    import re
-    
-    result = {
-        "upiIds": [],
-        "bankAccounts": [],
-        "phoneNumbers": [],
-        "ifscCodes": [],
-        "phishingLinks": [],
-        "suspiciousKeywords": []
-    }
-    
-    # UPI ID pattern
-    upi_pattern = r'[a-zA-Z0-9.\-_]{2,}@[a-zA-Z]{2,}'
-    result["upiIds"] = re.findall(upi_pattern, message)
-    
-    # Phone number pattern (Indian)
-    phone_pattern = r'(?:\+91[\-\s]?)?[6-9]\d{9}'
-    result["phoneNumbers"] = re.findall(phone_pattern, message)
-    
-    # Bank account pattern (10-18 digits)
-    bank_pattern = r'\b\d{10,18}\b'
-    result["bankAccounts"] = re.findall(bank_pattern, message)
-    
-    # IFSC pattern
-    ifsc_pattern = r'[A-Z]{4}0[A-Z0-9]{6}'
-    result["ifscCodes"] = re.findall(ifsc_pattern, message.upper())
-    
-    # URL pattern
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    result["phishingLinks"] = re.findall(url_pattern, message)
-    
-    # Suspicious keywords
-    keywords = ['urgent', 'blocked', 'verify', 'otp', 'pin', 'expire']
-    message_lower = message.lower()
-    result["suspiciousKeywords"] = [kw for kw in keywords if kw in message_lower]
-    
-    return result
+@api.after_app_request
+def record_request(response):
+    # Route pattern, not the path, so session IDs don't become labels
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - g.started, route=route)
+    REQUESTS.inc(route=route, status=response.status_code)
+    return response
+
+
+# ============================================
+# API KEY LIMITS
+# ============================================
+
+def json_response(body, status):
+    """jsonify, with Retry-After when the body asks the client to retry"""
+    if "retryAfter" in body:
+        return jsonify(body), status, {"Retry-After": str(body["retryAfter"])}
+    return jsonify(body), status
 
 
-def generate_agent_reply(current_message: str, conversation_history: list, scam_indicators: list = None):
+def admit_key(key):
     """
-    PLACEHOLDER - Will be replaced by Member A's agent.py
-    
-    Returns: Agent reply string
+    Take a request slot from the key's limits (see src/auth.py).
+
+    Returns:
+        None if admitted (the slot is given back after the request),
+        else a 429 response with Retry-After
     """
-    # Simple responses based on message count
-    msg_count = len(conversation_history) if conversation_history else 0
-    
-    responses = [
-        "Oh dear, this is very worrying! What happened to my account?",
-        "I don't understand these technical things. Can you explain more simply?",
-        "My grandson usually helps me with this. What should I do?",
-        "This sounds urgent! How can I fix this problem?",
-        "I'm confused. Where should I send the money?",
-        "Let me write this down. What was that number again?",
-        "Oh my! I hope I don't lose my savings. Tell me what to do.",
-        "Should I go to the bank? Or can I do it on my phone?",
-        "I'm not good with computers. Can you guide me step by step?",
-        "Thank you for helping me. What information do you need?"
-    ]
-    
-    # Select response based on message count
-    index = msg_count % len(responses)
-    return responses[index]
+    try:
+        key.admit()
+    except RateLimited as e:
+        return json_response(*e.response())
+
+    g.api_key = key
+    return None
+
+
+@api.teardown_app_request
+def release_key(error=None):
+    key = g.pop("api_key", None)
+    if key is not None:
+        key.release()
 
 
 # ============================================
 # API ROUTES
 # ============================================
 
-@app.route('/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint for Render.
@@ -154,7 +118,7 @@ def health_check():
     return jsonify({"status": "healthy"}), 200
 
 
-@app.route('/honeypot', methods=['POST'])
+@api.route('/honeypot', methods=['POST'])
 def honeypot_endpoint():
     """
     Main honeypot API endpoint.
@@ -184,50 +148,31 @@ def honeypot_endpoint():
     }
     """
     
+    # Time spent waiting for this thread (see src/admission.py)
+    queued = request_queue_wait(request.headers.get("X-Request-Start"))
+    
     # ========================================
-    # Step 1: Validate API Key
+    # Step 1: Validate API Key and its limits
     # ========================================
-    if not validate_api_key(request):
+    with STAGE_SECONDS.time(stage="auth"):
+        key = authenticate(request)
+    
+    if not key:
         return jsonify({
             "status": "error",
             "message": "Unauthorized - Invalid API key"
         }), 401
     
+    limited = admit_key(key)
+    if limited:
+        return limited
+    
     # ========================================
     # Step 2: Parse Request Body
     # ========================================
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                "status": "error",
-                "message": "Missing request body"
-            }), 400
-        
-        # Extract required fields
-        session_id = data.get('sessionId')
-        message_data = data.get('message', {})
-        conversation_history = data.get('conversationHistory', [])
-        metadata = data.get('metadata', {})
-        
-        # Validate required fields
-        if not session_id:
-            return jsonify({
-                "status": "error",
-                "message": "Missing sessionId"
-            }), 400
-        
-        if not message_data or not message_data.get('text'):
-            return jsonify({
-                "status": "error",
-                "message": "Missing message text"
-            }), 400
-        
-        message_text = message_data.get('text', '')
-        message_sender = message_data.get('sender', 'scammer')
-        message_timestamp = message_data.get('timestamp', 0)
-        
+        with STAGE_SECONDS.time(stage="parse"):
+            data = request.get_json()
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -235,108 +180,79 @@ def honeypot_endpoint():
         }), 400
     
     # ========================================
-    # Step 3: Get or Create Session
-    # ========================================
-    session = get_session(session_id)
-    
-    if not session:
-        session = create_session(session_id)
-        print(f"📝 New session created: {session_id}")
-    else:
-        print(f"📂 Existing session: {session_id} (messages: {session.message_count})")
-    
-    # ========================================
-    # Step 4: Detect Scam
+    # Step 3: Run the Turn
     # ========================================
-    is_scam, confidence, indicators = detect_scam(
-        message_text,
-        session.conversation_history
-    )
-    
-    print(f"🔍 Scam detection: {is_scam} (confidence: {confidence:.2f})")
+    # Admission, session, detection, extraction, agent reply and
+    # callback (see src/pipeline.py, shared with the ASGI app)
+    body, status = handle_turn(data, queued)
     
-    # ========================================
-    # Step 5: Extract Intelligence
-    # ========================================
-    extracted = extract_intelligence(message_text)
-    
-    # Log what was extracted
-    for key, values in extracted.items():
-        if values:
-            print(f"🎯 Extracted {key}: {values}")
-    
-    # ========================================
-    # Step 6: Generate Agent Reply
-    # ========================================
-    agent_reply = generate_agent_reply(
-        message_text,
-        session.conversation_history,
-        indicators
-    )
-    
-    print(f"🤖 Agent reply: {agent_reply[:50]}...")
+    with STAGE_SECONDS.time(stage="respond"):
+        return json_response(body, status)
+
+
+@api.route('/honeypot/batch', methods=['POST'])
+def honeypot_batch_endpoint():
+    """
+    Batch honeypot endpoint, for gateways that buffer messages.
     
-    # ========================================
-    # Step 7: Update Session
-    # ========================================
+    Request format: an array of /honeypot request bodies (or
+    {"items": [...]}), for any number of sessions. A session's messages
+    are answered in array order.
     
-    # Add scammer message to history
-    update_session(
-        session_id,
-        new_message={
-            "sender": message_sender,
-            "text": message_text,
-            "timestamp": message_timestamp
-        }
-    )
+    Response format:
+    {
+        "status": "success",
+        "results": [
+            {"sessionId": "...", "status": "success", "reply": "..."},
+            {"status": "error", "message": "Missing sessionId"}
+        ],
+        "succeeded": 1,
+        "failed": 1
+    }
+    """
+    key = authenticate(request)
+    if not key:
+        return jsonify({
+            "status": "error",
+            "message": "Unauthorized - Invalid API key"
+        }), 401
     
-    # Add agent reply to history
-    import time
-    update_session(
-        session_id,
-        new_message={
-            "sender": "agent",
-            "text": agent_reply,
-            "timestamp": int(time.time() * 1000)
-        }
-    )
+    limited = admit_key(key)
+    if limited:
+        return limited
     
-    # Update session with new data
-    session = update_session(
-        session_id,
-        message_count=session.message_count + 2,  # scammer + agent
-        scam_detected=is_scam or session.scam_detected,
-        confidence=max(confidence, session.confidence),
-        extracted_intelligence=extracted,
-        indicators=indicators
-    )
+    try:
+        data = request.get_json()
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Invalid request format: {str(e)}"
+        }), 400
     
-    # ========================================
-    # Step 8: Check if Callback Needed
-    # ========================================
-    if should_send_callback(session):
-        print(f"📤 Sending callback for session: {session_id}")
-        
-        # Send callback to GUVI
-        callback_success = send_final_callback(session)
-        
-        if callback_success:
-            print(f"✅ Callback sent successfully")
-            # Delete session after successful callback
-            delete_session(session_id)
-        else:
-            print(f"⚠️ Callback failed, keeping session")
+    # Every item past the first costs a token too, before any of it runs
+    try:
+        key.charge(batch_size(data) - 1)
+    except RateLimited as e:
+        return json_response(*e.response())
+    
+    # Detection and extraction for the whole batch, then the sessions'
+    # turns concurrently (see src/pipeline.py)
+    body, status = handle_batch(data)
+    return jsonify(body), status
+
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus metrics: per-stage turn latency, request latency, session,
+    detection, reply and callback counters (see src/metrics.py).
     
-    # ========================================
-    # Step 9: Return Response
-    # ========================================
-    return jsonify({
-        "status": "success",
-        "reply": agent_reply
-    }), 200
+    Counts only, no conversation data, so it is open like /health.
+    """
+    return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
 
 
-@app.route('/session/<session_id>', methods=['GET'])
+@api.route('/session/<session_id>', methods=['GET'])
 def get_session_info(session_id):
     """
     Debug endpoint to check session status.
@@ -349,33 +265,62 @@ def get_session_info(session_id):
             "message": "Unauthorized"
         }), 401
     
-    session = get_session(session_id)
+    body, status = session_info(session_id)
+    return jsonify(body), status
+
+
+@api.route('/intel/lookup', methods=['GET'])
+def intel_lookup_endpoint():
+    """
+    Sessions that reported an indicator, across all sessions (including
+    completed ones).
+    
+    Query: value (UPI ID, phone, account, IFSC or URL/domain) and
+    optionally type (upiIds, phoneNumbers, bankAccounts, ifscCodes or
+    phishingLinks).
     
-    if not session:
+    Response format:
+    {
+        "status": "success",
+        "value": "Fraud@Paytm",
+        "matches": [
+            {"type": "upiIds", "indicator": "fraud@paytm",
+             "firstSeen": 1770005528731, "lastSeen": 1770009128731,
+             "sessionCount": 2, "sessions": ["abc", "xyz"]}
+        ]
+    }
+    """
+    if not validate_api_key(request):
         return jsonify({
             "status": "error",
-            "message": "Session not found"
-        }), 404
+            "message": "Unauthorized"
+        }), 401
     
-    return jsonify({
-        "status": "success",
-        "session": {
-            "sessionId": session.session_id,
-            "messageCount": session.message_count,
-            "scamDetected": session.scam_detected,
-            "confidence": session.confidence,
-            "indicators": session.indicators,
-            "extractedIntelligence": session.extracted_intelligence,
-            "conversationLength": len(session.conversation_history)
-        }
-    }), 200
+    body, status = intel_lookup(request.args.get("value"), request.args.get("type"))
+    return jsonify(body), status
+
+
+@api.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    Operational counters: session store, reply cache hit rate and LLM
+    calls saved per minute, callback dispatcher.
+    """
+    if not validate_api_key(request):
+        return jsonify({
+            "status": "error",
+            "message": "Unauthorized"
+        }), 401
+    
+    body, status = service_stats()
+    return jsonify(body), status
 
 
 # ============================================
 # ERROR HANDLERS
 # ============================================
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     return jsonify({
         "status": "error",
@@ -383,7 +328,7 @@ def not_found(error):
     }), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     return jsonify({
         "status": "error",
@@ -391,11 +336,55 @@ def internal_error(error):
     }), 500
 
 
+# ============================================
+# APPLICATION FACTORY
+# ============================================
+
+def create_app(warm: bool = True) -> Flask:
+    """
+    Build the Flask app.
+    
+    Args:
+        warm: Run warm_up() first, so the first request doesn't pay for
+            loading the LLM SDK, the scam model and the patterns
+    
+    Returns:
+        The app, with the API routes and the fast JSON provider
+    
+    Usage with gunicorn (see gunicorn.conf.py):
+        gunicorn "src.app:create_app()"
+    """
+    # Fails here, at boot, on a malformed API_KEYS
+    load_keys()
+    if warm:
+        warm_up()
+    
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.register_blueprint(api)
+    return app
+
+
+_app = None
+
+
+def __getattr__(name):
+    """`app`: built by create_app() on first access"""
+    global _app
+    
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # ============================================
 # RUN APPLICATION
 # ============================================
 
 if __name__ == '__main__':
+    app = create_app()
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     
@@ -0,0 +1,266 @@
+"""
+ASGI Application - async variant of the honeypot API
+
+Serves the same routes as the Flask app (src/app.py) from the same
+pipeline (src/pipeline.py), but awaits the Groq LLM call instead of
+blocking a worker on it, so one process can keep hundreds of
+conversations in flight while it waits on I/O. Final callbacks already
+leave the request path: both apps hand them to the background
+dispatcher, which spools and retries them.
+
+Run with any ASGI server, e.g.:
+    uvicorn src.asgi:app --host 0.0.0.0 --port $PORT
+    gunicorn src.asgi:app -k uvicorn.workers.UvicornWorker
+"""
+
+import asyncio
+import re
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+# Import our modules (src/config.py loads .env)
+from src.admission import request_queue_wait
+from src.auth import RateLimited, authenticate, load_keys, validate_api_key
+from src.jsonio import dumps, loads
+from src.log import get_logger
+from src.metrics import CONTENT_TYPE, REQUESTS, REQUEST_SECONDS, STAGE_SECONDS, render
+from src.pipeline import (
+    RequestError,
+    batch_size,
+    handle_batch_async,
+    handle_turn_async,
+    intel_lookup,
+    service_stats,
+    session_info
+)
+from src.warmup import warm_up
+
+log = get_logger(__name__)
+
+# Largest request body we accept
+MAX_BODY_BYTES = 1024 * 1024
+
+_SESSION_ROUTE = re.compile(r'^/session/([^/]+)$')
+
+# Fixed routes (request metrics are labeled with these, like Flask's)
+ROUTES = ("/health", "/honeypot", "/honeypot/batch", "/intel/lookup", "/metrics", "/stats")
+
+
+class ASGIRequest:
+    """
+    The parts of a request our helpers read.
+
+    authenticate and validate_api_key only look at
+    request.headers.get(), so this stands in for the Flask request object.
+    """
+
+    def __init__(self, scope: Dict):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        # Header names are already lower-case in ASGI
+        self.headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    body, status = await _route(scope, receive)
+
+    if isinstance(body, str):
+        await _send(send, body.encode("utf-8"), status, CONTENT_TYPE)
+    elif "retryAfter" in body:
+        # 429 and 503: when to come back
+        await _send_json(send, body, status, [(b"retry-after", str(body["retryAfter"]).encode("latin-1"))])
+    elif scope["path"].startswith("/honeypot"):
+        with STAGE_SECONDS.time(stage="respond"):
+            await _send_json(send, body, status)
+    else:
+        await _send_json(send, body, status)
+
+    route = _route_name(scope["path"])
+    REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+    REQUESTS.inc(route=route, status=status)
+
+
+async def _lifespan(receive, send) -> None:
+    """Load keys and warm up on server startup; acknowledge startup and shutdown"""
+    while True:
+        event = await receive()
+        if event["type"] == "lifespan.startup":
+            try:
+                load_keys()
+            except ValueError as e:
+                # A malformed API_KEYS stops the server instead of
+                # failing every request
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            warm_up()
+            await send({"type": "lifespan.startup.complete"})
+        elif event["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _route_name(path: str) -> str:
+    """Route pattern of a path, as Flask names it"""
+    if path in ROUTES:
+        return path
+    if _SESSION_ROUTE.match(path):
+        return "/session/<session_id>"
+    return "unmatched"
+
+
+async def _route(scope, receive):
+    """
+    Dispatch a request to its handler.
+
+    Returns:
+        (body, status); the body is a JSON object, or text for /metrics
+    """
+    method, path = scope["method"], scope["path"]
+
+    try:
+        # ========================================
+        # GET /health
+        # ========================================
+        if path == "/health" and method == "GET":
+            return {"status": "healthy"}, 200
+
+        # ========================================
+        # POST /honeypot, POST /honeypot/batch
+        # ========================================
+        if path in ("/honeypot", "/honeypot/batch") and method == "POST":
+            # Key and limits before the body is even read
+            request = ASGIRequest(scope)
+            queued = request_queue_wait(request.headers.get("x-request-start"))
+            with STAGE_SECONDS.time(stage="auth"):
+                key = authenticate(request)
+
+            if not key:
+                return {
+                    "status": "error",
+                    "message": "Unauthorized - Invalid API key"
+                }, 401
+
+            key.admit()
+            try:
+                body = await _read_body(receive)
+                try:
+                    with STAGE_SECONDS.time(stage="parse"):
+                        data = loads(body) if body else None
+                except ValueError as e:
+                    return {
+                        "status": "error",
+                        "message": f"Invalid request format: {str(e)}"
+                    }, 400
+
+                if path == "/honeypot/batch":
+                    # Every item past the first costs a token too, before
+                    # any of it runs (429, or 413 if it never fits the bucket)
+                    key.charge(batch_size(data) - 1)
+                    return await handle_batch_async(data)
+                return await handle_turn_async(data, queued)
+            finally:
+                key.release()
+
+        # ========================================
+        # GET /session/<session_id>
+        # ========================================
+        match = _SESSION_ROUTE.match(path)
+        if match and method == "GET":
+            if not validate_api_key(ASGIRequest(scope)):
+                return {"status": "error", "message": "Unauthorized"}, 401
+            return await asyncio.to_thread(session_info, match.group(1))
+
+        # ========================================
+        # GET /intel/lookup
+        # ========================================
+        if path == "/intel/lookup" and method == "GET":
+            if not validate_api_key(ASGIRequest(scope)):
+                return {"status": "error", "message": "Unauthorized"}, 401
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            return await asyncio.to_thread(
+                intel_lookup, query.get("value", [None])[0], query.get("type", [None])[0]
+            )
+
+        # ========================================
+        # GET /metrics
+        # ========================================
+        if path == "/metrics" and method == "GET":
+            return render(), 200
+
+        # ========================================
+        # GET /stats
+        # ========================================
+        if path == "/stats" and method == "GET":
+            if not validate_api_key(ASGIRequest(scope)):
+                return {"status": "error", "message": "Unauthorized"}, 401
+            return await asyncio.to_thread(service_stats)
+
+        if path in ROUTES or match:
+            return {"status": "error", "message": "Method not allowed"}, 405
+
+        return {"status": "error", "message": "Endpoint not found"}, 404
+
+    except (RequestError, RateLimited) as e:
+        return e.response()
+
+    except Exception as e:
+        log.error("unhandled error", method=method, path=path, error=str(e))
+        return {"status": "error", "message": "Internal server error"}, 500
+
+
+async def _read_body(receive) -> bytes:
+    """Read the whole request body (up to MAX_BODY_BYTES)"""
+    chunks = []
+    size = 0
+
+    while True:
+        event = await receive()
+        if event["type"] == "http.disconnect":
+            break
+        chunk = event.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestError("Request body too large", 413)
+        chunks.append(chunk)
+        if not event.get("more_body"):
+            break
+
+    return b"".join(chunks)
+
+
+async def _send_json(send, body: Dict, status: int, headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    """Send a JSON response"""
+    await _send(send, dumps(body), status, "application/json", headers)
+
+
+async def _send(
+    send,
+    payload: bytes,
+    status: int,
+    content_type: str,
+    headers: List[Tuple[bytes, bytes]] = ()
+) -> None:
+    """Send a response, with any extra headers"""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(payload)).encode("latin-1")),
+            *headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": payload})
@@ -1,45 +1,302 @@
 """
 Authentication module for API key validation.
 
-This module handles validating the x-api-key header
-in incoming requests against our stored secret key.
+This module handles validating the x-api-key header of incoming
+requests against the configured API keys, and limiting how much each
+key may send.
+
+Keys come from API_SECRET_KEY (one key, named "default") and API_KEYS,
+a comma-separated list of name:key entries. A key may be given as its
+SHA-256 instead, so the plain key never sits in the environment:
+
+    API_KEYS=guvi:s3cret,partner:sha256:9f86d081884c7d65...
+
+Only SHA-256 digests are kept in memory. A request's key is hashed and
+looked up in a dict, then compared with hmac.compare_digest.
+
+Each key has a token bucket (API_RATE_PER_SEC, up to API_RATE_BURST)
+and a cap on requests in flight (API_MAX_CONCURRENT). Over either
+limit, admit() raises RateLimited, which the apps turn into a 429 with
+Retry-After before the body is parsed. A batch also needs a token for
+each further item, available before any of it runs (charge()); one
+with more items than API_RATE_BURST never fits and gets a 413. Limits
+are per process, so with several gunicorn workers a key may send up to
+workers x the limit.
+
+The registry is built when the app starts (load_keys), so a malformed
+API_KEYS stops the server at boot rather than failing every request.
 """
 
+import hashlib
+import hmac
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
 from flask import Request
-import os
+
+from src.config import Config
+from src.metrics import RATE_LIMITED
+
+
+class RateLimited(Exception):
+    """Request refused by its key's limits; becomes a 429 response"""
+
+    def __init__(self, key: str, reason: str, retry_after: Optional[float]):
+        super().__init__(f"Rate limit exceeded for key {key} ({reason})")
+        self.key = key
+        self.reason = reason
+        # Whole seconds, as the Retry-After header wants them; None for
+        # a batch that can never fit the key's bucket
+        self.retry_after = None if retry_after is None else max(1, math.ceil(retry_after))
+
+    def response(self) -> Tuple[Dict, int]:
+        if self.retry_after is None:
+            return {
+                "status": "error",
+                "message": f"Batch too large for this key: at most {Config.API_RATE_BURST:g} items"
+            }, 413
+        return {
+            "status": "error",
+            "message": "Too many requests",
+            "retryAfter": self.retry_after
+        }, 429
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `burst`.
+
+    A rate of 0 or less means unlimited.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, tokens: float = 1) -> float:
+        """
+        Take tokens if the bucket holds them (nothing is taken if not).
+
+        Returns:
+            0 if taken, else seconds until they are available
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class ApiKey:
+    """A configured key: its digest, token bucket and in-flight count"""
+
+    def __init__(self, name: str, digest: bytes):
+        self.name = name
+        self.digest = digest
+        self.bucket = TokenBucket(Config.API_RATE_PER_SEC, Config.API_RATE_BURST)
+        self.max_concurrent = Config.API_MAX_CONCURRENT
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def admit(self) -> None:
+        """
+        Take a request slot and a token; call release() when done.
+
+        Raises:
+            RateLimited: If the key has max_concurrent requests in
+                flight, or its bucket is empty
+        """
+        with self._lock:
+            if self.max_concurrent > 0 and self.in_flight >= self.max_concurrent:
+                reason, wait = "concurrency", 1.0
+            else:
+                wait = self.bucket.take()
+                if not wait:
+                    self.in_flight += 1
+                    return
+                reason = "rate"
+
+        RATE_LIMITED.inc(key=self.name, reason=reason)
+        raise RateLimited(self.name, reason, wait)
+
+    def release(self) -> None:
+        """Give back the slot taken by admit()"""
+        with self._lock:
+            self.in_flight -= 1
+
+    def charge(self, tokens: int) -> None:
+        """
+        Take extra tokens for work beyond one request (a batch's
+        further items), so batching doesn't get around the rate.
+
+        Raises:
+            RateLimited: If the bucket doesn't hold them now (nothing is
+                taken), with no retry_after if it never can: the
+                request's own token and these exceed the burst
+        """
+        if tokens <= 0 or self.bucket.rate <= 0:
+            return
+
+        if tokens + 1 > self.bucket.burst:
+            RATE_LIMITED.inc(key=self.name, reason="batch")
+            raise RateLimited(self.name, "batch", None)
+
+        with self._lock:
+            wait = self.bucket.take(tokens)
+        if wait:
+            RATE_LIMITED.inc(key=self.name, reason="rate")
+            raise RateLimited(self.name, "rate", wait)
+
+
+def hash_key(key: str) -> bytes:
+    """SHA-256 digest of a key"""
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+
+def parse_keys(secret_key: str, api_keys: str) -> List[Tuple[str, bytes]]:
+    """
+    (name, digest) for each configured key.
+
+    Args:
+        secret_key: API_SECRET_KEY (named "default")
+        api_keys: API_KEYS: comma-separated name:key or name:sha256:<hex>
+
+    Raises:
+        ValueError: For an entry without a name or with a bad digest
+    """
+    keys = [("default", hash_key(secret_key))] if secret_key else []
+
+    for entry in api_keys.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, key = entry.partition(":")
+        if not name or not key:
+            raise ValueError(f"API_KEYS entry must be name:key, got {name or entry!r}")
+        if key.startswith("sha256:"):
+            digest = bytes.fromhex(key[len("sha256:"):])
+            if len(digest) != hashlib.sha256().digest_size:
+                raise ValueError(f"API_KEYS entry {name}: sha256 digest must be 64 hex characters")
+        else:
+            digest = hash_key(key)
+        keys.append((name, digest))
+
+    return keys
+
+
+class KeyRegistry:
+    """Configured keys by digest"""
+
+    def __init__(self, keys: List[Tuple[str, bytes]]):
+        self._keys: Dict[bytes, ApiKey] = {digest: ApiKey(name, digest) for name, digest in keys}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def lookup(self, provided_key: str) -> Optional[ApiKey]:
+        """The key matching a provided key, or None"""
+        digest = hash_key(provided_key)
+        key = self._keys.get(digest)
+        if key is not None and hmac.compare_digest(key.digest, digest):
+            return key
+        return None
+
+
+# Registry for the current settings (see get_key_registry)
+_registry: Optional[KeyRegistry] = None
+_registry_source: Optional[Tuple] = None
+_registry_lock = threading.Lock()
+
+
+def get_key_registry() -> KeyRegistry:
+    """
+    Registry built from the key and limit settings.
+
+    Built once (by load_keys at startup) and rebuilt only if those
+    settings change (tests, or a reload), which also resets every key's
+    limits.
+
+    Raises:
+        ValueError: If API_KEYS is malformed (see parse_keys)
+    """
+    global _registry, _registry_source
+
+    source = (
+        Config.API_SECRET_KEY, Config.API_KEYS,
+        Config.API_RATE_PER_SEC, Config.API_RATE_BURST, Config.API_MAX_CONCURRENT
+    )
+    if source == _registry_source:
+        return _registry
+
+    with _registry_lock:
+        if source != _registry_source:
+            _registry = KeyRegistry(parse_keys(Config.API_SECRET_KEY, Config.API_KEYS))
+            _registry_source = source
+
+    return _registry
+
+
+def load_keys() -> int:
+    """
+    Build the key registry now, at app startup.
+
+    Returns:
+        Number of configured keys
+
+    Raises:
+        ValueError: If API_KEYS is malformed, so the server fails to boot
+    """
+    return len(get_key_registry())
+
+
+def authenticate(request: Request) -> Optional[ApiKey]:
+    """
+    The API key a request was sent with.
+
+    Args:
+        request: Flask request object (or anything with headers.get)
+
+    Returns:
+        The matching ApiKey, or None if the key is missing or unknown
+    """
+
+    # Step 1: Get API key from request header
+    provided_key = request.headers.get('x-api-key')
+
+    # Step 2: If no key provided, return None
+    if not provided_key:
+        return None
+
+    # Step 3: Look up its digest among the configured keys
+    return get_key_registry().lookup(provided_key)
 
 
 def validate_api_key(request: Request) -> bool:
     """
     Validates the API key from request header.
-    
+
     Args:
         request: Flask request object
-    
+
     Returns:
         True if API key is valid, False otherwise
-    
+
     Usage in routes:
         if not validate_api_key(request):
             return {"status": "error", "message": "Unauthorized"}, 401
-    
+
     Expected header format:
         x-api-key: YOUR_SECRET_API_KEY
     """
-    
-    # Step 1: Get API key from request header
-    provided_key = request.headers.get('x-api-key')
-    
-    # Step 2: If no key provided, return False
-    if not provided_key:
-        return False
-    
-    # Step 3: Get our secret key from environment
-    secret_key = os.getenv('API_SECRET_KEY')
-    
-    # Step 4: If secret key not configured, return False
-    if not secret_key:
-        return False
-    
-    # Step 5: Compare keys (case-sensitive)
-    return provided_key == secret_key
\ No newline at end of file
+    return authenticate(request) is not None
@@ -0,0 +1,268 @@
+"""
+Offline bulk scoring of archived transcripts.
+
+Runs the detector and extractor over a JSONL corpus (optionally
+gzip-compressed) on a process pool and writes one NDJSON result per
+input line, so detector and extractor changes can be backtested without
+going through the HTTP API:
+
+    python -m src.bulk corpus.jsonl.gz -o results.ndjson
+    zcat corpus.jsonl.gz | python -m src.bulk - --unordered > results.ndjson
+
+Input lines are JSON objects whose message text is under "text" or
+"message.text" (or --text-field). Each result carries the record's "id"
+(or its line number), isScam, confidence, indicators and
+extractedIntelligence; lines that can't be parsed get an "error"
+instead.
+
+Lines are read lazily and handed to workers in chunks, with at most a
+few chunks per worker in flight, so memory stays flat however large the
+corpus is. Throughput stats go to stderr.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.detector import detect_scam
+from src.extractor import extract_intelligence
+
+# Lines per task sent to a worker
+DEFAULT_CHUNK_SIZE = 500
+
+# Chunks queued or unwritten per worker before reading pauses
+CHUNKS_IN_FLIGHT_PER_WORKER = 4
+
+# A chunk: (number of its first line, raw lines)
+Chunk = Tuple[int, List[str]]
+
+
+def open_corpus(path: str) -> io.TextIOBase:
+    """
+    Open a JSONL corpus for reading ("-" for stdin).
+
+    Gzip input is recognized by its magic bytes, whatever the file name.
+    """
+    raw = sys.stdin.buffer if path == "-" else open(path, "rb")
+    buffered = raw if isinstance(raw, io.BufferedReader) else io.BufferedReader(raw)
+
+    if buffered.peek(2)[:2] == b"\x1f\x8b":
+        buffered = gzip.GzipFile(fileobj=buffered)
+
+    return io.TextIOWrapper(buffered, encoding="utf-8", errors="replace")
+
+
+def read_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[Chunk]:
+    """Group lines into chunks, numbering lines from 1"""
+    chunk: List[str] = []
+    first = 1
+
+    for number, line in enumerate(lines, start=1):
+        if not chunk:
+            first = number
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield first, chunk
+            chunk = []
+
+    if chunk:
+        yield first, chunk
+
+
+def message_text(record: Dict, text_field: Optional[str] = None) -> str:
+    """
+    Message text of a corpus record.
+
+    Args:
+        record: Parsed JSON line
+        text_field: Dotted path to the text (e.g. "message.text");
+            defaults to "text", then "message.text"
+    """
+    paths = [text_field] if text_field else ["text", "message.text"]
+
+    for path in paths:
+        value = record
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if isinstance(value, str):
+            return value
+
+    raise ValueError(f"no message text at {' or '.join(paths)}")
+
+
+def score_record(record: Dict, text_field: Optional[str] = None) -> Dict:
+    """Detection and extraction results for one record"""
+    text = message_text(record, text_field)
+    is_scam, confidence, indicators = detect_scam(text)
+
+    return {
+        "isScam": is_scam,
+        "confidence": confidence,
+        "indicators": indicators,
+        "extractedIntelligence": extract_intelligence(text)
+    }
+
+
+def score_chunk(task: Tuple[Chunk, Optional[str]]) -> Tuple[int, List[str], int, int]:
+    """
+    Score a chunk of raw lines (runs in a worker process).
+
+    Returns:
+        (lines read, NDJSON result lines, scams found, errors)
+    """
+    (first, lines), text_field = task
+    results = []
+    scams = errors = 0
+
+    for number, line in enumerate(lines, start=first):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("line is not a JSON object")
+            result = {"id": record.get("id", number), **score_record(record, text_field)}
+            scams += result["isScam"]
+        except ValueError as e:
+            result = {"id": number, "error": str(e)}
+            errors += 1
+
+        results.append(json.dumps(result, ensure_ascii=False) + "\n")
+
+    return len(lines), results, scams, errors
+
+
+def _throttled(chunks: Iterator[Chunk], slots: threading.Semaphore) -> Iterator[Chunk]:
+    """
+    Yield chunks only while a slot is free.
+
+    Pool.imap reads its input on a background thread as fast as it can;
+    blocking here stops it from loading the whole corpus into memory.
+    Slots are released as results are written.
+    """
+    for chunk in chunks:
+        slots.acquire()
+        yield chunk
+
+
+def score_corpus(
+    lines: Iterable[str],
+    output: io.TextIOBase,
+    workers: int = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    text_field: Optional[str] = None
+) -> Dict:
+    """
+    Score every line of a corpus and write the results.
+
+    Args:
+        lines: JSONL lines (read lazily)
+        output: Where NDJSON results are written
+        workers: Worker processes (defaults to the CPU count; 0 scores
+            in this process)
+        chunk_size: Lines per worker task
+        ordered: Write results in input order; unordered output is
+            written as chunks finish, which keeps slow chunks from
+            holding up the rest
+        text_field: See message_text
+
+    Returns:
+        Stats: lines, results, scams, errors, seconds, linesPerSecond
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    stats = {"lines": 0, "results": 0, "scams": 0, "errors": 0}
+    started = time.perf_counter()
+    chunks = read_chunks(lines, max(1, chunk_size))
+
+    def write(result: Tuple[int, List[str], int, int]) -> None:
+        count, results, scams, errors = result
+        output.writelines(results)
+        stats["lines"] += count
+        stats["results"] += len(results)
+        stats["scams"] += scams
+        stats["errors"] += errors
+
+    if workers == 0:
+        for chunk in chunks:
+            write(score_chunk((chunk, text_field)))
+    else:
+        slots = threading.Semaphore(workers * CHUNKS_IN_FLIGHT_PER_WORKER)
+        tasks = ((chunk, text_field) for chunk in _throttled(chunks, slots))
+
+        with multiprocessing.Pool(workers) as pool:
+            scorer = pool.imap if ordered else pool.imap_unordered
+            for result in scorer(score_chunk, tasks):
+                write(result)
+                slots.release()
+
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 3)
+    stats["linesPerSecond"] = round(stats["lines"] / seconds) if seconds else 0
+    return stats
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point; returns the exit status"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bulk",
+        description="Score a JSONL(.gz) corpus with the scam detector and extractor."
+    )
+    parser.add_argument("input", help="JSONL or gzip JSONL corpus, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON results file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count, 0 = no pool)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"lines per worker task (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as chunks finish instead of in input order")
+    parser.add_argument("--text-field", default=None,
+                        help="dotted path to the message text (default: text, then message.text)")
+    args = parser.parse_args(argv)
+
+    try:
+        corpus = open_corpus(args.input)
+    except OSError as e:
+        print(f"❌ Cannot read {args.input}: {str(e)}", file=sys.stderr)
+        return 1
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    try:
+        with corpus:
+            stats = score_corpus(
+                corpus,
+                output,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                ordered=not args.unordered,
+                text_field=args.text_field
+            )
+    except (OSError, EOFError) as e:
+        print(f"❌ Failed reading {args.input}: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(
+        f"📊 {stats['lines']} lines in {stats['seconds']}s "
+        f"({stats['linesPerSecond']} lines/s): "
+        f"{stats['scams']} scams, {stats['errors']} errors",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
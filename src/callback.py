@@ -6,10 +6,50 @@ to GUVI's API when a conversation is complete.
 """
 
 import os
+import threading
 import requests
-from typing import Dict
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Union
+from src.config import Config
+from src.jsonio import dumps
+from src.log import get_logger
 from src.session import SessionData
 
+log = get_logger(__name__)
+
+# Shared keep-alive connection pool (one per process, see get_http_session)
+_http_session: Optional[requests.Session] = None
+_http_session_pid: Optional[int] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide pooled HTTP session for callbacks.
+    
+    Connections to GUVI are kept alive and reused across callbacks, so
+    bursts of completed sessions don't each pay a TCP + TLS handshake.
+    Recreated after a fork, since pooled sockets must not be shared
+    between gunicorn workers.
+    """
+    global _http_session, _http_session_pid
+    
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            adapter = HTTPAdapter(
+                pool_connections=Config.CALLBACK_POOL_HOSTS,
+                pool_maxsize=Config.CALLBACK_POOL_SIZE,
+                max_retries=0  # the dispatcher does its own retries
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Content-Type": "application/json"})
+            _http_session = session
+            _http_session_pid = os.getpid()
+    
+    return _http_session
+
 
 def build_callback_payload(session: SessionData, agent_notes: str = "") -> Dict:
     """
@@ -32,12 +72,12 @@ def build_callback_payload(session: SessionData, agent_notes: str = "") -> Dict:
         "scamDetected": session.scam_detected,
         "totalMessagesExchanged": session.message_count,
         "extractedIntelligence": {
-            "upiIds": session.extracted_intelligence.get("upiIds", []),
-            "bankAccounts": session.extracted_intelligence.get("bankAccounts", []),
-            "phoneNumbers": session.extracted_intelligence.get("phoneNumbers", []),
-            "ifscCodes": session.extracted_intelligence.get("ifscCodes", []),
-            "phishingLinks": session.extracted_intelligence.get("phishingLinks", []),
-            "suspiciousKeywords": session.extracted_intelligence.get("suspiciousKeywords", [])
+            "upiIds": list(session.extracted_intelligence.get("upiIds", [])),
+            "bankAccounts": list(session.extracted_intelligence.get("bankAccounts", [])),
+            "phoneNumbers": list(session.extracted_intelligence.get("phoneNumbers", [])),
+            "ifscCodes": list(session.extracted_intelligence.get("ifscCodes", [])),
+            "phishingLinks": list(session.extracted_intelligence.get("phishingLinks", [])),
+            "suspiciousKeywords": list(session.extracted_intelligence.get("suspiciousKeywords", []))
         },
         "agentNotes": agent_notes
     }
@@ -94,6 +134,9 @@ def send_final_callback(session: SessionData, agent_notes: str = "") -> bool:
     """
     Sends final intelligence to GUVI.
     
+    Blocks until GUVI answers; the request path enqueues callbacks on
+    the background dispatcher (src/dispatcher.py) instead.
+    
     Args:
         session: Completed session data
         agent_notes: Summary of scammer behavior
@@ -104,37 +147,84 @@ def send_final_callback(session: SessionData, agent_notes: str = "") -> bool:
     Endpoint:
         POST https://hackathon.guvi.in/api/updateHoneyPotFinalResult
     """
+    return post_callback(build_callback_payload(session, agent_notes))
+
+
+def post_callback(
+    payload: Union[Dict, List[Dict]],
+    callback_url: str = None,
+    timeout: float = 30
+) -> bool:
+    """
+    POSTs a callback payload to GUVI over the pooled HTTP session.
+    
+    Args:
+        payload: Payload from build_callback_payload, or a list of them
+            for a receiver that accepts batches
+        callback_url: Override for the GUVI_CALLBACK_URL setting
+        timeout: Request timeout in seconds
+    
+    Returns:
+        True if GUVI answered 200, False otherwise
+    """
     
     # Get callback URL from environment
-    callback_url = os.getenv(
-        'GUVI_CALLBACK_URL',
-        'https://hackathon.guvi.in/api/updateHoneyPotFinalResult'
-    )
+    if not callback_url:
+        callback_url = os.getenv(
+            'GUVI_CALLBACK_URL',
+            'https://hackathon.guvi.in/api/updateHoneyPotFinalResult'
+        )
     
-    # Build payload
-    payload = build_callback_payload(session, agent_notes)
+    if isinstance(payload, list):
+        session_id = f"batch of {len(payload)}"
+    else:
+        session_id = payload.get("sessionId")
     
     try:
-        # Send POST request
-        response = requests.post(
+        # Send POST request (encoded here: requests' json= uses stdlib json)
+        response = get_http_session().post(
             callback_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=30
+            data=dumps(payload),
+            timeout=timeout
         )
         
         # Check if successful
         if response.status_code == 200:
-            print(f"✅ Callback sent successfully for session: {session.session_id}")
+            log.info("callback sent", session=session_id)
             return True
         else:
-            print(f"❌ Callback failed: {response.status_code} - {response.text}")
+            log.warning("callback rejected", session=session_id, status=response.status_code)
             return False
             
     except requests.exceptions.Timeout:
-        print(f"❌ Callback timeout for session: {session.session_id}")
+        log.warning("callback timed out", session=session_id)
         return False
         
     except requests.exceptions.RequestException as e:
-        print(f"❌ Callback error: {str(e)}")
-        return False
\ No newline at end of file
+        log.warning("callback failed", session=session_id, error=str(e))
+        return False
+
+
+
+def post_callback_batch(payloads: List[Dict], timeout: float = 30) -> bool:
+    """
+    POSTs several callback payloads as one JSON array.
+    
+    Only for receivers that accept batches, so the array goes to
+    CALLBACK_BATCH_URL and never to GUVI_CALLBACK_URL, which takes one
+    payload per request.
+    
+    Args:
+        payloads: Payloads from build_callback_payload
+        timeout: Request timeout in seconds
+    
+    Returns:
+        True if the receiver answered 200, False otherwise
+    
+    Raises:
+        ValueError: If CALLBACK_BATCH_URL is not set
+    """
+    if not Config.CALLBACK_BATCH_URL:
+        raise ValueError("CALLBACK_BATCH_URL is not set")
+
+    return post_callback(payloads, callback_url=Config.CALLBACK_BATCH_URL, timeout=timeout)
@@ -0,0 +1,277 @@
+"""
+Hashed n-gram scam classifier.
+
+A logistic regression over hashed features, scored with NumPy:
+
+- character 3-5-grams of the normalized text (words joined by single
+  spaces, padded with a space), which survive the misspellings and
+  Hinglish variants that defeat a fixed lexicon,
+- word unigrams and bigrams.
+
+Every n-gram is hashed into one of 2**bits weights (no vocabulary to
+store). Character n-gram hashes are computed for a whole batch at once
+with NumPy rolling hashes, and scores are a single weighted bincount, so
+scoring many messages costs little more than scoring one.
+
+Weights live in one float32 .npy file (2**bits weights followed by the
+bias) that is memory-mapped, so worker processes share its pages. Train
+one from a labeled JSONL corpus:
+
+    python -m src.classifier labeled.jsonl.gz -o src/data/scam_model.npy
+
+where each line has the message text (see bulk.message_text) and a
+"label" (1/true for scam, 0/false otherwise). detect_scam uses the model
+when SCAM_MODEL_FILE points at one.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.keywords import split_words
+
+# Default feature space: 2**18 weights (1 MB of float32)
+DEFAULT_BITS = 18
+
+# Character n-gram lengths
+CHAR_NGRAMS = (3, 4, 5)
+
+# Multipliers for the hashes (64-bit, wrapping)
+_BASE = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# Seeds keeping word unigram and bigram hashes apart
+_WORD_SEED = 0x5CA1AB1E
+_BIGRAM_SEED = 0x0DDBA11
+
+
+def normalize(message: str) -> bytes:
+    """Lower-cased words, space-separated and padded, as UTF-8"""
+    _, words = split_words(message or "")
+    return (" " + " ".join(words) + " ").encode("utf-8")
+
+
+class NgramClassifier:
+    """
+    Linear model over hashed n-grams.
+
+    Attributes:
+        weights: float32 array of 2**bits feature weights plus the bias
+            (may be a read-only memory map)
+        bits: log2 of the number of feature weights
+    """
+
+    def __init__(self, weights: np.ndarray):
+        size = len(weights) - 1
+        if size < 2 or size & (size - 1):
+            raise ValueError("model must hold 2**bits weights plus a bias")
+
+        self.weights = weights
+        self.bits = size.bit_length() - 1
+        self._shift = np.uint64(64 - self.bits)
+
+    @classmethod
+    def from_file(cls, path: str, mmap: bool = True) -> "NgramClassifier":
+        """Load weights saved by save(), memory-mapped by default"""
+        weights = np.load(path, mmap_mode="r" if mmap else None)
+        if weights.dtype != np.float32 or weights.ndim != 1:
+            raise ValueError(f"{path}: expected a 1-d float32 array")
+        return cls(weights)
+
+    def save(self, path: str) -> None:
+        """Write the weights as a .npy file"""
+        np.save(path, np.asarray(self.weights, dtype=np.float32))
+
+    # ============================================
+    # FEATURES
+    # ============================================
+
+    def features(self, messages: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hashed features of a batch.
+
+        Returns:
+            (rows, columns, counts): message index and weight index of
+            every n-gram occurrence, and the n-gram count per message
+        """
+        texts = [normalize(message) for message in messages]
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+
+        data = np.frombuffer(b"".join(texts), dtype=np.uint8).astype(np.uint64)
+        owner = np.repeat(np.arange(len(texts)), lengths)
+
+        rows, columns = [], []
+
+        # Character n-grams: rolling hash at every position, keeping
+        # those that end inside their own message
+        hashed = np.zeros(len(data), dtype=np.uint64)
+        for n in range(1, max(CHAR_NGRAMS) + 1):
+            hashed[:len(data) - n + 1] = hashed[:len(data) - n + 1] * _BASE + data[n - 1:]
+            if n in CHAR_NGRAMS:
+                starts = np.arange(len(data) - n + 1)
+                valid = starts + n <= ends[owner[:len(starts)]]
+                mixed = (hashed[:len(starts)][valid] + np.uint64(n)) * _MIX
+                rows.append(owner[:len(starts)][valid])
+                columns.append((mixed >> self._shift).astype(np.int64))
+
+        # Word unigrams and bigrams
+        word_rows, word_columns = [], []
+        mask = (1 << self.bits) - 1
+        for row, text in enumerate(texts):
+            words = text.split()
+            for word in words:
+                word_rows.append(row)
+                word_columns.append(zlib.crc32(word, _WORD_SEED) & mask)
+            for first, second in zip(words, words[1:]):
+                word_rows.append(row)
+                word_columns.append(zlib.crc32(second, zlib.crc32(first, _BIGRAM_SEED)) & mask)
+
+        rows.append(np.asarray(word_rows, dtype=np.int64))
+        columns.append(np.asarray(word_columns, dtype=np.int64))
+
+        rows = np.concatenate(rows)
+        columns = np.concatenate(columns)
+        counts = np.bincount(rows, minlength=len(texts))
+        return rows, columns, counts
+
+    # ============================================
+    # SCORING
+    # ============================================
+
+    def scores(self, messages: List[str]) -> np.ndarray:
+        """Raw scores (log-odds of scam) for a batch of messages"""
+        if not messages:
+            return np.zeros(0)
+
+        rows, columns, counts = self.features(messages)
+        # Binary n-gram vectors scaled to unit length
+        totals = np.bincount(rows, weights=self.weights[columns], minlength=len(messages))
+        return totals / np.sqrt(np.maximum(counts, 1)) + float(self.weights[-1])
+
+    def predict_proba(self, messages: List[str]) -> np.ndarray:
+        """Scam probability for each message"""
+        return 1.0 / (1.0 + np.exp(-self.scores(messages)))
+
+    # ============================================
+    # TRAINING
+    # ============================================
+
+    @classmethod
+    def train(
+        cls,
+        messages: List[str],
+        labels: Iterable[int],
+        bits: int = DEFAULT_BITS,
+        epochs: int = 100,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6
+    ) -> "NgramClassifier":
+        """
+        Fit a model by full-batch gradient descent (Adagrad steps).
+
+        Args:
+            messages: Training texts
+            labels: 1 for scam, 0 otherwise
+            bits: log2 of the number of feature weights
+            epochs: Passes over the data
+            learning_rate: Adagrad step size
+            l2: L2 penalty on the feature weights
+        """
+        model = cls(np.zeros((1 << bits) + 1, dtype=np.float32))
+        rows, columns, counts = model.features(messages)
+        values = 1.0 / np.sqrt(np.maximum(counts, 1))[rows]
+        targets = np.asarray(list(labels), dtype=np.float64)
+
+        weights = np.zeros(len(model.weights))
+        squared = np.full(len(weights), 1e-8)
+
+        for _ in range(epochs):
+            totals = np.bincount(rows, weights=weights[columns] * values, minlength=len(messages))
+            errors = 1.0 / (1.0 + np.exp(-(totals + weights[-1]))) - targets
+
+            gradient = np.empty(len(weights))
+            gradient[:-1] = np.bincount(
+                columns, weights=errors[rows] * values, minlength=len(weights) - 1
+            ) / len(messages) + l2 * weights[:-1]
+            gradient[-1] = errors.mean()
+
+            squared += gradient ** 2
+            weights -= learning_rate * gradient / np.sqrt(squared)
+
+        model.weights = weights.astype(np.float32)
+        return model
+
+
+def read_labeled(path: str, text_field: Optional[str] = None) -> Tuple[List[str], List[int]]:
+    """Texts and labels from a labeled JSONL(.gz) file"""
+    from src.bulk import message_text, open_corpus
+
+    messages, labels = [], []
+    with open_corpus(path) as corpus:
+        for line in corpus:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            messages.append(message_text(record, text_field))
+            labels.append(1 if record.get("label") in (1, True, "1", "scam") else 0)
+
+    return messages, labels
+
+
+def main(argv: List[str] = None) -> int:
+    """Train a model from labeled JSONL; returns the exit status"""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.classifier",
+        description="Train the hashed n-gram scam classifier."
+    )
+    parser.add_argument("input", help="labeled JSONL or gzip JSONL (text + label per line)")
+    parser.add_argument("-o", "--output", required=True, help="weights file to write (.npy)")
+    parser.add_argument("--bits", type=int, default=DEFAULT_BITS,
+                        help=f"log2 of the feature space (default: {DEFAULT_BITS})")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--holdout", type=float, default=0.1,
+                        help="fraction of lines held out for evaluation (default: 0.1)")
+    parser.add_argument("--text-field", default=None,
+                        help="dotted path to the message text (default: text, then message.text)")
+    args = parser.parse_args(argv)
+
+    messages, labels = read_labeled(args.input, args.text_field)
+    if not messages:
+        print(f"❌ No labeled lines in {args.input}", file=sys.stderr)
+        return 1
+
+    # Shuffle once (seeded) and hold out a slice for evaluation
+    order = list(range(len(messages)))
+    random.Random(42).shuffle(order)
+    held = order[:int(len(order) * args.holdout)]
+    kept = order[len(held):]
+
+    started = time.perf_counter()
+    model = NgramClassifier.train(
+        [messages[i] for i in kept], [labels[i] for i in kept],
+        bits=args.bits, epochs=args.epochs
+    )
+    print(f"🧠 Trained on {len(kept)} messages in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    for name, indexes in (("train", kept), ("holdout", held)):
+        if indexes:
+            predicted = model.predict_proba([messages[i] for i in indexes]) >= 0.5
+            accuracy = np.mean(predicted == np.asarray([labels[i] for i in indexes], dtype=bool))
+            print(f"📊 {name} accuracy: {accuracy:.3f} ({len(indexes)} messages)", file=sys.stderr)
+
+    model.save(args.output)
+    size = math.ceil(model.weights.nbytes / 1024)
+    print(f"💾 Saved {args.output} ({size} KB)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
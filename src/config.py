@@ -3,15 +3,131 @@ Configuration management
 Owner: Member A
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Config:
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
+    GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+    GROQ_MAX_TOKENS: int = int(os.getenv("GROQ_MAX_TOKENS", "150"))
+    GROQ_TIMEOUT: float = float(os.getenv("GROQ_TIMEOUT", "20"))
+    GROQ_BASE_URL: str = os.getenv("GROQ_BASE_URL", "")  # empty = Groq's default
+    GROQ_POOL_SIZE: int = int(os.getenv("GROQ_POOL_SIZE", "20"))
+    GROQ_CONNECT_TIMEOUT: float = float(os.getenv("GROQ_CONNECT_TIMEOUT", "2"))
+    # Send a second request if the first has no token after this long (0 = never)
+    GROQ_HEDGE_AFTER_MS: int = int(os.getenv("GROQ_HEDGE_AFTER_MS", "1500"))
+    
+    # Latency budget for a /honeypot response; the LLM gets what is left
+    # after REPLY_OVERHEAD_MS for the rest of the turn
+    REPLY_LATENCY_BUDGET_MS: int = int(os.getenv("REPLY_LATENCY_BUDGET_MS", "8000"))
+    REPLY_OVERHEAD_MS: int = int(os.getenv("REPLY_OVERHEAD_MS", "250"))
+    # Answer from a template if the LLM takes longer than this; the LLM
+    # reply still arrives later and shapes the next turn (0 = wait)
+    REPLY_DEADLINE_MS: int = int(os.getenv("REPLY_DEADLINE_MS", "3000"))
+    
+    # Agent prompt size: recent turns verbatim, older ones summarized
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+    PROMPT_RECENT_TURNS: int = int(os.getenv("PROMPT_RECENT_TURNS", "4"))
+    SUMMARY_TOKEN_BUDGET: int = int(os.getenv("SUMMARY_TOKEN_BUDGET", "300"))
+    
+    # Reply cache (0 entries = disabled)
+    REPLY_CACHE_SIZE: int = int(os.getenv("REPLY_CACHE_SIZE", "5000"))
+    REPLY_CACHE_TTL: float = float(os.getenv("REPLY_CACHE_TTL", "3600"))
+    REPLY_CACHE_VARIANTS: int = int(os.getenv("REPLY_CACHE_VARIANTS", "3"))
+    
+    # /honeypot/batch: items per request, sessions run concurrently
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "16"))
     API_SECRET_KEY: str = os.getenv("API_SECRET_KEY", "")
+    # More keys as name:key or name:sha256:<hex>, comma separated (see src/auth.py)
+    API_KEYS: str = os.getenv("API_KEYS", "")
+    # Per key and process: token bucket refill and size, requests in
+    # flight (0 = unlimited)
+    API_RATE_PER_SEC: float = float(os.getenv("API_RATE_PER_SEC", "10"))
+    API_RATE_BURST: float = float(os.getenv("API_RATE_BURST", "50"))
+    API_MAX_CONCURRENT: int = int(os.getenv("API_MAX_CONCURRENT", "32"))
     GUVI_CALLBACK_URL: str = os.getenv("GUVI_CALLBACK_URL", "https://hackathon.guvi.in/api/updateHoneyPotFinalResult")
     
     # Conversation settings
     MAX_MESSAGES: int = 10
-    MIN_INTELLIGENCE_FOR_CALLBACK: int = 2
\ No newline at end of file
+    MIN_INTELLIGENCE_FOR_CALLBACK: int = 2
+    
+    # Session store limits (0 = unlimited)
+    SESSION_MAX_COUNT: int = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+    SESSION_MAX_BYTES: int = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+    SESSION_IDLE_TTL: int = int(os.getenv("SESSION_IDLE_TTL", "1800"))
+    
+    # Session store backend: "memory" (per worker) or "sqlite" (shared by
+    # all workers on the node)
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")
+    SESSION_DB_PATH: str = os.getenv(
+        "SESSION_DB_PATH",
+        os.path.join(tempfile.gettempdir(), "honeypot-sessions.db")
+    )
+    SESSION_DB_BUSY_TIMEOUT: float = float(os.getenv("SESSION_DB_BUSY_TIMEOUT", "5"))
+    
+    # Intelligence index across sessions (see src/intel_index.py), kept by
+    # the session backend: indicators held in memory (least recently seen
+    # dropped first; 0 = unlimited) and sessions listed per indicator
+    INTEL_INDEX_MAX_INDICATORS: int = int(os.getenv("INTEL_INDEX_MAX_INDICATORS", "100000"))
+    INTEL_INDEX_MAX_SESSIONS: int = int(os.getenv("INTEL_INDEX_MAX_SESSIONS", "100"))
+
+    # Detection settings
+    SCAM_KEYWORDS_FILE: str = os.getenv(
+        "SCAM_KEYWORDS_FILE",
+        os.path.join(os.path.dirname(__file__), "data", "scam_keywords.tsv")
+    )
+    SCAM_THRESHOLD: float = float(os.getenv("SCAM_THRESHOLD", "0.5"))
+    # Hashed n-gram model weights (.npy, see src/classifier.py); empty =
+    # confidence from the keyword lexicon alone
+    SCAM_MODEL_FILE: str = os.getenv("SCAM_MODEL_FILE", "")
+    
+    # Admission control (see src/admission.py): turns in flight per
+    # process before shedding (0 = off), the average wait for a handler
+    # thread before shedding, the share of those at which replies skip
+    # the LLM, and the turn latency target
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+    ADMISSION_QUEUE_WAIT_MS: float = float(os.getenv("ADMISSION_QUEUE_WAIT_MS", "1000"))
+    ADMISSION_DEGRADE_AT: float = float(os.getenv("ADMISSION_DEGRADE_AT", "0.5"))
+    ADMISSION_TARGET_MS: float = float(os.getenv("ADMISSION_TARGET_MS", "4000"))
+    
+    # JSON encoder (see src/jsonio.py): "auto", "orjson" or "stdlib"
+    JSON_BACKEND: str = os.getenv("JSON_BACKEND", "auto")
+    
+    # Logging (see src/log.py): level, "json" or "text", and the share of
+    # per-request debug lines kept
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+    
+    # Metrics: per-process snapshots are combined from this directory
+    # (one per deployment, needed with several gunicorn workers; empty =
+    # each process reports only itself)
+    METRICS_DIR: str = os.getenv("METRICS_DIR", "")
+    METRICS_FLUSH_SECONDS: float = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+    
+    # Callback dispatcher settings
+    CALLBACK_QUEUE_SIZE: int = int(os.getenv("CALLBACK_QUEUE_SIZE", "1000"))
+    CALLBACK_WORKERS: int = int(os.getenv("CALLBACK_WORKERS", "2"))
+    # A callback is retried for CALLBACK_RETRY_SECONDS (the session is
+    # already gone, so giving up loses its result); CALLBACK_MAX_ATTEMPTS
+    # > 0 also caps the attempts
+    CALLBACK_MAX_ATTEMPTS: int = int(os.getenv("CALLBACK_MAX_ATTEMPTS", "0"))
+    CALLBACK_RETRY_SECONDS: float = float(os.getenv("CALLBACK_RETRY_SECONDS", str(6 * 3600)))
+    CALLBACK_BACKOFF_BASE: float = float(os.getenv("CALLBACK_BACKOFF_BASE", "1.0"))
+    CALLBACK_BACKOFF_MAX: float = float(os.getenv("CALLBACK_BACKOFF_MAX", "60.0"))
+    CALLBACK_TIMEOUT: float = float(os.getenv("CALLBACK_TIMEOUT", "10"))
+    CALLBACK_POOL_HOSTS: int = int(os.getenv("CALLBACK_POOL_HOSTS", "4"))
+    CALLBACK_POOL_SIZE: int = int(os.getenv("CALLBACK_POOL_SIZE", "10"))
+    # Batching is off unless the receiver accepts JSON arrays
+    CALLBACK_BATCH_SIZE: int = int(os.getenv("CALLBACK_BATCH_SIZE", "1"))
+    CALLBACK_BATCH_WINDOW_MS: int = int(os.getenv("CALLBACK_BATCH_WINDOW_MS", "50"))
+    CALLBACK_BATCH_URL: str = os.getenv("CALLBACK_BATCH_URL", "")
+    CALLBACK_SPOOL_DIR: str = os.getenv(
+        "CALLBACK_SPOOL_DIR",
+        os.path.join(tempfile.gettempdir(), "honeypot-callbacks")
+    )
+    # Rewrite the spool with only pending callbacks after this many records
+    CALLBACK_SPOOL_COMPACT_RECORDS: int = int(os.getenv("CALLBACK_SPOOL_COMPACT_RECORDS", "10000"))
\ No newline at end of file
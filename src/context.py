@@ -0,0 +1,221 @@
+"""
+Token-budgeted conversation context for the agent prompt.
+
+Sending the whole conversation history makes every turn's prompt - and
+so LLM latency and cost - grow with the conversation. Instead the prompt
+gets:
+
+- the last PROMPT_RECENT_TURNS turns verbatim,
+- a rolling summary of everything older, stored on the session and
+  extended incrementally as turns age out of the window (never rebuilt),
+- the intelligence already extracted, in compact form, so the persona
+  doesn't ask again for details the scammer has already given,
+
+all within PROMPT_TOKEN_BUDGET (estimated) tokens.
+"""
+
+import math
+from typing import Dict, List, Optional
+
+from src.config import Config
+
+# Rough token estimate for English/Hinglish text with Llama-style
+# tokenizers; close enough for budgeting, no tokenizer dependency
+CHARS_PER_TOKEN = 4
+# Role markers and separators the chat format adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Words kept per message when it is folded into the summary
+SUMMARY_SCAMMER_WORDS = 20
+SUMMARY_AGENT_WORDS = 10
+
+# Intelligence shown to the persona, with labels
+INTELLIGENCE_LABELS = [
+    ("upiIds", "UPI IDs"),
+    ("bankAccounts", "bank accounts"),
+    ("ifscCodes", "IFSC codes"),
+    ("phoneNumbers", "phone numbers"),
+    ("phishingLinks", "links"),
+]
+# Newest values listed per kind; older ones are only counted
+INTELLIGENCE_MAX_VALUES = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Approximate token count of chat messages"""
+    return sum(
+        estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def _shorten(text: str, words: int) -> str:
+    """First `words` words of text"""
+    parts = text.split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+def summarize_message(message: Dict) -> Optional[str]:
+    """One summary line for a message (None for empty messages)"""
+    if not isinstance(message, dict) or not message.get("text"):
+        return None
+
+    if message.get("sender") == "scammer":
+        return f"They said: {_shorten(message['text'], SUMMARY_SCAMMER_WORDS)}"
+    return f"You said: {_shorten(message['text'], SUMMARY_AGENT_WORDS)}"
+
+
+def fold_history(
+    summary: Optional[Dict],
+    conversation_history: List[Dict],
+    keep_turns: int = None
+) -> Dict:
+    """
+    Extend a rolling summary with messages that left the verbatim window.
+
+    Only messages between the summary's end and the new window start are
+    summarized, so each message is folded once over a conversation. When
+    the summary outgrows SUMMARY_TOKEN_BUDGET its oldest lines are dropped,
+    except the first (how the scam opened).
+
+    Args:
+        summary: Previous summary ({"upTo": messages folded, "lines": [...]})
+            or None
+        conversation_history: Full conversation so far
+        keep_turns: Turns (scammer + agent message pairs) kept verbatim
+            (defaults to PROMPT_RECENT_TURNS)
+
+    Returns:
+        The summary, or a new one if messages were folded
+    """
+    if keep_turns is None:
+        keep_turns = Config.PROMPT_RECENT_TURNS
+
+    summary = summary or {"upTo": 0, "lines": []}
+    cutoff = max(0, len(conversation_history) - 2 * keep_turns)
+
+    if cutoff <= summary["upTo"]:
+        return summary
+
+    lines = list(summary["lines"])
+    for message in conversation_history[summary["upTo"]:cutoff]:
+        line = summarize_message(message)
+        if line:
+            lines.append(line)
+
+    # Drop the oldest lines past the budget, keeping the opening
+    budget = Config.SUMMARY_TOKEN_BUDGET
+    total = sum(estimate_tokens(line) for line in lines)
+    while len(lines) > 2 and total > budget:
+        total -= estimate_tokens(lines.pop(1))
+
+    return {"upTo": cutoff, "lines": lines}
+
+
+def compact_intelligence(extracted_intelligence: Optional[Dict]) -> str:
+    """
+    One-line summary of details already collected.
+
+    Only the newest INTELLIGENCE_MAX_VALUES values of each kind are
+    listed, so the line stays short however much a session collects.
+
+    Returns:
+        e.g. "UPI IDs: fraud@ybl; phone numbers: 9876543210", or "" if
+        nothing has been collected
+    """
+    parts = []
+    for key, label in INTELLIGENCE_LABELS:
+        values = list((extracted_intelligence or {}).get(key) or [])
+        if values:
+            shown = ", ".join(values[-INTELLIGENCE_MAX_VALUES:])
+            more = len(values) - INTELLIGENCE_MAX_VALUES
+            parts.append(f"{label}: {shown}" + (f" and {more} more" if more > 0 else ""))
+    return "; ".join(parts)
+
+
+def _fit_lines(lines: List[str], budget: int) -> List[str]:
+    """Summary lines within budget tokens, dropping the oldest after the opening first"""
+    lines = list(lines)
+    total = sum(estimate_tokens(line + "\n") for line in lines)
+    while lines and total > budget:
+        total -= estimate_tokens(lines.pop(1 if len(lines) > 1 else 0) + "\n")
+    return lines
+
+
+def build_context(
+    system: str,
+    current_message: str,
+    conversation_history: List[Dict],
+    summary: Optional[Dict] = None,
+    extracted_intelligence: Optional[Dict] = None,
+    token_budget: int = None
+) -> List[Dict[str, str]]:
+    """
+    Build the chat messages for a turn within the token budget.
+
+    Args:
+        system: Persona system prompt
+        current_message: Latest scammer message (always included)
+        conversation_history: Full conversation so far
+        summary: Rolling summary from fold_history; messages it covers
+            are not repeated verbatim
+        extracted_intelligence: Session intelligence to remind the
+            persona of
+        token_budget: Defaults to PROMPT_TOKEN_BUDGET
+
+    Returns:
+        Chat messages: system, then the newest history that fits, then
+        the current message. The system prompt and current message are
+        always sent; the intelligence note, summary and history only
+        take what is left of the budget, in that order.
+    """
+    if token_budget is None:
+        token_budget = Config.PROMPT_TOKEN_BUDGET
+
+    tail = [{"role": "user", "content": current_message}]
+    remaining = token_budget - message_tokens([{"role": "system", "content": system}] + tail)
+
+    # Step 1: Intelligence note, if it fits
+    note = ""
+    collected = compact_intelligence(extracted_intelligence)
+    if collected:
+        note = (
+            f"\nDetails they already gave you: {collected}. "
+            "Don't ask for these again; ask for other details instead."
+        )
+        if estimate_tokens(note) > remaining:
+            note = ""
+        remaining -= estimate_tokens(note)
+
+    # Step 2: As much of the summary as fits
+    if summary and summary["lines"]:
+        title = "\nEarlier in this conversation:\n"
+        lines = _fit_lines(summary["lines"], remaining - estimate_tokens(title))
+        if lines:
+            text = title + "\n".join(lines)
+            system += text
+            remaining -= estimate_tokens(text)
+
+    system += note
+    head = [{"role": "system", "content": system}]
+
+    # Newest verbatim messages first, until the budget runs out
+    start = summary["upTo"] if summary else 0
+    window = []
+    for message in reversed(conversation_history[start:]):
+        if not isinstance(message, dict) or not message.get("text"):
+            continue
+        role = "user" if message.get("sender") == "scammer" else "assistant"
+        entry = {"role": role, "content": message["text"]}
+        cost = message_tokens([entry])
+        if cost > remaining:
+            break
+        remaining -= cost
+        window.append(entry)
+
+    return head + window[::-1] + tail
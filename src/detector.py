@@ -2,7 +2,22 @@
 Scam detection module
 Owner: Member A
 """
-from typing import Tuple, List
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from src.config import Config
+from src.keywords import SCAM_LEXICON, KeywordHit
+from src.log import get_logger
+
+if TYPE_CHECKING:
+    from src.classifier import NgramClassifier
+
+log = get_logger(__name__)
+
+# n-gram model loaded from SCAM_MODEL_FILE (see get_scam_model)
+_model: Optional["NgramClassifier"] = None
+_model_path: Optional[str] = None
+_model_lock = threading.Lock()
 
 def detect_scam(message: str, conversation_history: list = None) -> Tuple[bool, float, List[str]]:
     """
@@ -23,4 +38,102 @@ def detect_scam(message: str, conversation_history: list = None) -> Tuple[bool,
         >>> detect_scam("Your account is blocked! Verify now!")
         (True, 0.85, ["urgency", "account_threat"])
     """
-    pass  # Member A implements
\ No newline at end of file
+    # Step 1: One pass over the message for every lexicon phrase
+    hits = SCAM_LEXICON.find_all(message or "")
+
+    # Step 2: Confidence from the n-gram model if one is configured,
+    # otherwise from the lexicon phrases
+    model = get_scam_model()
+    if model is not None:
+        confidence = _model_confidence(model.predict_proba([message or ""])[0])
+    else:
+        confidence = _lexicon_confidence(hits)
+
+    # Step 3: Indicators are the phrase categories, in order of appearance
+    return _result(confidence, hits)
+
+
+def detect_scam_batch(messages: List[str]) -> List[Tuple[bool, float, List[str]]]:
+    """
+    Analyzes many messages at once (e.g. a /honeypot/batch request)
+    
+    Scam scripts are templated, so a batch often carries the same text
+    for several sessions; each distinct text is scanned only once, and
+    the n-gram model (if configured) scores them all in one call.
+    
+    Args:
+        messages: Message texts
+    
+    Returns:
+        detect_scam results, one per message, in order
+    """
+    distinct = list(dict.fromkeys(message or "" for message in messages))
+    hits = [SCAM_LEXICON.find_all(message) for message in distinct]
+
+    model = get_scam_model()
+    if model is not None:
+        confidences = [_model_confidence(p) for p in model.predict_proba(distinct)]
+    else:
+        confidences = [_lexicon_confidence(message_hits) for message_hits in hits]
+
+    results = {
+        message: _result(confidence, message_hits)
+        for message, confidence, message_hits in zip(distinct, confidences, hits)
+    }
+    return [results[message or ""] for message in messages]
+
+
+def get_scam_model() -> Optional["NgramClassifier"]:
+    """
+    The n-gram model in SCAM_MODEL_FILE, loaded (memory-mapped) once
+    
+    Returns:
+        The model, or None if SCAM_MODEL_FILE is unset or can't be
+        loaded (detection then falls back to the lexicon)
+    """
+    global _model, _model_path
+
+    path = Config.SCAM_MODEL_FILE
+    if path == _model_path:
+        return _model
+
+    with _model_lock:
+        if path != _model_path:
+            model = None
+            if path:
+                try:
+                    # Imported here: numpy (requirements-model.txt) is
+                    # only needed with a model
+                    from src.classifier import NgramClassifier
+
+                    model = NgramClassifier.from_file(path)
+                    log.info("scam model loaded", path=path, bits=model.bits)
+                except (ImportError, OSError, ValueError) as e:
+                    log.warning("scam model not loaded, using lexicon only", path=path, error=str(e))
+            _model, _model_path = model, path
+
+    return _model
+
+
+def _lexicon_confidence(hits: List[KeywordHit]) -> float:
+    """Combine phrase weights (each phrase counted once) as independent
+    evidence, so confidence grows but never reaches 1"""
+    if not hits:
+        return 0.1
+
+    weights = {hit.keyword: hit.weight for hit in hits}
+    not_scam = 1.0
+    for weight in weights.values():
+        not_scam *= 1.0 - weight
+    return round(min(max(1.0 - not_scam, 0.1), 0.99), 2)
+
+
+def _model_confidence(probability: float) -> float:
+    """Model probability, rounded and kept off 0 and 1"""
+    return round(min(max(float(probability), 0.01), 0.99), 2)
+
+
+def _result(confidence: float, hits: List[KeywordHit]) -> Tuple[bool, float, List[str]]:
+    """detect_scam result for a confidence and the message's lexicon hits"""
+    indicators = list(dict.fromkeys(hit.category for hit in hits))
+    return confidence >= Config.SCAM_THRESHOLD, confidence, indicators
@@ -0,0 +1,522 @@
+"""
+Background dispatcher for GUVI callbacks.
+
+The request path only enqueues a callback payload; worker threads POST
+it to GUVI, retrying failures with exponential backoff and jitter (up to
+CALLBACK_BACKOFF_MAX apart) for CALLBACK_RETRY_SECONDS. The session is
+deleted once its callback is queued, so the retries have to outlast a
+receiver outage.
+Every enqueued payload is first written to an append-only spool file,
+so callbacks still pending when the process dies are delivered by the
+next dispatcher that starts with the same spool directory.
+
+With batching enabled (CALLBACK_BATCH_SIZE > 1, for receivers that
+accept JSON arrays), a worker coalesces callbacks that become due within
+CALLBACK_BATCH_WINDOW_MS into one POST to CALLBACK_BATCH_URL. Without
+that URL the dispatcher posts one payload per request.
+
+Spool format (one JSON record per line):
+    {"op": "add", "id": "...", "payload": {...}}   payload enqueued
+    {"op": "done", "id": "..."}                     delivered
+    {"op": "dead", "id": "..."}                     gave up after retries
+
+The spool is truncated whenever nothing is pending, and compacted (the
+pending "add" records rewritten to a new file that replaces it) once it
+holds CALLBACK_SPOOL_COMPACT_RECORDS records, so a dispatcher that is
+never idle doesn't grow it without bound.
+"""
+
+import fcntl
+import glob
+import heapq
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from src.config import Config
+from src.callback import post_callback, post_callback_batch
+from src.jsonio import dumps
+from src.log import get_logger
+from src.metrics import CALLBACKS
+
+log = get_logger(__name__)
+
+
+class CallbackDispatcher:
+    """
+    Bounded in-process callback queue served by worker threads.
+
+    Pending and retrying callbacks share one bounded queue ordered by the
+    time they are next due, so retries never block a worker while they
+    wait out their backoff.
+    """
+
+    def __init__(
+        self,
+        post: Callable[[Dict], bool] = None,
+        queue_size: int = Config.CALLBACK_QUEUE_SIZE,
+        workers: int = Config.CALLBACK_WORKERS,
+        max_attempts: int = Config.CALLBACK_MAX_ATTEMPTS,
+        retry_seconds: float = Config.CALLBACK_RETRY_SECONDS,
+        backoff_base: float = Config.CALLBACK_BACKOFF_BASE,
+        backoff_max: float = Config.CALLBACK_BACKOFF_MAX,
+        spool_dir: Optional[str] = Config.CALLBACK_SPOOL_DIR,
+        post_batch: Callable[[List[Dict]], bool] = None,
+        batch_size: int = Config.CALLBACK_BATCH_SIZE,
+        batch_window: float = Config.CALLBACK_BATCH_WINDOW_MS / 1000,
+        spool_compact_records: int = Config.CALLBACK_SPOOL_COMPACT_RECORDS
+    ):
+        """
+        Args:
+            post: Function that delivers one payload and returns True on
+                success (defaults to callback.post_callback)
+            queue_size: Max callbacks pending or waiting to retry
+            workers: Number of worker threads
+            max_attempts: Delivery attempts before a callback is dropped
+                (0 = no limit)
+            retry_seconds: Seconds after enqueueing a callback is
+                retried before it is dropped (0 = no limit)
+            backoff_base: Delay in seconds before the first retry
+            backoff_max: Upper bound for the retry delay in seconds
+            spool_dir: Directory for spool files, or None to disable
+            post_batch: Function that delivers a list of payloads in one
+                request (defaults to callback.post_callback_batch)
+            batch_size: Max payloads per request; 1 disables batching,
+                as does a default post_batch without CALLBACK_BATCH_URL
+            batch_window: Seconds a worker waits to fill a batch
+            spool_compact_records: Spool records that trigger a rewrite
+                keeping only pending callbacks
+        """
+        self.post = post or (
+            lambda payload: post_callback(payload, timeout=Config.CALLBACK_TIMEOUT)
+        )
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.spool_dir = spool_dir
+        self.post_batch = post_batch or (
+            lambda payloads: post_callback_batch(payloads, timeout=Config.CALLBACK_TIMEOUT)
+        )
+        self.batch_size = max(1, batch_size)
+
+        # GUVI_CALLBACK_URL takes single payloads: batches need their own URL
+        if self.batch_size > 1 and not post_batch and not Config.CALLBACK_BATCH_URL:
+            log.warning("CALLBACK_BATCH_URL not set, batching disabled", batch_size=self.batch_size)
+            self.batch_size = 1
+        self.batch_window = batch_window
+        self.spool_compact_records = spool_compact_records
+
+        # Heap of (due_time, sequence, item), guarded by _condition
+        self._queue: List = []
+        self._sequence = 0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+
+        self._spool = None
+        self._spool_path: Optional[str] = None
+        self._spool_lock = threading.Lock()
+        # Pending "add" records by id, and records in the spool file
+        self._spooled: Dict[str, Dict] = {}
+        self._spool_records = 0
+
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed_attempts": 0,
+            "retried": 0,
+            "dropped_queue_full": 0,
+            "dead": 0,
+            "recovered": 0,
+            "requests": 0,
+        }
+        self._latency_count = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    # ============================================
+    # LIFECYCLE
+    # ============================================
+
+    def start(self) -> None:
+        """Open the spool, recover orphaned callbacks and start workers"""
+        if self._running:
+            return
+
+        self._running = True
+
+        if self.spool_dir:
+            self._open_spool()
+            self._recover_orphans()
+
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"callback-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop workers and release the spool.
+
+        Callbacks still queued stay in the spool and are delivered by the
+        next dispatcher that starts with the same spool directory.
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        with self._spool_lock:
+            if self._spool:
+                self._spool.close()
+                self._spool = None
+
+    # ============================================
+    # PUBLIC API
+    # ============================================
+
+    def enqueue(self, payload: Dict) -> bool:
+        """
+        Queue a callback payload for delivery.
+
+        Args:
+            payload: Payload from callback.build_callback_payload
+
+        Returns:
+            True if queued, False if the queue is full
+        """
+        item = {"id": uuid.uuid4().hex, "payload": payload, "attempts": 0,
+                "enqueued_at": time.time()}
+
+        with self._condition:
+            if len(self._queue) + self._in_flight >= self.queue_size:
+                self._counters["dropped_queue_full"] += 1
+                CALLBACKS.inc(result="dropped")
+                return False
+
+            self._spool_write({"op": "add", "id": item["id"], "payload": payload})
+            self._push(item, time.monotonic())
+            self._counters["enqueued"] += 1
+
+        return True
+
+    def stats(self) -> Dict:
+        """
+        Queue depth, delivery counters and latency.
+
+        Latency is measured from enqueue to successful delivery.
+        """
+        with self._condition:
+            stats = dict(self._counters)
+            stats["queue_depth"] = len(self._queue)
+            stats["in_flight"] = self._in_flight
+            stats["latency_avg_ms"] = round(
+                self._latency_total / self._latency_count * 1000, 2
+            ) if self._latency_count else 0.0
+            stats["latency_max_ms"] = round(self._latency_max * 1000, 2)
+
+        return stats
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Block until nothing is queued or in flight (used by tests)"""
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+
+        return True
+
+    # ============================================
+    # WORKERS
+    # ============================================
+
+    def _push(self, item: Dict, due: float) -> None:
+        """Add an item to the queue (caller holds _condition)"""
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, item))
+        self._condition.notify_all()
+
+    def _next_items(self) -> List[Dict]:
+        """
+        Wait for the next due item and, when batching, for up to
+        batch_window more. Returns [] when stopping.
+        """
+        items = []
+        batch_deadline = None
+
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+
+                while (self._queue and self._queue[0][0] <= now
+                       and len(items) < self.batch_size):
+                    _, _, item = heapq.heappop(self._queue)
+                    self._in_flight += 1
+                    items.append(item)
+
+                if items and batch_deadline is None:
+                    batch_deadline = now + self.batch_window
+
+                if items and (len(items) >= self.batch_size or now >= batch_deadline):
+                    return items
+
+                # Sleep until the batch window closes or the next item is due
+                wake = [batch_deadline] if items else []
+                if self._queue:
+                    wake.append(self._queue[0][0])
+                self._condition.wait(min(wake) - now if wake else None)
+
+            # Stopping: hand back anything taken but not yet sent
+            for item in items:
+                self._in_flight -= 1
+                self._push(item, time.monotonic())
+
+        return []
+
+    def _worker(self) -> None:
+        """Deliver callbacks until stopped"""
+        while True:
+            items = self._next_items()
+            if not items:
+                return
+
+            try:
+                if len(items) == 1:
+                    delivered = self.post(items[0]["payload"])
+                else:
+                    delivered = self.post_batch([item["payload"] for item in items])
+            except Exception as e:
+                log.error("callback worker error", error=str(e))
+                delivered = False
+
+            with self._condition:
+                self._counters["requests"] += 1
+                for item in items:
+                    self._finish(item, delivered)
+                self._condition.notify_all()
+
+    def _finish(self, item: Dict, delivered: bool) -> None:
+        """Record a delivery attempt (caller holds _condition)"""
+        item["attempts"] += 1
+        self._in_flight -= 1
+
+        if delivered:
+            self._counters["sent"] += 1
+            CALLBACKS.inc(result="sent")
+            latency = time.time() - item["enqueued_at"]
+            self._latency_count += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            self._spool_write({"op": "done", "id": item["id"]})
+
+        elif self._expired(item):
+            self._counters["failed_attempts"] += 1
+            self._counters["dead"] += 1
+            CALLBACKS.inc(result="dead")
+            self._spool_write({"op": "dead", "id": item["id"]})
+            log.warning(
+                "giving up on callback",
+                session=item["payload"].get("sessionId"),
+                attempts=item["attempts"]
+            )
+
+        else:
+            self._counters["failed_attempts"] += 1
+            self._counters["retried"] += 1
+            CALLBACKS.inc(result="retried")
+            self._push(item, time.monotonic() + self._backoff(item["attempts"]))
+
+    def _expired(self, item: Dict) -> bool:
+        """Whether a failed callback has used up its attempts or time"""
+        if self.max_attempts > 0 and item["attempts"] >= self.max_attempts:
+            return True
+        return self.retry_seconds > 0 and time.time() - item["enqueued_at"] >= self.retry_seconds
+
+    def _backoff(self, attempts: int) -> float:
+        """Exponential backoff with jitter: half fixed, half random"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** min(attempts - 1, 32)))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    # ============================================
+    # SPOOL
+    # ============================================
+
+    def _open_spool(self) -> None:
+        """Create and lock this dispatcher's own spool file"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(
+            self.spool_dir,
+            f"callbacks-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        )
+
+        self._spool = open(path, "a", encoding="utf-8")
+        fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._spool_path = path
+
+    def _spool_write(self, record: Dict) -> None:
+        """
+        Append one record.
+
+        Truncates the spool once nothing is pending, and compacts it once
+        it holds spool_compact_records records (at least twice the
+        pending ones, so a full queue isn't rewritten on every record).
+        """
+        with self._spool_lock:
+            if not self._spool:
+                return
+
+            if record["op"] == "add":
+                self._spooled[record["id"]] = record
+            else:
+                self._spooled.pop(record["id"], None)
+
+            if not self._spooled:
+                self._spool.truncate(0)
+                self._spool_records = 0
+            elif (
+                self._spool_records >= self.spool_compact_records
+                and self._spool_records >= 2 * len(self._spooled)
+            ):
+                self._compact_spool()
+            else:
+                self._spool.write(dumps(record).decode("utf-8") + "\n")
+                self._spool_records += 1
+            self._spool.flush()
+
+    def _compact_spool(self) -> None:
+        """
+        Replace the spool with one holding only the pending "add" records.
+
+        The new file is written and locked under a name recovery ignores,
+        then renamed over the spool, so the spool path always holds a
+        complete, locked file. Called with _spool_lock held.
+        """
+        compacted = open(self._spool_path + ".compact", "a", encoding="utf-8")
+        fcntl.flock(compacted.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        compacted.truncate(0)
+        compacted.writelines(
+            dumps(record).decode("utf-8") + "\n" for record in self._spooled.values()
+        )
+        compacted.flush()
+        os.replace(compacted.name, self._spool_path)
+
+        self._spool.close()
+        self._spool = compacted
+        self._spool_records = len(self._spooled)
+
+    def _recover_orphans(self) -> None:
+        """
+        Re-enqueue pending callbacks from spool files of dead processes.
+
+        A spool file whose lock can be taken has no live owner. A
+        ".compact" file next to it is a compaction the owner didn't
+        finish; the spool itself is still complete, so it is removed.
+        """
+        pattern = os.path.join(self.spool_dir, "callbacks-*.jsonl")
+
+        for path in glob.glob(pattern):
+            if self._spool and os.path.samefile(path, self._spool_path):
+                continue
+
+            try:
+                orphan = open(path, "r+", encoding="utf-8")
+            except OSError:
+                continue
+
+            try:
+                fcntl.flock(orphan.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                orphan.close()
+                continue
+
+            try:
+                os.remove(path + ".compact")
+            except FileNotFoundError:
+                pass
+
+            pending = {}
+            for line in orphan:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                if record.get("op") == "add":
+                    pending[record["id"]] = record["payload"]
+                else:
+                    pending.pop(record.get("id"), None)
+
+            # Whatever doesn't fit in our queue stays in the orphan file
+            remaining = {}
+            for record_id, payload in pending.items():
+                if self.enqueue(payload):
+                    with self._condition:
+                        self._counters["recovered"] += 1
+                else:
+                    remaining[record_id] = payload
+
+            if remaining:
+                orphan.seek(0)
+                orphan.truncate()
+                for record_id, payload in remaining.items():
+                    orphan.write(json.dumps(
+                        {"op": "add", "id": record_id, "payload": payload}
+                    ) + "\n")
+            else:
+                os.remove(path)
+            orphan.close()
+
+
+# ============================================
+# PROCESS-WIDE DISPATCHER
+# ============================================
+
+_dispatcher: Optional[CallbackDispatcher] = None
+_dispatcher_pid: Optional[int] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> CallbackDispatcher:
+    """
+    Returns this process's dispatcher, starting it on first use.
+
+    Started lazily (and again after a fork) because worker threads do not
+    survive gunicorn forking its workers.
+    """
+    global _dispatcher, _dispatcher_pid
+
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher_pid != os.getpid():
+            _dispatcher = CallbackDispatcher()
+            _dispatcher.start()
+            _dispatcher_pid = os.getpid()
+
+    return _dispatcher
+
+
+def enqueue_callback(payload: Dict) -> bool:
+    """
+    Queue a callback payload on the process-wide dispatcher.
+
+    Returns:
+        True if queued, False if the queue is full
+    """
+    return get_dispatcher().enqueue(payload)
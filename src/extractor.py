@@ -2,7 +2,11 @@
 Intelligence extraction module
 Owner: Member A
 """
-from typing import Dict, List
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from src.patterns import scan_intelligence, find_scam_keywords
+from src.session import SessionData, record_message_extractions, update_session
 
 def extract_intelligence(message: str) -> Dict[str, List[str]]:
     """
@@ -31,18 +35,144 @@ def extract_intelligence(message: str) -> Dict[str, List[str]]:
             "suspiciousKeywords": ["send money"]
         }
     """
-    pass  # Member A implements
+    result = scan_intelligence(message)
+    result["suspiciousKeywords"] = find_scam_keywords(message)
+    return result
+
+
+def message_key(text: str) -> str:
+    """
+    Returns a stable content hash identifying a message text.
+    
+    Used to memoize per-message extraction results on the session, so
+    the same text is never scanned twice in one conversation.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def extract_new_messages(
+    conversation_history: list,
+    seen: Dict[str, Dict[str, List[str]]],
+    known: Optional[Dict[str, Dict[str, List[str]]]] = None
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Extracts intelligence from messages not scanned before
+    
+    Our own replies (sender "agent"), echoed back in the client's
+    history, are skipped: what the persona says is not intelligence.
+    
+    Args:
+        conversation_history: Message dicts with 'sender' and 'text' the
+            session hasn't seen (see reconcile.reconcile_history)
+        seen: Already recorded results, keyed by message_key
+            (usually SessionData.message_extractions)
+        known: Results scanned already for other sessions, keyed by
+            message_key (see extract_batch); reused instead of scanning
+    
+    Returns:
+        Dict of message_key -> extraction result for each new message
+        text. Only non-empty categories are kept.
+    """
+    scanned = {}
+
+    for message in conversation_history:
+        if not isinstance(message, dict) or message.get("sender") == "agent":
+            continue
+        text = message.get("text") or ""
+        key = message_key(text)
+        if key in seen or key in scanned:
+            continue
+        if known and key in known:
+            scanned[key] = known[key]
+            continue
+        scanned[key] = _non_empty(extract_intelligence(text))
+
+    return scanned
+
+
+def extract_batch(texts: Iterable[str]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Extracts intelligence from many message texts at once
+    
+    Each distinct text is scanned once, however many sessions sent it.
+    
+    Args:
+        texts: Message texts (e.g. every message in a batch request)
+    
+    Returns:
+        Dict of message_key -> extraction result (non-empty categories
+        only), for use as extract_new_messages(known=...)
+    """
+    scanned = {}
+    for text in texts:
+        key = message_key(text or "")
+        if key not in scanned:
+            scanned[key] = _non_empty(extract_intelligence(text or ""))
+    return scanned
+
 
+def _non_empty(extracted: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Drop empty categories from an extraction result"""
+    return {key: values for key, values in extracted.items() if values}
 
-def extract_from_conversation(conversation_history: list) -> Dict[str, List[str]]:
+
+def merge_extractions(
+    extractions: Iterable[Dict[str, List[str]]]
+) -> Dict[str, List[str]]:
     """
-    Extracts intelligence from entire conversation history
+    Merges extraction results into one deduplicated result
+    
+    Args:
+        extractions: Results in the format of extract_intelligence
+            (categories may be missing)
+    
+    Returns:
+        Aggregated intelligence dict (same format as extract_intelligence)
+    """
+    aggregate = {key: {} for key in extract_intelligence("")}
+
+    for extracted in extractions:
+        for key, values in extracted.items():
+            merged = aggregate.setdefault(key, {})
+            for value in values:
+                merged[value] = None
+
+    return {key: list(values) for key, values in aggregate.items()}
+
+
+def extract_from_conversation(
+    conversation_history: list,
+    session: Optional[SessionData] = None
+) -> Dict[str, List[str]]:
+    """
+    Extracts intelligence from entire conversation history, except our
+    own replies (sender "agent")
     
     Args:
         conversation_history: List of message dicts with 'sender' and 'text'
+        session: Optional session to memoize results on. Messages the
+            session has already scanned are not scanned again; new
+            results are recorded on the stored session and on this
+            object, and merged into their running aggregate.
     
     Returns:
         Aggregated intelligence dict (same format as extract_intelligence)
         Deduplicates across all messages
     """
-    pass  # Member A implements
\ No newline at end of file
+    if session is None:
+        return merge_extractions(
+            extract_intelligence(message.get("text") or "")
+            for message in conversation_history
+            if message.get("sender") != "agent"
+        )
+
+    scanned = extract_new_messages(conversation_history, session.message_extractions)
+
+    stored = update_session(session.session_id, message_extractions=scanned)
+    if stored is not session:
+        # Not stored, or the store hands out copies: keep the caller's
+        # object in step too
+        record_message_extractions(session, scanned)
+        stored = stored or session
+
+    return merge_extractions([stored.extracted_intelligence])
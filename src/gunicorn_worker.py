@@ -0,0 +1,33 @@
+"""
+Gunicorn worker that reports how long each request waited for a thread.
+
+The gthread worker reads requests off its sockets in one thread and
+queues them for GUNICORN_THREADS handler threads. When every thread is
+busy that queue grows and turns wait in it, where admission control
+(src/admission.py) can't see them. This worker stamps each request with
+the time it was queued, as an X-Request-Start header
+("t=<seconds since the epoch>"), which the app turns into a queue wait.
+A header set by a proxy in front is kept: it started the clock earlier.
+
+gunicorn.conf.py selects it with worker_class.
+"""
+
+import time
+
+from gunicorn.workers.gthread import ThreadWorker
+
+HEADER = "X-REQUEST-START"  # gunicorn upper-cases request header names
+
+
+class QueueTimedWorker(ThreadWorker):
+    """gthread worker adding X-Request-Start when it queues a request"""
+
+    def enqueue_req(self, conn):
+        conn.queued_at = time.time()
+        super().enqueue_req(conn)
+
+    def handle_request(self, req, conn):
+        queued_at = getattr(conn, "queued_at", None)
+        if queued_at is not None and not any(name == HEADER for name, _ in req.headers):
+            req.headers.append((HEADER, f"t={queued_at:.6f}"))
+        return super().handle_request(req, conn)
@@ -0,0 +1,348 @@
+"""
+Inverted index of extracted intelligence across sessions.
+
+Each session keeps its own extracted_intelligence; this index maps every
+indicator back to the sessions that reported it, so an analyst can ask
+"where else did this UPI ID show up?" without scanning every session. It
+is updated by update_session (src/session.py) as intelligence is merged,
+and outlives the sessions themselves: completed sessions are deleted
+once their callback is queued, their indicators stay linkable.
+
+Indicators are canonicalized first (see canonicalize), so the same UPI
+ID, phone number, account, IFSC code or phishing domain matches however
+it was written:
+
+    upiIds         lower case                    Fraud@PayTM -> fraud@paytm
+    phoneNumbers   last 10 digits                +91 98765-43210 -> 9876543210
+    bankAccounts   digits only                   1234 5678 9012 -> 123456789012
+    ifscCodes      upper case                    sbin0001234 -> SBIN0001234
+    phishingLinks  host name, without www.       https://WWW.Evil.com/kyc -> evil.com
+
+The index follows SESSION_BACKEND:
+
+- "memory": a dict per process, O(1) lookups. Holds at most
+  INTEL_INDEX_MAX_INDICATORS indicators (least recently seen dropped
+  first) and lists the INTEL_INDEX_MAX_SESSIONS most recent sessions of
+  each; sessionCount counts every session that reported it, so one that
+  was dropped from the list and reports it again counts twice.
+- "sqlite": a table in the session database, shared by all workers on
+  the node, looked up by its primary key.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.config import Config
+
+# Intelligence categories that are indexed (suspiciousKeywords are not
+# indicators of one campaign)
+INDEXED_TYPES = ("upiIds", "phoneNumbers", "bankAccounts", "ifscCodes", "phishingLinks")
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def canonicalize(kind: str, value: str) -> Optional[str]:
+    """
+    Canonical form of an indicator (see the module docstring).
+
+    Args:
+        kind: Intelligence category, one of INDEXED_TYPES
+        value: Indicator as extracted or as typed by an analyst
+
+    Returns:
+        The canonical indicator, or None if the value can't be one of
+        this kind (or the kind isn't indexed)
+    """
+    value = value.strip()
+
+    if kind == "upiIds":
+        return value.lower() if "@" in value else None
+
+    if kind == "phoneNumbers":
+        digits = _NON_DIGITS.sub("", value)
+        return digits[-10:] if len(digits) >= 10 else None
+
+    if kind == "bankAccounts":
+        return _NON_DIGITS.sub("", value) or None
+
+    if kind == "ifscCodes":
+        return value.upper() or None
+
+    if kind == "phishingLinks":
+        if "://" not in value:
+            value = f"http://{value}"
+        try:
+            host = urlsplit(value).hostname or ""
+        except ValueError:
+            return None
+        host = host.rstrip(".")
+        if host.startswith("www."):
+            host = host[len("www."):]
+        return host or None
+
+    return None
+
+
+def canonical_intelligence(intelligence: Dict[str, Iterable[str]]) -> List[Tuple[str, str]]:
+    """(kind, canonical indicator) pairs of an extraction result, deduplicated"""
+    pairs = {}
+    for kind in INDEXED_TYPES:
+        for value in intelligence.get(kind, ()):
+            indicator = canonicalize(kind, value)
+            if indicator:
+                pairs[(kind, indicator)] = None
+    return list(pairs)
+
+
+class IntelIndex(ABC):
+    """Indicator -> sessions that reported it, with first and last seen"""
+
+    @abstractmethod
+    def record(self, session_id: str, pairs: List[Tuple[str, str]], seen_at: int) -> None:
+        """
+        Record that a session reported indicators.
+
+        Args:
+            session_id: Reporting session
+            pairs: (kind, canonical indicator) pairs (see
+                canonical_intelligence)
+            seen_at: When, in milliseconds since the epoch
+        """
+
+    @abstractmethod
+    def lookup(self, kind: str, indicator: str) -> Optional[Dict]:
+        """
+        Sessions that reported a canonical indicator.
+
+        Returns:
+            {"type", "indicator", "firstSeen", "lastSeen", "sessionCount",
+            "sessions"} with sessions most recent first, or None if never
+            seen
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every indicator"""
+
+
+# ============================================
+# IN-MEMORY INDEX
+# ============================================
+
+class MemoryIntelIndex(IntelIndex):
+    """Per-process dict of indicators, least recently seen first"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, session_id: str, pairs: List[Tuple[str, str]], seen_at: int) -> None:
+        limit = Config.INTEL_INDEX_MAX_SESSIONS
+
+        with self._lock:
+            for pair in pairs:
+                entry = self._entries.get(pair)
+                if entry is None:
+                    entry = {"firstSeen": seen_at, "lastSeen": seen_at, "sessionCount": 0, "sessions": {}}
+                    self._entries[pair] = entry
+                else:
+                    entry["lastSeen"] = max(entry["lastSeen"], seen_at)
+                    self._entries.move_to_end(pair)
+
+                # Sessions oldest first, so the front is dropped past the limit
+                sessions = entry["sessions"]
+                if session_id in sessions:
+                    del sessions[session_id]
+                else:
+                    entry["sessionCount"] += 1
+                sessions[session_id] = None
+                while limit and len(sessions) > limit:
+                    del sessions[next(iter(sessions))]
+
+            maximum = Config.INTEL_INDEX_MAX_INDICATORS
+            while maximum and len(self._entries) > maximum:
+                self._entries.popitem(last=False)
+
+    def lookup(self, kind: str, indicator: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get((kind, indicator))
+            if entry is None:
+                return None
+            return {
+                "type": kind,
+                "indicator": indicator,
+                "firstSeen": entry["firstSeen"],
+                "lastSeen": entry["lastSeen"],
+                "sessionCount": entry["sessionCount"],
+                "sessions": list(reversed(entry["sessions"]))
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ============================================
+# SQLITE INDEX
+# ============================================
+
+class SQLiteIntelIndex(IntelIndex):
+    """
+    One row per (indicator, session) in the session database, shared by
+    all workers on the node.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS intel_index (
+            kind TEXT NOT NULL,
+            indicator TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL,
+            PRIMARY KEY (kind, indicator, session_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str = Config.SESSION_DB_PATH):
+        """
+        Args:
+            path: Database file; created (with its directory) if missing
+        """
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, reopened after a fork"""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=Config.SESSION_DB_BUSY_TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def record(self, session_id: str, pairs: List[Tuple[str, str]], seen_at: int) -> None:
+        if not pairs:
+            return
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO intel_index VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, indicator, session_id) "
+                "DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                [(kind, indicator, session_id, seen_at, seen_at) for kind, indicator in pairs]
+            )
+
+    def lookup(self, kind: str, indicator: str) -> Optional[Dict]:
+        connection = self._connection()
+        count, first_seen, last_seen = connection.execute(
+            "SELECT COUNT(*), MIN(first_seen), MAX(last_seen) FROM intel_index "
+            "WHERE kind = ? AND indicator = ?", (kind, indicator)
+        ).fetchone()
+        if not count:
+            return None
+
+        rows = connection.execute(
+            "SELECT session_id FROM intel_index WHERE kind = ? AND indicator = ? "
+            "ORDER BY last_seen DESC LIMIT ?",
+            (kind, indicator, Config.INTEL_INDEX_MAX_SESSIONS or -1)
+        ).fetchall()
+        return {
+            "type": kind,
+            "indicator": indicator,
+            "firstSeen": first_seen,
+            "lastSeen": last_seen,
+            "sessionCount": count,
+            "sessions": [row[0] for row in rows]
+        }
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM intel_index")
+
+
+def create_index(backend: str = None) -> IntelIndex:
+    """
+    Build the index for a session backend.
+
+    Args:
+        backend: "memory" or "sqlite" (defaults to SESSION_BACKEND)
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    backend = (backend or Config.SESSION_BACKEND).lower()
+
+    if backend == "memory":
+        return MemoryIntelIndex()
+    if backend == "sqlite":
+        return SQLiteIntelIndex(Config.SESSION_DB_PATH)
+
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+# Process-wide index, created on first use
+_index: Optional[IntelIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_intel_index() -> IntelIndex:
+    """The index for the configured session backend"""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = create_index()
+    return _index
+
+
+def set_intel_index(index: Optional[IntelIndex]) -> Optional[IntelIndex]:
+    """
+    Replace the index (tests and benchmarks).
+
+    Args:
+        index: IntelIndex to use, or None to recreate the configured
+            one on next use
+
+    Returns:
+        The previous index
+    """
+    global _index
+
+    with _index_lock:
+        previous, _index = _index, index
+    return previous
+
+
+def lookup_indicator(value: str, kind: str = None) -> List[Dict]:
+    """
+    Look an indicator up under its type, or under every type it could be.
+
+    Args:
+        value: Indicator as typed (canonicalized here)
+        kind: One of INDEXED_TYPES, or None to try them all
+
+    Returns:
+        lookup() results for the types where it was seen
+    """
+    matches = []
+    for candidate in (kind,) if kind else INDEXED_TYPES:
+        indicator = canonicalize(candidate, value)
+        if indicator:
+            match = get_intel_index().lookup(candidate, indicator)
+            if match:
+                matches.append(match)
+    return matches
@@ -0,0 +1,96 @@
+"""
+JSON encoding and decoding for requests, responses and callbacks.
+
+Uses orjson when it is installed (several times faster on large
+conversationHistory arrays and /session dumps) and the stdlib json
+module otherwise. JSON_BACKEND picks one explicitly:
+
+    auto    orjson if importable, else stdlib (default)
+    orjson  orjson, failing at import if it is missing
+    stdlib  the json module
+
+Both backends write compact UTF-8 without sorting keys, so output is the
+same whichever one runs. Sets (session intelligence is kept in ordered
+sets) are written as lists.
+
+Usage:
+    from src.jsonio import dumps, loads
+    body = dumps({"status": "success"})    # bytes
+    data = loads(body)
+"""
+
+import json
+from collections.abc import Set
+from typing import Any, Union
+
+from src.config import Config
+
+
+def _default(obj: Any) -> Any:
+    """Encode types neither backend knows"""
+    if isinstance(obj, Set):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _load_orjson():
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, default=_default, option=options)
+        except TypeError:
+            # Integers beyond 64 bits and other edge cases orjson refuses
+            return _stdlib_dumps(obj)
+
+    return "orjson", dumps, orjson.loads
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def _load_backend():
+    """(name, dumps, loads) for the configured JSON_BACKEND"""
+    backend = Config.JSON_BACKEND.lower()
+
+    if backend == "orjson":
+        return _load_orjson()
+    if backend == "auto":
+        try:
+            return _load_orjson()
+        except ImportError:
+            pass
+    elif backend != "stdlib":
+        raise ValueError(f"Unknown JSON_BACKEND: {Config.JSON_BACKEND}")
+
+    return "stdlib", _stdlib_dumps, json.loads
+
+
+BACKEND, _dumps, _loads = _load_backend()
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON.
+
+    Raises:
+        TypeError: For values neither backend can encode
+    """
+    return _dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON text.
+
+    Raises:
+        ValueError: For malformed JSON (json.JSONDecodeError, which
+            orjson's decode error also subclasses)
+    """
+    return _loads(data)
@@ -0,0 +1,229 @@
+"""
+Scam keyword lexicon and Aho-Corasick keyword automaton.
+
+The lexicon is loaded once at import time from a keyword file
+(see src/data/scam_keywords.tsv) and compiled into an automaton that
+finds every keyword hit, with its offset, in one linear pass over the
+text - no matter how many phrases the lexicon holds.
+"""
+
+import string
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from src.config import Config
+
+
+# Punctuation is mapped to spaces (same length, so offsets still line up)
+# and words are then whatever str.split() returns - much cheaper than a
+# regex tokenizer, and it leaves Devanagari vowel signs inside words.
+_SEPARATORS = str.maketrans(
+    {char: " " for char in string.punctuation + "₹“”‘’…–—।॥"}
+)
+
+
+def split_words(text: str) -> Tuple[str, List[str]]:
+    """
+    Split text into lower-cased words.
+
+    Returns:
+        Tuple of (normalized text, words); the normalized text has the
+        same length as the input for the scripts our lexicon covers
+    """
+    normalized = text.lower().translate(_SEPARATORS)
+    return normalized, normalized.split()
+
+
+class KeywordEntry(NamedTuple):
+    """One lexicon phrase"""
+    phrase: str
+    category: str
+    weight: float
+
+
+class KeywordHit(NamedTuple):
+    """One keyword occurrence in a text"""
+    keyword: str
+    category: str
+    weight: float
+    start: int
+    end: int
+
+
+def load_keyword_file(path: str) -> List[KeywordEntry]:
+    """
+    Load keyword entries from a lexicon file.
+
+    Args:
+        path: Path to a file with one `phrase<TAB>category<TAB>weight`
+            entry per line. Blank lines and lines starting with # are
+            skipped. Category defaults to "suspicious" and weight to 0.2.
+
+    Returns:
+        List of KeywordEntry, in file order
+
+    Raises:
+        ValueError: If a weight is not a number between 0 and 1
+    """
+    entries = []
+
+    with open(path, encoding="utf-8") as lexicon:
+        for line_number, line in enumerate(lexicon, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            fields = [field.strip() for field in line.split("\t")]
+            phrase = " ".join(fields[0].lower().split())
+            category = fields[1] if len(fields) > 1 and fields[1] else "suspicious"
+
+            try:
+                weight = float(fields[2]) if len(fields) > 2 else 0.2
+            except ValueError:
+                weight = -1.0
+
+            if not 0.0 <= weight <= 1.0:
+                raise ValueError(
+                    f"{path}:{line_number}: weight must be between 0 and 1"
+                )
+
+            entries.append(KeywordEntry(phrase, category, weight))
+
+    return entries
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a keyword lexicon.
+
+    The automaton runs over words rather than characters: phrases always
+    start and end on word boundaries (so "pin" does not fire inside
+    "shopping"), and stepping a word at a time is several times cheaper
+    in Python than stepping a character at a time. Matching is
+    case-insensitive, punctuation and spacing between words is ignored,
+    and overlapping hits are all reported ("account blocked" and
+    "blocked").
+    """
+
+    def __init__(self, entries: Iterable[KeywordEntry]):
+        # Later duplicates of a phrase replace earlier ones
+        self.entries: Dict[str, KeywordEntry] = {}
+        for entry in entries:
+            if entry.phrase:
+                self.entries[entry.phrase] = entry
+
+        self._build()
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordAutomaton":
+        """Build an automaton from a lexicon file"""
+        return cls(load_keyword_file(path))
+
+    @property
+    def keywords(self) -> List[str]:
+        """All phrases in the lexicon"""
+        return list(self.entries)
+
+    def _build(self) -> None:
+        """Build the trie, failure links and transition tables"""
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Tuple[Tuple[KeywordEntry, int], ...]] = [()]
+
+        # Step 1: Trie of all phrases, one edge per word
+        for entry in self.entries.values():
+            _, words = split_words(entry.phrase)
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                next_state = goto[state].get(word)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][word] = next_state
+                    goto.append({})
+                    outputs.append(())
+                state = next_state
+            outputs[state] = ((entry, len(words)),)
+
+        # Step 2: Failure links, breadth-first. Each state's transition
+        # table absorbs its failure state's table, so matching needs one
+        # lookup per word plus a fallback to the root.
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        queue = deque()
+
+        for state in goto[0].values():
+            delta[state] = dict(goto[state])
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for word, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                child_fail = goto[fallback].get(word, 0)
+
+                fail[child] = child_fail
+                outputs[child] = outputs[child] + outputs[child_fail]
+                delta[child] = {**delta[child_fail], **goto[child]}
+                queue.append(child)
+
+        self._root = goto[0]
+        self._delta = delta
+        self._outputs = outputs
+
+    def find_all(self, text: str) -> List[KeywordHit]:
+        """
+        Find every keyword occurrence in text.
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List of KeywordHit ordered by end offset
+        """
+        if not text:
+            return []
+
+        normalized, words = split_words(text)
+        root_get = self._root.get
+        delta = self._delta
+        outputs = self._outputs
+        hits = []
+        state = 0
+
+        # Word offsets are only resolved up to the latest hit
+        starts = []
+        resolved = 0
+        position = 0
+
+        for index, word in enumerate(words):
+            if state:
+                state = delta[state].get(word) or root_get(word, 0)
+            else:
+                state = root_get(word, 0)
+                if not state:
+                    continue
+
+            if outputs[state]:
+                while resolved <= index:
+                    position = normalized.find(words[resolved], position)
+                    starts.append(position)
+                    position += len(words[resolved])
+                    resolved += 1
+
+                for entry, length in outputs[state]:
+                    hits.append(KeywordHit(
+                        entry.phrase,
+                        entry.category,
+                        entry.weight,
+                        starts[index - length + 1],
+                        position
+                    ))
+
+        return hits
+
+
+# Lexicon shared by the detector and the extractor, built once at import
+SCAM_LEXICON = KeywordAutomaton.from_file(Config.SCAM_KEYWORDS_FILE)
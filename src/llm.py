@@ -0,0 +1,424 @@
+"""
+Groq LLM client with pooled connections, streaming, deadlines and
+hedged requests.
+
+Our p99 is dominated by occasional multi-second LLM stalls, so every
+completion here is bounded:
+
+- Deadline: each reply must finish within the endpoint's latency budget
+  (REPLY_LATENCY_BUDGET_MS less REPLY_OVERHEAD_MS for the rest of the
+  turn). Tokens are streamed, so a stall is noticed while it happens
+  instead of after a blanket timeout.
+- Hedging: if the first attempt hasn't produced a token within
+  GROQ_HEDGE_AFTER_MS (or has already failed), a second request is sent
+  and whichever completes first wins. The loser is closed. An attempt
+  that completed, even with an empty reply, is not hedged.
+
+Clients keep their connections alive between turns and are recreated
+after a fork, like the callback connection pool. The groq SDK (and httpx)
+take longer to import than the rest of the app, so they are imported on
+first use, or up front by load_sdk() when warming up (src/warmup.py).
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from src.config import Config
+
+if TYPE_CHECKING:
+    import httpx
+    from groq import AsyncGroq, Groq
+
+
+class LLMTimeout(Exception):
+    """No complete reply before the deadline"""
+
+
+# Process-wide client and worker threads for attempts (see get_client)
+_client: Optional["Groq"] = None
+_executor: Optional[ThreadPoolExecutor] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+# One async client per event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Counters reported by llm_stats()
+_stats = {
+    "requests": 0,
+    "attempts": 0,
+    "hedged": 0,
+    "hedgeWins": 0,
+    "timeouts": 0,
+    "errors": 0
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _client_options() -> Dict:
+    """Options shared by the sync and async clients"""
+    options = {
+        "api_key": Config.GROQ_API_KEY,
+        # Attempts are bounded by our own deadline and hedging instead
+        "max_retries": 0
+    }
+    if Config.GROQ_BASE_URL:
+        options["base_url"] = Config.GROQ_BASE_URL
+    return options
+
+
+def load_sdk() -> None:
+    """Import the groq SDK and httpx now instead of on the first reply"""
+    import httpx  # noqa: F401
+    import groq  # noqa: F401
+
+
+def _limits() -> "httpx.Limits":
+    import httpx
+
+    return httpx.Limits(
+        max_connections=Config.GROQ_POOL_SIZE,
+        max_keepalive_connections=Config.GROQ_POOL_SIZE
+    )
+
+
+def get_client() -> "Groq":
+    """
+    Returns the process-wide pooled Groq client.
+
+    groq passes httpx options that newer httpx releases reject, so it is
+    always given its own httpx client.
+    """
+    global _client, _executor, _client_pid
+
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import httpx
+            from groq import Groq
+
+            _client = Groq(
+                http_client=httpx.Client(limits=_limits(), timeout=Config.GROQ_TIMEOUT),
+                **_client_options()
+            )
+            # Two attempts (primary + hedge) per in-flight reply
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.GROQ_POOL_SIZE * 2,
+                thread_name_prefix="llm"
+            )
+            _client_pid = os.getpid()
+
+    return _client
+
+
+def get_async_client() -> "AsyncGroq":
+    """Pooled async Groq client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None:
+        import httpx
+        from groq import AsyncGroq
+
+        client = AsyncGroq(
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=Config.GROQ_TIMEOUT),
+            **_client_options()
+        )
+        _async_clients[loop] = client
+
+    return client
+
+
+def reset_clients() -> None:
+    """Drop pooled clients so the next call uses the current Config"""
+    global _client, _executor, _client_pid
+
+    with _client_lock:
+        if _executor is not None and _client_pid == os.getpid():
+            _executor.shutdown(wait=False)
+        _client = _executor = _client_pid = None
+    _async_clients.clear()
+
+
+def reply_deadline(started: float = None) -> float:
+    """
+    Deadline (time.monotonic) for an LLM reply.
+
+    Args:
+        started: When the request started (defaults to now)
+    """
+    budget_ms = Config.REPLY_LATENCY_BUDGET_MS - Config.REPLY_OVERHEAD_MS
+    return (started or time.monotonic()) + max(budget_ms, 0) / 1000
+
+
+def _request_options(messages: List[Dict], remaining: float) -> Dict:
+    """Arguments for one streaming chat completion"""
+    import httpx
+
+    return {
+        "model": Config.GROQ_MODEL,
+        "messages": messages,
+        "max_tokens": Config.GROQ_MAX_TOKENS,
+        "temperature": 0.8,
+        "stream": True,
+        # The read timeout covers gaps between streamed chunks
+        "timeout": httpx.Timeout(remaining, connect=min(remaining, Config.GROQ_CONNECT_TIMEOUT))
+    }
+
+
+def _chunk_text(chunk) -> str:
+    """Token text carried by a streamed chunk"""
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+# ============================================
+# SYNC
+# ============================================
+
+class _Attempt:
+    """
+    One streaming request, run on the executor.
+
+    The deadline is fixed when the attempt is submitted, so time spent
+    queued for an executor thread counts against it.
+    """
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        # Set on the first token, or when the attempt ends without one
+        self.started_or_done = threading.Event()
+        self.got_token = False
+        # A reply, even an empty one, needs no hedge
+        self.completed = False
+        self.cancelled = threading.Event()
+        self.stream = None
+
+    def run(self, messages: List[Dict]) -> str:
+        _count("attempts")
+        deadline = self.deadline
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout("deadline passed before the request")
+
+            self.stream = get_client().chat.completions.create(
+                **_request_options(messages, remaining)
+            )
+            parts = []
+
+            for chunk in self.stream:
+                if self.cancelled.is_set():
+                    raise LLMTimeout("cancelled")
+                if time.monotonic() > deadline:
+                    raise LLMTimeout("deadline passed while streaming")
+                text = _chunk_text(chunk)
+                if text:
+                    parts.append(text)
+                    self.got_token = True
+                    self.started_or_done.set()
+
+            self.completed = True
+            return "".join(parts)
+
+        finally:
+            self.started_or_done.set()
+            if self.stream is not None:
+                self.stream.close()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+
+def complete(messages: List[Dict], deadline: float = None) -> str:
+    """
+    Stream a chat completion, bounded by a deadline and hedged.
+
+    Args:
+        messages: Chat messages
+        deadline: time.monotonic() deadline (defaults to reply_deadline())
+
+    Returns:
+        The reply text
+
+    Raises:
+        LLMTimeout: If no attempt completed before the deadline
+        Exception: The last attempt's error, if every attempt failed
+    """
+    deadline = deadline or reply_deadline()
+    _count("requests")
+    get_client()
+
+    primary = _Attempt(deadline)
+    attempts = {_executor.submit(primary.run, messages): primary}
+
+    # Hedge if the primary stalls before its first token or fails
+    hedge_after = Config.GROQ_HEDGE_AFTER_MS / 1000
+    if hedge_after > 0:
+        primary.started_or_done.wait(max(0, min(hedge_after, deadline - time.monotonic())))
+
+        if not (primary.got_token or primary.completed) and time.monotonic() < deadline:
+            _count("hedged")
+            hedge = _Attempt(deadline)
+            attempts[_executor.submit(hedge.run, messages)] = hedge
+
+    pending = set(attempts)
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(0, deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                break
+
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if attempts[future] is not primary:
+                    _count("hedgeWins")
+                return future.result()
+
+    finally:
+        for attempt in attempts.values():
+            attempt.cancel()
+
+    if error is not None and not isinstance(error, LLMTimeout):
+        _count("errors")
+        raise error
+
+    _count("timeouts")
+    raise LLMTimeout("no reply within the latency budget")
+
+
+# ============================================
+# ASYNC
+# ============================================
+
+class _AsyncAttempt:
+    """One streaming request on the event loop"""
+
+    def __init__(self):
+        # Set on the first token, or when the attempt ends without one
+        self.started_or_done = asyncio.Event()
+        self.got_token = False
+        # A reply, even an empty one, needs no hedge
+        self.completed = False
+
+    async def run(self, messages: List[Dict], deadline: float) -> str:
+        _count("attempts")
+        stream = None
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeout("deadline passed before the request")
+
+            stream = await get_async_client().chat.completions.create(
+                **_request_options(messages, remaining)
+            )
+            parts = []
+
+            async for chunk in stream:
+                if time.monotonic() > deadline:
+                    raise LLMTimeout("deadline passed while streaming")
+                text = _chunk_text(chunk)
+                if text:
+                    parts.append(text)
+                    self.got_token = True
+                    self.started_or_done.set()
+
+            self.completed = True
+            return "".join(parts)
+
+        finally:
+            self.started_or_done.set()
+            if stream is not None:
+                await stream.close()
+
+
+async def complete_async(messages: List[Dict], deadline: float = None) -> str:
+    """
+    Async version of complete(): same deadline and hedging, on the event
+    loop instead of worker threads.
+    """
+    deadline = deadline or reply_deadline()
+    _count("requests")
+
+    attempt = _AsyncAttempt()
+    primary = asyncio.ensure_future(attempt.run(messages, deadline))
+    tasks = [primary]
+
+    # Hedge if the primary stalls before its first token or fails
+    hedge_after = Config.GROQ_HEDGE_AFTER_MS / 1000
+    if hedge_after > 0:
+        try:
+            await asyncio.wait_for(
+                attempt.started_or_done.wait(),
+                max(0, min(hedge_after, deadline - time.monotonic()))
+            )
+        except asyncio.TimeoutError:
+            pass
+
+        if not (attempt.got_token or attempt.completed) and time.monotonic() < deadline:
+            _count("hedged")
+            tasks.append(asyncio.ensure_future(_AsyncAttempt().run(messages, deadline)))
+
+    pending = set(tasks)
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(0, deadline - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                if task is not primary:
+                    _count("hedgeWins")
+                return task.result()
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if error is not None and not isinstance(error, LLMTimeout):
+        _count("errors")
+        raise error
+
+    _count("timeouts")
+    raise LLMTimeout("no reply within the latency budget")
+
+
+def llm_stats() -> Dict:
+    """Request, hedge and timeout counters"""
+    with _stats_lock:
+        return dict(_stats)
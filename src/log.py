@@ -0,0 +1,199 @@
+"""
+Structured logging for the request path.
+
+Log calls put records on an in-memory queue (logging.QueueHandler) and a
+background thread (logging.QueueListener) formats and writes them, so a
+request never waits on stdout. Each line is one JSON object:
+
+    {"ts": "2024-05-01T12:00:00.123Z", "level": "info",
+     "logger": "honeypot.pipeline", "event": "callback queued",
+     "session": "abc-123"}
+
+(LOG_FORMAT=text gives "ts level logger event key=value ..." instead.)
+
+- Level gating: calls below LOG_LEVEL return before anything is built
+  or queued.
+- Sampling: per-request debug lines go through `sampled()`, which keeps
+  only LOG_SAMPLE_RATE of them.
+- Redaction: extracted intelligence (UPI IDs, account and phone numbers,
+  links) is never logged; log counts instead (see `counts`).
+
+Usage:
+    from src.log import get_logger
+    log = get_logger(__name__)
+    log.info("callback queued", session=session_id)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, IO, Iterable, Optional
+
+from src.config import Config
+
+# Parent of every logger here; nothing propagates to the root logger
+ROOT = "honeypot"
+
+_root = logging.getLogger(ROOT)
+_root.setLevel(Config.LOG_LEVEL.upper())
+_root.propagate = False
+
+# Listener of this process (see _ensure_listener)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+_stream: Optional[IO] = None
+_format: str = Config.LOG_FORMAT
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event and fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": _timestamp(record.created),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """ts level logger event key=value ... (for reading locally)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{_timestamp(record.created)} {record.levelname.lower():<7} {record.name} {record.getMessage()}"
+        return f"{line} {fields}" if fields else line
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, not at startup"""
+
+    @property
+    def stream(self) -> IO:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value: IO) -> None:
+        pass
+
+
+def _timestamp(created: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(created)) + f".{int(created % 1 * 1000):03d}Z"
+
+
+class StructuredLogger:
+    """
+    Logger taking an event name and keyword fields.
+
+    Fields are passed as they are and only serialized on the listener
+    thread, so keep them cheap (IDs, numbers, short strings).
+    """
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name if name.startswith(ROOT) else f"{ROOT}.{name}")
+
+    def enabled(self, level: int) -> bool:
+        """Whether records at this level are written"""
+        return self._logger.isEnabledFor(level)
+
+    def debug(self, event: str, **fields) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def sampled(self, event: str, rate: float = None, **fields) -> None:
+        """
+        Debug line kept with probability `rate` (defaults to
+        LOG_SAMPLE_RATE), for lines written on every request.
+        """
+        if not self._logger.isEnabledFor(logging.DEBUG):
+            return
+        rate = Config.LOG_SAMPLE_RATE if rate is None else rate
+        if rate < 1 and random.random() >= rate:
+            return
+        fields["sampleRate"] = rate
+        self._log(logging.DEBUG, event, fields)
+
+    def _log(self, level: int, event: str, fields: Dict) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        _ensure_listener()
+        self._logger.log(level, event, extra={"fields": fields})
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Logger for a module (pass __name__)"""
+    return StructuredLogger(name[len("src."):] if name.startswith("src.") else name)
+
+
+def counts(values_by_key: Dict[str, Iterable]) -> Dict[str, int]:
+    """Number of values per non-empty category, for logging without values"""
+    return {key: len(list(values)) for key, values in values_by_key.items() if values}
+
+
+def configure(level: str = None, format: str = None, stream: IO = None) -> None:
+    """
+    Set the level, format and output stream (defaults: LOG_LEVEL,
+    LOG_FORMAT, stdout). Pending records are written first.
+    """
+    global _stream, _format
+
+    shutdown()
+    _root.setLevel((level or Config.LOG_LEVEL).upper())
+    _format = format or Config.LOG_FORMAT
+    _stream = stream
+
+
+def shutdown() -> None:
+    """Write pending records and stop this process's listener thread"""
+    global _listener, _listener_pid
+
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = _listener_pid = None
+        _root.handlers = []
+
+
+def _ensure_listener() -> None:
+    """Start the queue and listener thread (again after a fork)"""
+    global _listener, _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+
+        records = queue.SimpleQueue()
+        handler = logging.StreamHandler(_stream) if _stream else StdoutHandler()
+        handler.setFormatter(TextFormatter() if _format == "text" else JsonFormatter())
+
+        _listener = logging.handlers.QueueListener(records, handler)
+        _listener.start()
+        _root.handlers = [logging.handlers.QueueHandler(records)]
+        _listener_pid = os.getpid()
+
+
+atexit.register(shutdown)
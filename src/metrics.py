@@ -0,0 +1,474 @@
+"""
+Prometheus metrics: latency histograms, counters and gauges.
+
+Every /honeypot turn is timed stage by stage (auth, parse, session,
+detect, extract, reply, update, callback, respond) into
+honeypot_stage_seconds, so /metrics shows which stage is eating the
+latency budget. Metrics are rendered in the Prometheus text format by
+render().
+
+Gunicorn runs several worker processes and a scrape reaches only one of
+them. With METRICS_DIR set, each process writes a snapshot of its
+metrics to METRICS_DIR/<pid>.json every METRICS_FLUSH_SECONDS (and at
+exit), and render() adds up the snapshots of every process:
+
+- counters and histograms are summed over all processes that ever
+  wrote one, so counts survive worker restarts,
+- gauges are summed (or, for values every process sees alike, like the
+  SQLite session count, maxed) over live processes only.
+
+Point METRICS_DIR at a directory of its own per deployment and empty it
+(clear_snapshots) when the server starts. Without it, each process
+reports only itself.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config import Config
+from src.log import get_logger
+
+log = get_logger(__name__)
+
+# Latency buckets in seconds: sub-millisecond CPU stages up to LLM calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+# Label values of a sample, in label name order
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """Base for metrics: named, documented, with fixed label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Dict[LabelValues, object]:
+        """Current values by label values (JSON-friendly)"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget all values (in a forked child, see Registry.reset)"""
+        self._lock = threading.Lock()
+        self._values = {}
+
+
+class Counter(_Metric):
+    """A count that only goes up"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        _ensure_flusher()
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, set directly or read from a function
+    at collection time.
+
+    Args:
+        aggregate: How processes' values combine: "sum" (per-process
+            values, like in-memory sessions) or "max" (values every
+            process sees alike, like a shared store's size)
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        aggregate: str = "sum"
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.aggregate = aggregate
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        _ensure_flusher()
+
+    def set_function(self, function: Callable[[], float], aggregate: str = None) -> None:
+        """Read the (unlabeled) value from function at collection time"""
+        self._function = function
+        if aggregate:
+            self.aggregate = aggregate
+
+    def samples(self) -> Dict[LabelValues, float]:
+        if self._function is not None:
+            try:
+                return {(): float(self._function())}
+            except Exception:
+                return {}
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram(_Metric):
+    """Observations counted into buckets, with their sum"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (last is +Inf), sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+        _ensure_flusher()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block (also if it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            return {key: list(counts) for key, counts in self._values.items()}
+
+
+class Registry:
+    """All metrics of this process, with snapshot and rendering"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def metrics(self) -> List[_Metric]:
+        return list(self._metrics.values())
+
+    def reset(self) -> None:
+        """
+        Forget every value. Runs in each forked child: counts made before
+        the fork (e.g. warming up a preloaded app) stay with the parent
+        instead of being reported again by every worker.
+        """
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def snapshot(self) -> Dict:
+        """This process's samples, as written to METRICS_DIR"""
+        return {
+            metric.name: [[list(key), value] for key, value in metric.samples().items()]
+            for metric in self._metrics.values()
+        }
+
+
+REGISTRY = Registry()
+os.register_at_fork(after_in_child=REGISTRY.reset)
+
+
+# ============================================
+# MULTI-PROCESS SNAPSHOTS
+# ============================================
+
+_flusher_pid: Optional[int] = None
+_flusher_lock = threading.Lock()
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{pid}.json")
+
+
+def write_snapshot() -> None:
+    """Write this process's snapshot to METRICS_DIR (atomically)"""
+    directory = Config.METRICS_DIR
+    if not directory:
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    path = _snapshot_path(directory, os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(REGISTRY.snapshot(), f)
+    os.replace(temporary, path)
+
+
+def clear_snapshots() -> None:
+    """Remove all snapshots (on server start, before workers fork)"""
+    directory = Config.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+
+    for name in os.listdir(directory):
+        if name.endswith(".json") or name.endswith(".tmp"):
+            os.remove(os.path.join(directory, name))
+
+
+def _ensure_flusher() -> None:
+    """Start this process's snapshot thread (again after a fork)"""
+    global _flusher_pid
+
+    if not Config.METRICS_DIR or _flusher_pid == os.getpid():
+        return
+
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+
+        def flush_forever() -> None:
+            while True:
+                time.sleep(Config.METRICS_FLUSH_SECONDS)
+                try:
+                    write_snapshot()
+                except OSError as e:
+                    log.warning("metrics snapshot failed", error=str(e))
+
+        threading.Thread(target=flush_forever, name="metrics", daemon=True).start()
+        atexit.register(write_snapshot)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots() -> List[Tuple[int, Dict]]:
+    """(pid, snapshot) of every other process in METRICS_DIR"""
+    directory = Config.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    snapshots = []
+    for name in os.listdir(directory):
+        stem, extension = os.path.splitext(name)
+        if extension != ".json" or not stem.isdigit() or int(stem) == os.getpid():
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                snapshots.append((int(stem), json.load(f)))
+        except (OSError, ValueError):
+            continue
+
+    return snapshots
+
+
+def collect() -> Dict[str, Dict[LabelValues, object]]:
+    """
+    Samples of every metric, combined over processes (see module doc).
+
+    Returns:
+        metric name -> label values -> value (histograms: bucket counts
+        and sum, see Histogram)
+    """
+    combined = {metric.name: metric.samples() for metric in REGISTRY.metrics()}
+    kinds = {metric.name: metric for metric in REGISTRY.metrics()}
+
+    for pid, snapshot in _read_snapshots():
+        alive = None
+        for name, samples in snapshot.items():
+            metric = kinds.get(name)
+            if metric is None:
+                continue
+
+            if metric.kind == "gauge":
+                if alive is None:
+                    alive = _process_alive(pid)
+                if not alive:
+                    continue
+
+            values = combined[name]
+            for key, value in samples:
+                key = tuple(key)
+                current = values.get(key)
+                if current is None:
+                    values[key] = value
+                elif metric.kind == "histogram":
+                    values[key] = [a + b for a, b in zip(current, value)]
+                elif metric.kind == "gauge" and metric.aggregate == "max":
+                    values[key] = max(current, value)
+                else:
+                    values[key] = current + value
+
+    return combined
+
+
+# ============================================
+# TEXT FORMAT
+# ============================================
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    combined = collect()
+    lines = []
+
+    for metric in REGISTRY.metrics():
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+        for key, value in sorted(combined[metric.name].items()):
+            if metric.kind != "histogram":
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+                continue
+
+            cumulative = 0
+            bounds = list(metric.buckets) + [float("inf")]
+            for bound, count in zip(bounds, value):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {_number(cumulative)}"
+                )
+            lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_number(value[-1])}")
+            lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {_number(cumulative)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# HONEYPOT METRICS
+# ============================================
+
+REQUESTS = Counter(
+    "honeypot_requests_total",
+    "HTTP requests by route and status code",
+    ["route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "honeypot_request_seconds",
+    "HTTP request latency by route",
+    ["route"]
+)
+STAGE_SECONDS = Histogram(
+    "honeypot_stage_seconds",
+    "Latency of each /honeypot turn stage",
+    ["stage"]
+)
+SESSIONS_CREATED = Counter(
+    "honeypot_sessions_created_total",
+    "Sessions created"
+)
+SESSIONS_EVICTED = Counter(
+    "honeypot_sessions_evicted_total",
+    "Sessions evicted from the store before completing",
+    ["reason"]
+)
+SESSIONS_LIVE = Gauge(
+    "honeypot_sessions_live",
+    "Sessions in the session store"
+)
+ADMISSIONS = Counter(
+    "honeypot_admissions_total",
+    "Turn admission decisions (full, degraded, shed) by priority (new, ongoing, closing)",
+    ["decision", "priority"]
+)
+TURNS_IN_FLIGHT = Gauge(
+    "honeypot_turns_in_flight",
+    "Turns admitted and not finished yet"
+)
+RATE_LIMITED = Counter(
+    "honeypot_rate_limited_total",
+    "Requests refused by API key name and reason (rate, concurrency: 429; batch: 413)",
+    ["key", "reason"]
+)
+MESSAGES_ADOPTED = Counter(
+    "honeypot_messages_adopted_total",
+    "Messages taken from a request's conversationHistory the session was missing"
+)
+SCAM_DETECTIONS = Counter(
+    "honeypot_scam_detections_total",
+    "Turns whose message was detected as a scam"
+)
+REPLIES = Counter(
+    "honeypot_replies_total",
+    "Agent replies by source (llm, cache, template)",
+    ["source"]
+)
+CALLBACKS = Counter(
+    "honeypot_callbacks_total",
+    "Final callback outcomes (sent, retried, dead, dropped)",
+    ["result"]
+)
+CALLBACK_QUEUE = Gauge(
+    "honeypot_callback_queue_depth",
+    "Callbacks waiting in the dispatcher queue"
+)
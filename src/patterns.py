@@ -3,7 +3,10 @@ Regex patterns for Indian financial data
 Owner: Member A
 """
 import re
-from typing import List
+from itertools import product
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from src.keywords import SCAM_LEXICON
 
 # UPI ID patterns
 UPI_PATTERN = r'[a-zA-Z0-9._-]+@[a-zA-Z]{3,}'
@@ -20,39 +23,138 @@ IFSC_PATTERN = r'\b[A-Z]{4}0[A-Z0-9]{6}\b'
 # URL pattern
 URL_PATTERN = r'https?://[^\s]+'
 
-# Scam keywords
-SCAM_KEYWORDS = [
-    "urgent", "verify", "blocked", "suspended", "immediately",
-    "prize", "winner", "lottery", "claim", "expire",
-    "otp", "cvv", "pin", "password", "account blocked"
+# Scam keywords (loaded from the lexicon file, see src/keywords.py)
+SCAM_KEYWORDS = SCAM_LEXICON.keywords
+
+
+# ============================================
+# SINGLE-PASS SCANNER
+# ============================================
+
+# Result keys, in the order the API reports them
+INTELLIGENCE_KEYS = [
+    "upiIds", "bankAccounts", "phoneNumbers", "ifscCodes", "phishingLinks"
 ]
 
+# Scanner versions of the patterns above, in priority order: when two
+# match at the same position, a URL wins over the UPI-looking text inside
+# it and a 10-digit mobile number is a phone number, not a bank account.
+# The UPI local part is possessive and IFSC spells out both cases, so the
+# message never has to be upper-cased and failed attempts stay cheap.
+# The last field is the anchor a message must contain for the pattern
+# to be worth trying at all (None = needs a digit).
+_SCANNER_PATTERNS = [
+    ("phishingLinks", URL_PATTERN, "://"),
+    ("upiIds", r'[a-zA-Z0-9._-]++@[a-zA-Z]{3,}', "@"),
+    ("ifscCodes", r'\b[A-Za-z]{4}0[A-Za-z0-9]{6}\b', None),
+    ("phoneNumbers", PHONE_PATTERN, None),
+    ("bankAccounts", BANK_ACCOUNT_PATTERN, None),
+]
+
+_DIGIT_REGEX = re.compile(r'\d')
+
+
+def _compile_scanner(
+    patterns: List[Tuple[str, str, Optional[str]]]
+) -> Optional[Pattern]:
+    """
+    Combines patterns into one regex that walks the text a word at a time.
+
+    Each match skips every word no pattern can start at (checked once per
+    word, not once per character) and then captures the next hit in its
+    named group. At the end of the text it matches empty, so every search
+    succeeds where it starts and the whole scan is a single linear pass.
+
+    A link can start mid-word ("visithttps://..."), so with the link
+    pattern a skipped word stops before an "http(s)://" inside it.
+    """
+    if not patterns:
+        return None
+
+    candidates = "|".join(f"(?:{pattern})" for _, pattern, _ in patterns)
+    named = "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in patterns)
+    if any(anchor == "://" for _, _, anchor in patterns):
+        word = r"(?:[a-gi-zA-Z0-9]|h(?!ttps?://))++"
+    else:
+        word = r"[a-zA-Z0-9]++"
+    skip = (
+        r"(?:[^a-zA-Z0-9._\-]++"
+        rf"|(?!{candidates})(?:{word}|[._\-]))*+"
+    )
+    return re.compile(f"{skip}(?:{named}|\\Z)")
+
+
+# One precompiled scanner per combination of anchors present in a message
+_SCANNERS = {
+    (has_link, has_at, has_digit): _compile_scanner([
+        entry for entry in _SCANNER_PATTERNS
+        if (entry[2] == "://" and has_link)
+        or (entry[2] == "@" and has_at)
+        or (entry[2] is None and has_digit)
+    ])
+    for has_link, has_at, has_digit in product((False, True), repeat=3)
+}
+
+
+def scan_intelligence(text: str) -> Dict[str, List[str]]:
+    """
+    Scans text once and classifies every match by pattern.
+
+    Args:
+        text: Text to scan
+
+    Returns:
+        Dict with one de-duplicated list per category
+        (upiIds, bankAccounts, phoneNumbers, ifscCodes, phishingLinks),
+        values kept in order of first appearance
+    """
+    found = {name: {} for name in INTELLIGENCE_KEYS}
+
+    if text:
+        scanner = _SCANNERS[(
+            "://" in text,
+            "@" in text,
+            _DIGIT_REGEX.search(text) is not None
+        )]
+
+        if scanner is not None:
+            for match in scanner.finditer(text):
+                name = match.lastgroup
+                if name is None:
+                    continue
+                value = match.group(name)
+                if name == "ifscCodes":
+                    value = value.upper()
+                found[name][value] = None
+
+    return {name: list(values) for name, values in found.items()}
+
 
 def find_upi_ids(text: str) -> List[str]:
     """Returns list of UPI IDs found in text"""
-    pass  # Member A implements
+    return scan_intelligence(text)["upiIds"]
 
 
 def find_bank_accounts(text: str) -> List[str]:
     """Returns list of bank account numbers found in text"""
-    pass  # Member A implements
+    return scan_intelligence(text)["bankAccounts"]
 
 
 def find_phone_numbers(text: str) -> List[str]:
     """Returns list of phone numbers found in text"""
-    pass  # Member A implements
+    return scan_intelligence(text)["phoneNumbers"]
 
 
 def find_ifsc_codes(text: str) -> List[str]:
     """Returns list of IFSC codes found in text"""
-    pass  # Member A implements
+    return scan_intelligence(text)["ifscCodes"]
 
 
 def find_urls(text: str) -> List[str]:
     """Returns list of URLs found in text"""
-    pass  # Member A implements
+    return scan_intelligence(text)["phishingLinks"]
 
 
 def find_scam_keywords(text: str) -> List[str]:
     """Returns list of scam keywords found in text"""
-    pass  # Member A implements
\ No newline at end of file
+    return list(dict.fromkeys(hit.keyword for hit in SCAM_LEXICON.find_all(text)))
@@ -0,0 +1,666 @@
+"""
+Request pipeline shared by the Flask (WSGI) and ASGI apps.
+
+A /honeypot turn is:
+1. Parse and validate the request body, and admit the turn (shed with
+   503, or answered without the LLM, under load; see src/admission.py)
+2. Get or create the session
+3. Detect scam and extract intelligence (fast, CPU only)
+   (after adopting any turns the session is missing from the request's
+   conversationHistory, see src/reconcile.py)
+4. Generate the agent reply (slow, waits on the LLM)
+5. Update the session and queue the final callback when complete
+
+Steps 1-3 and 5 are plain functions used by both apps; only step 4
+differs. handle_turn runs it synchronously for Flask, and
+handle_turn_async awaits the async LLM client so one ASGI process can
+keep many conversations in flight. The ASGI path runs steps 1-3 and 5
+in worker threads (asyncio.to_thread): they read and write the session
+store (on SQLite, possibly waiting on another worker's transaction) and
+scan text, and must not stall the event loop's other conversations.
+
+A /honeypot/batch request carries turns for many sessions. Detection
+and extraction run over the whole batch first, then each session's
+turns run in order while different sessions wait on the LLM
+concurrently (handle_batch / handle_batch_async).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.admission import Admission, Overloaded, admit_turn
+from src.agent import generate_agent_reply, generate_agent_reply_async
+from src.callback import build_callback_payload
+from src.config import Config
+from src.context import fold_history
+from src.detector import detect_scam, detect_scam_batch
+from src.dispatcher import enqueue_callback, get_dispatcher
+from src.extractor import extract_batch, extract_new_messages, merge_extractions
+from src.intel_index import INDEXED_TYPES, lookup_indicator
+from src.llm import llm_stats
+from src.log import counts, get_logger
+from src.metrics import (
+    CALLBACK_QUEUE,
+    MESSAGES_ADOPTED,
+    SCAM_DETECTIONS,
+    SESSIONS_LIVE,
+    STAGE_SECONDS
+)
+from src.reconcile import reconcile_history
+from src.reply_cache import reply_cache
+from src.session import (
+    SessionData,
+    get_session,
+    create_session,
+    update_session,
+    should_send_callback,
+    delete_session,
+    set_eviction_hook,
+    get_store_stats
+)
+
+log = get_logger(__name__)
+# (JSON body, HTTP status) returned by the handlers
+Response = Tuple[Dict, int]
+
+# detect_scam result: (is_scam, confidence, indicators)
+Detection = Tuple[bool, float, List[str]]
+
+# Worker threads running sessions of a batch (see get_batch_executor)
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_pid: Optional[int] = None
+_batch_executor_lock = threading.Lock()
+
+
+class RequestError(Exception):
+    """Invalid request; becomes a JSON error response"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+    def response(self) -> Response:
+        return {"status": "error", "message": self.message}, self.status
+
+
+@dataclass
+class Turn:
+    """One validated /honeypot request"""
+    session_id: str
+    message_text: str
+    message_sender: str
+    message_timestamp: int
+    conversation_history: List[Dict]
+    metadata: Dict
+    # Seconds the request waited for a handler (see admission.request_queue_wait)
+    queued: float = 0.0
+
+
+@dataclass
+class TurnAnalysis:
+    """Results of steps 2-3 for a turn"""
+    session: SessionData
+    is_scam: bool
+    confidence: float
+    indicators: List[str]
+    scanned: Dict[str, Dict[str, List[str]]]
+    summary: Dict
+    # Messages adopted from the request's conversationHistory, and the
+    # session's history with them (what this turn's reply sees)
+    adopted: List[Dict]
+    history: List[Dict]
+
+
+def on_session_evicted(session: SessionData, reason: str) -> None:
+    """
+    Send the final callback for a session evicted from the store
+    (idle too long, or pushed out by newer sessions) before it completed.
+    """
+    if session.message_count:
+        log.info("session evicted", session=session.session_id, reason=reason)
+        enqueue_callback(build_callback_payload(session))
+
+
+set_eviction_hook(on_session_evicted)
+
+# Gauges read at scrape time. A SQLite store is shared by all workers,
+# so every worker reports the same count
+SESSIONS_LIVE.set_function(
+    lambda: get_store_stats()["sessions"],
+    aggregate="max" if Config.SESSION_BACKEND == "sqlite" else "sum"
+)
+CALLBACK_QUEUE.set_function(lambda: get_dispatcher().stats()["queue_depth"])
+
+
+def parse_turn(data) -> Turn:
+    """
+    Validate a /honeypot request body.
+
+    Raises:
+        RequestError: If the body or a required field is missing
+    """
+    if not data:
+        raise RequestError("Missing request body")
+
+    if not isinstance(data, dict):
+        raise RequestError("Invalid request format: body must be a JSON object")
+
+    # Extract required fields
+    session_id = data.get('sessionId')
+    message_data = data.get('message') or {}
+    conversation_history = data.get('conversationHistory') or []
+    metadata = data.get('metadata') or {}
+
+    # Validate required fields
+    if not session_id:
+        raise RequestError("Missing sessionId")
+
+    if not isinstance(message_data, dict) or not message_data.get('text'):
+        raise RequestError("Missing message text")
+
+    if not isinstance(conversation_history, list):
+        raise RequestError("conversationHistory must be a list")
+
+    return Turn(
+        session_id=session_id,
+        message_text=message_data.get('text', ''),
+        message_sender=message_data.get('sender', 'scammer'),
+        message_timestamp=message_data.get('timestamp', 0),
+        conversation_history=conversation_history,
+        metadata=metadata
+    )
+
+
+def analyze_turn(
+    turn: Turn,
+    detection: Optional[Detection] = None,
+    known: Optional[Dict[str, Dict[str, List[str]]]] = None,
+    session: Optional[SessionData] = None
+) -> TurnAnalysis:
+    """
+    Get or create the session, adopt the turns it is missing from the
+    request, detect scam and extract intelligence.
+
+    Args:
+        turn: The validated request
+        detection: detect_scam result for the message, if already run
+            (batches detect all their messages up front)
+        known: Extraction results already scanned, by message key
+            (see extractor.extract_batch)
+        session: The session, if already loaded (see admit)
+    """
+
+    # Get or create session
+    with STAGE_SECONDS.time(stage="session"):
+        session = session or get_session(turn.session_id)
+
+        if not session:
+            session = create_session(turn.session_id)
+            log.debug("session created", session=turn.session_id)
+
+    # Adopt turns the session is missing (lost, evicted, or served by
+    # another worker) from the client's history; they are saved with
+    # this turn's messages
+    with STAGE_SECONDS.time(stage="reconcile"):
+        adopted = reconcile_history(session.conversation_history, turn.conversation_history)
+    history = session.conversation_history + adopted if adopted else session.conversation_history
+
+    if adopted:
+        MESSAGES_ADOPTED.inc(len(adopted))
+        log.info("session resumed from client history", session=turn.session_id, adopted=len(adopted))
+
+    # Detect scam
+    with STAGE_SECONDS.time(stage="detect"):
+        is_scam, confidence, indicators = detection or detect_scam(
+            turn.message_text,
+            history
+        )
+
+    if is_scam:
+        SCAM_DETECTIONS.inc()
+
+    # Extract intelligence. Only messages this session hasn't seen (the
+    # new message and the client history it adopted) are extracted, and
+    # never our own replies.
+    message = {"sender": turn.message_sender, "text": turn.message_text}
+    with STAGE_SECONDS.time(stage="extract"):
+        scanned = extract_new_messages(
+            adopted + [message],
+            session.message_extractions,
+            known
+        )
+
+    # Log how much was extracted (never the values themselves)
+    if log.enabled(logging.DEBUG):
+        log.sampled(
+            "turn analyzed",
+            session=turn.session_id,
+            messages=session.message_count + len(adopted),
+            isScam=is_scam,
+            confidence=round(confidence, 2),
+            extracted=counts(merge_extractions(scanned.values()))
+        )
+
+    # Fold turns that left the prompt window into the rolling summary
+    summary = fold_history(session.history_summary, history)
+
+    return TurnAnalysis(session, is_scam, confidence, indicators, scanned, summary, adopted, history)
+
+
+def previous_late_reply(session: SessionData) -> Optional[str]:
+    """LLM reply that came too late for the previous turn, if any"""
+    late = session.late_reply
+    if late and late.get("messageCount") == session.message_count - 2:
+        return late.get("text")
+    return None
+
+
+def late_reply_recorder(session: SessionData):
+    """
+    Hook that saves an LLM reply arriving after this turn was answered
+    from a template, so it can shape the session's next turn.
+    """
+    session_id, message_count = session.session_id, session.message_count
+
+    def record(reply: str) -> None:
+        log.debug("late llm reply saved", session=session_id)
+        update_session(
+            session_id,
+            late_reply={"messageCount": message_count, "text": reply}
+        )
+
+    return record
+
+
+def complete_turn(turn: Turn, analysis: TurnAnalysis, agent_reply: str) -> Response:
+    """Record the turn on the session and queue the callback if complete"""
+    # One atomic update per turn: both messages and the turn's results
+    with STAGE_SECONDS.time(stage="update"):
+        session = update_session(
+            turn.session_id,
+            new_messages=analysis.adopted + [
+                {
+                    "sender": turn.message_sender,
+                    "text": turn.message_text,
+                    "timestamp": turn.message_timestamp
+                },
+                {
+                    "sender": "agent",
+                    "text": agent_reply,
+                    "timestamp": int(time.time() * 1000)
+                }
+            ],
+            add_message_count=len(analysis.adopted) + 2,  # + scammer + agent
+            detected=analysis.is_scam,
+            min_confidence=analysis.confidence,
+            message_extractions=analysis.scanned,
+            indicators=analysis.indicators,
+            history_summary=analysis.summary
+        )
+
+    # Check if callback needed
+    if session and should_send_callback(session):
+        log.info("callback queued", session=turn.session_id, messages=session.message_count)
+
+        # Hand the callback to the background dispatcher; it is spooled
+        # to disk and retried there, so the session can go right away
+        with STAGE_SECONDS.time(stage="callback"):
+            queued = enqueue_callback(build_callback_payload(session))
+            if queued:
+                delete_session(turn.session_id)
+
+        if not queued:
+            log.warning("callback queue full, keeping session", session=turn.session_id)
+
+    return {"status": "success", "reply": agent_reply}, 200
+
+
+def handle_turn(data, queued: float = 0.0) -> Response:
+    """
+    Run a /honeypot turn, waiting on the LLM synchronously.
+
+    Args:
+        data: The request body
+        queued: Seconds the request waited for a handler thread
+    """
+    try:
+        turn = parse_turn(data)
+    except RequestError as e:
+        return e.response()
+
+    turn.queued = queued
+
+    return run_turn(turn)
+
+
+async def handle_turn_async(data, queued: float = 0.0) -> Response:
+    """Run a /honeypot turn, awaiting the LLM on the event loop"""
+    try:
+        turn = parse_turn(data)
+    except RequestError as e:
+        return e.response()
+
+    turn.queued = queued
+
+    return await run_turn_async(turn)
+
+
+def admit(turn: Turn) -> Tuple[Optional[SessionData], Admission]:
+    """
+    Admit a turn by its session's priority (see src/admission.py).
+
+    Returns:
+        (the session, None if new; the admission to release when done)
+
+    Raises:
+        Overloaded: If the turn is shed
+    """
+    with STAGE_SECONDS.time(stage="admit"):
+        session = get_session(turn.session_id)
+        return session, admit_turn(session, turn.queued)
+
+
+def run_turn(
+    turn: Turn,
+    detection: Optional[Detection] = None,
+    known: Optional[Dict[str, Dict[str, List[str]]]] = None
+) -> Response:
+    """Steps 2-5 for a validated turn (see analyze_turn for the arguments)"""
+    try:
+        session, admission = admit(turn)
+    except Overloaded as e:
+        return e.response()
+
+    try:
+        analysis = analyze_turn(turn, detection, known, session)
+        with STAGE_SECONDS.time(stage="reply"):
+            agent_reply = generate_agent_reply(
+                turn.message_text,
+                analysis.history,
+                analysis.indicators,
+                late_reply=previous_late_reply(analysis.session),
+                on_late_reply=late_reply_recorder(analysis.session),
+                summary=analysis.summary,
+                extracted_intelligence=analysis.session.extracted_intelligence,
+                use_llm=not admission.degraded
+            )
+        return complete_turn(turn, analysis, agent_reply)
+    finally:
+        admission.release()
+
+
+async def run_turn_async(
+    turn: Turn,
+    detection: Optional[Detection] = None,
+    known: Optional[Dict[str, Dict[str, List[str]]]] = None
+) -> Response:
+    """Async version of run_turn; store and CPU stages run in threads"""
+    try:
+        session, admission = await asyncio.to_thread(admit, turn)
+    except Overloaded as e:
+        return e.response()
+
+    try:
+        analysis = await asyncio.to_thread(analyze_turn, turn, detection, known, session)
+        with STAGE_SECONDS.time(stage="reply"):
+            agent_reply = await generate_agent_reply_async(
+                turn.message_text,
+                analysis.history,
+                analysis.indicators,
+                late_reply=previous_late_reply(analysis.session),
+                on_late_reply=late_reply_recorder(analysis.session),
+                summary=analysis.summary,
+                extracted_intelligence=analysis.session.extracted_intelligence,
+                use_llm=not admission.degraded
+            )
+        return await asyncio.to_thread(complete_turn, turn, analysis, agent_reply)
+    finally:
+        admission.release()
+
+
+# ============================================
+# BATCH
+# ============================================
+
+# A batch item: the validated turn, or why it was rejected
+BatchItem = Union[Turn, RequestError]
+
+
+@dataclass
+class BatchPlan:
+    """A validated /honeypot/batch request, ready to run"""
+    items: List[BatchItem]
+    # Item indexes per session, in request order
+    sessions: Dict[str, List[int]]
+    # detect_scam result per item (None for rejected items)
+    detections: List[Optional[Detection]]
+    # Extraction results for every message in the batch, by message key
+    known: Dict[str, Dict[str, List[str]]]
+
+
+def parse_batch(data) -> List[BatchItem]:
+    """
+    Validate a /honeypot/batch request body.
+
+    The body is a JSON array of /honeypot request bodies, or an object
+    with them under "items". Invalid items are rejected one by one.
+
+    Returns:
+        A Turn or RequestError per item, in order
+
+    Raises:
+        RequestError: If the body is not a list of items, or has more
+            than BATCH_MAX_ITEMS
+    """
+    if data is None:
+        raise RequestError("Missing request body")
+
+    if isinstance(data, dict):
+        data = data.get("items")
+
+    if not isinstance(data, list) or not data:
+        raise RequestError("Invalid request format: body must be a non-empty array of items")
+
+    if len(data) > Config.BATCH_MAX_ITEMS:
+        raise RequestError(f"Batch too large: at most {Config.BATCH_MAX_ITEMS} items", 413)
+
+    items: List[BatchItem] = []
+    for item in data:
+        try:
+            items.append(parse_turn(item))
+        except RequestError as e:
+            items.append(e)
+
+    return items
+
+
+def batch_size(data) -> int:
+    """Number of items in a /honeypot/batch body (0 if it has none)"""
+    if isinstance(data, dict):
+        data = data.get("items")
+    return len(data) if isinstance(data, list) else 0
+
+
+def plan_batch(items: List[BatchItem]) -> BatchPlan:
+    """Group a batch by session and detect/extract all its messages at once"""
+    turns = [item for item in items if isinstance(item, Turn)]
+
+    sessions: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        if isinstance(item, Turn):
+            sessions.setdefault(item.session_id, []).append(index)
+
+    # One pass over the batch; repeated texts are scanned once
+    detected = iter(detect_scam_batch([turn.message_text for turn in turns]))
+    detections = [next(detected) if isinstance(item, Turn) else None for item in items]
+
+    # Only the new messages: history a session hasn't seen is rare, and
+    # extracted per turn (see analyze_turn)
+    known = extract_batch(turn.message_text for turn in turns)
+
+    return BatchPlan(items, sessions, detections, known)
+
+
+def batch_result(item: BatchItem, response: Optional[Response] = None) -> Dict:
+    """Result entry for a batch item: its response body and session"""
+    if isinstance(item, RequestError):
+        return item.response()[0]
+
+    body, _ = response
+    return {"sessionId": item.session_id, **body}
+
+
+def batch_response(results: List[Dict]) -> Response:
+    """Body of a /honeypot/batch response"""
+    failed = sum(1 for result in results if result.get("status") != "success")
+    return {
+        "status": "success",
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
+    }, 200
+
+
+def _turn_failed(turn: Turn, error: Exception) -> Response:
+    """Response for a batch turn that raised; the rest of the batch goes on"""
+    log.error("batch turn failed", session=turn.session_id, error=str(error))
+    return {"status": "error", "message": "Internal server error"}, 500
+
+
+def get_batch_executor() -> ThreadPoolExecutor:
+    """Process-wide threads running batch sessions (recreated after a fork)"""
+    global _batch_executor, _batch_executor_pid
+
+    with _batch_executor_lock:
+        if _batch_executor is None or _batch_executor_pid != os.getpid():
+            _batch_executor = ThreadPoolExecutor(
+                max_workers=Config.BATCH_CONCURRENCY,
+                thread_name_prefix="batch"
+            )
+            _batch_executor_pid = os.getpid()
+
+    return _batch_executor
+
+
+def handle_batch(data) -> Response:
+    """
+    Run a /honeypot/batch request.
+
+    Each session's turns run in request order on one worker thread;
+    different sessions run concurrently (up to BATCH_CONCURRENCY).
+
+    Returns:
+        ({"status", "results", "succeeded", "failed"}, 200), with one
+        result per item in request order, or an error response if the
+        body itself is invalid
+    """
+    try:
+        plan = plan_batch(parse_batch(data))
+    except RequestError as e:
+        return e.response()
+
+    results = [batch_result(item) if isinstance(item, RequestError) else None for item in plan.items]
+
+    def run_session(indexes: List[int]) -> None:
+        for index in indexes:
+            turn = plan.items[index]
+            try:
+                response = run_turn(turn, plan.detections[index], plan.known)
+            except Exception as e:
+                response = _turn_failed(turn, e)
+            results[index] = batch_result(turn, response)
+
+    executor = get_batch_executor()
+    for future in [executor.submit(run_session, indexes) for indexes in plan.sessions.values()]:
+        future.result()
+
+    log.sampled("batch done", items=len(results), sessions=len(plan.sessions))
+    return batch_response(results)
+
+
+async def handle_batch_async(data) -> Response:
+    """Async version of handle_batch: one task per session"""
+    try:
+        plan = await asyncio.to_thread(plan_batch, parse_batch(data))
+    except RequestError as e:
+        return e.response()
+
+    results = [batch_result(item) if isinstance(item, RequestError) else None for item in plan.items]
+
+    async def run_session(indexes: List[int]) -> None:
+        for index in indexes:
+            turn = plan.items[index]
+            try:
+                response = await run_turn_async(turn, plan.detections[index], plan.known)
+            except Exception as e:
+                response = _turn_failed(turn, e)
+            results[index] = batch_result(turn, response)
+
+    await asyncio.gather(*(run_session(indexes) for indexes in plan.sessions.values()))
+
+    log.sampled("batch done", items=len(results), sessions=len(plan.sessions))
+    return batch_response(results)
+
+
+def session_info(session_id: str) -> Response:
+    """Body of the /session/<id> debug endpoint"""
+    session: Optional[SessionData] = get_session(session_id)
+
+    if not session:
+        return {"status": "error", "message": "Session not found"}, 404
+
+    return {
+        "status": "success",
+        "session": {
+            "sessionId": session.session_id,
+            "messageCount": session.message_count,
+            "scamDetected": session.scam_detected,
+            "confidence": session.confidence,
+            "indicators": list(session.indicators),
+            "extractedIntelligence": session.intelligence_lists(),
+            "conversationLength": len(session.conversation_history)
+        }
+    }, 200
+
+
+def intel_lookup(value: Optional[str], kind: Optional[str] = None) -> Response:
+    """
+    Body of the /intel/lookup endpoint: the sessions that reported an
+    indicator (see src/intel_index.py).
+    
+    Args:
+        value: Indicator to look up, in any form (it is canonicalized)
+        kind: Intelligence category to look in, or None for every one
+            the value could belong to
+    """
+    if not value:
+        return {"status": "error", "message": "Missing value"}, 400
+    if kind and kind not in INDEXED_TYPES:
+        return {
+            "status": "error",
+            "message": f"Unknown type, expected one of: {', '.join(INDEXED_TYPES)}"
+        }, 400
+
+    return {
+        "status": "success",
+        "value": value,
+        "matches": lookup_indicator(value, kind)
+    }, 200
+
+
+def service_stats() -> Response:
+    """Body of the /stats endpoint: sessions, reply cache, LLM, callbacks"""
+    return {
+        "status": "success",
+        "sessions": get_store_stats(),
+        "replyCache": reply_cache.stats(),
+        "llm": llm_stats(),
+        "callbacks": get_dispatcher().stats()
+    }, 200
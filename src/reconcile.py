@@ -0,0 +1,99 @@
+"""
+Reconcile a request's conversationHistory with the stored session.
+
+Every /honeypot request carries the whole conversation so far. When the
+server's copy is missing turns - the session was evicted, the process
+restarted, or earlier turns went to another worker with its own memory
+store - the missing messages are adopted from the client's history, so
+the conversation resumes with its context instead of starting over:
+
+- Client messages are matched to stored ones by content hash
+  (extractor.message_key), preferring a stored message with the same
+  timestamp. Agent replies carry the server's clock on our side and the
+  client's on theirs, so a hash alone is enough to match; repeated texts
+  match one stored copy each.
+- Unmatched client messages are adopted as they are: the LLM is never
+  re-run for them, and their intelligence is extracted once like any
+  other unseen message (see extractor.extract_new_messages).
+
+Adopted messages are appended in the client's order. The stored history
+is normally a prefix of the client's, since every turn reconciles first,
+so when the client's message at the stored length - 1 is the stored
+last message, only the client's messages after it are new and nothing
+is hashed.
+"""
+
+from typing import Dict, List, Tuple
+
+from src.extractor import message_key
+
+
+def _fingerprint(message: Dict) -> Tuple[str, object]:
+    """(content hash, timestamp) of a message"""
+    return message_key(message.get("text") or ""), message.get("timestamp")
+
+
+def reconcile_history(stored: List[Dict], client: List[Dict]) -> List[Dict]:
+    """
+    Client messages missing from the stored history.
+
+    Args:
+        stored: The session's conversation_history
+        client: The request's conversationHistory (not validated)
+
+    Returns:
+        Messages to append to the session, in the client's order, with
+        only their sender, text and timestamp
+    """
+    if not client:
+        return []
+
+    # Usual case: stored is a prefix of client; only the suffix is new
+    seen = len(stored)
+    if seen <= len(client) and (not seen or _same_message(stored[-1], client[seen - 1])):
+        return _adopt(client[seen:])
+
+    # Stored messages not matched yet: timestamps per content hash
+    unmatched: Dict[str, List[object]] = {}
+    for message in stored:
+        key, timestamp = _fingerprint(message)
+        unmatched.setdefault(key, []).append(timestamp)
+
+    missing = []
+    for message in client:
+        if not _valid(message):
+            continue
+
+        key, timestamp = _fingerprint(message)
+        timestamps = unmatched.get(key)
+        if timestamps:
+            # Same text: the copy with the same timestamp, else the oldest
+            timestamps.remove(timestamp if timestamp in timestamps else timestamps[0])
+            continue
+
+        missing.append(message)
+
+    return _adopt(missing)
+
+
+def _valid(message) -> bool:
+    """Whether a client message can be adopted"""
+    return isinstance(message, dict) and isinstance(message.get("text"), str)
+
+
+def _same_message(stored: Dict, message) -> bool:
+    """Whether a client message is the stored one (same text)"""
+    return _valid(message) and message["text"] == (stored.get("text") or "")
+
+
+def _adopt(messages: List) -> List[Dict]:
+    """Valid client messages, with only their sender, text and timestamp"""
+    return [
+        {
+            "sender": message.get("sender") or "scammer",
+            "text": message["text"],
+            "timestamp": message.get("timestamp") or 0
+        }
+        for message in messages
+        if _valid(message)
+    ]
@@ -0,0 +1,193 @@
+"""
+Reply cache for the LLM agent.
+
+Scam scripts are heavily templated: the same "your account is blocked,
+verify KYC now" opener arrives thousands of times a day. Replies are
+cached under the normalized message text, the sorted scam indicators and
+the conversation stage, so a repeated opener at the same point in a
+conversation reuses an earlier LLM reply instead of paying for a new one.
+
+Each key keeps a few reply variants. Lookups miss until a key has
+collected REPLY_CACHE_VARIANTS of them, and a hit picks one the
+conversation hasn't used yet, so the honeypot doesn't repeat itself word
+for word.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import Config
+from src.keywords import split_words
+
+# Conversation stages, by number of messages exchanged so far
+STAGES = [
+    (0, "opening"),
+    (2, "early"),
+    (6, "middle"),
+    (12, "late"),
+]
+
+
+def conversation_stage(message_count: int) -> str:
+    """Stage bucket for a conversation with message_count messages"""
+    stage = STAGES[0][1]
+    for threshold, name in STAGES:
+        if message_count >= threshold:
+            stage = name
+    return stage
+
+
+def reply_cache_key(
+    message: str,
+    scam_indicators: Optional[Iterable[str]],
+    message_count: int
+) -> Tuple[str, Tuple[str, ...], str]:
+    """
+    Cache key for a reply.
+
+    Args:
+        message: Latest scammer message
+        scam_indicators: Detected scam types
+        message_count: Messages exchanged before this one
+
+    Returns:
+        (normalized text, sorted indicators, stage); the text is
+        lower-cased with punctuation and repeated spaces removed
+    """
+    _, words = split_words(message)
+    return (
+        " ".join(words),
+        tuple(sorted(set(scam_indicators or ()))),
+        conversation_stage(message_count)
+    )
+
+
+class ReplyCache:
+    """
+    LRU cache of reply variants with a TTL, safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = Config.REPLY_CACHE_SIZE,
+        ttl: float = Config.REPLY_CACHE_TTL,
+        variants: int = Config.REPLY_CACHE_VARIANTS
+    ):
+        """
+        Args:
+            max_entries: Keys kept before the least recently used is
+                dropped (0 disables the cache)
+            ttl: Seconds a key lives after its first reply was stored
+            variants: Replies collected per key before it starts hitting
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = max(1, variants)
+
+        # key -> (created, [replies]), least recently used first
+        self._entries: "OrderedDict[tuple, Tuple[float, List[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        self.hits = 0
+        self.misses = 0
+        self._recent_hits = deque()
+
+    def get(self, key: tuple, avoid: Iterable[str] = ()) -> Optional[str]:
+        """
+        Look up a reply.
+
+        Args:
+            key: See reply_cache_key
+            avoid: Replies already used in this conversation
+
+        Returns:
+            A cached reply, or None if the key is missing, expired, still
+            collecting variants, or has only replies from `avoid`
+        """
+        if not self.max_entries:
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry and self.ttl and entry[0] < now - self.ttl:
+                del self._entries[key]
+                entry = None
+
+            reply = None
+            if entry and len(entry[1]) >= self.variants:
+                avoid = set(avoid)
+                fresh = [variant for variant in entry[1] if variant not in avoid]
+                if fresh:
+                    reply = self._random.choice(fresh)
+                    self._entries.move_to_end(key)
+
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._recent_hits.append(now)
+
+        return reply
+
+    def add(self, key: tuple, reply: str) -> None:
+        """Store a reply variant for key (ignored once the key is full)"""
+        if not self.max_entries or not reply:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or (self.ttl and entry[0] < now - self.ttl):
+                entry = (now, [])
+                self._entries[key] = entry
+
+            if reply not in entry[1] and len(entry[1]) < self.variants:
+                entry[1].append(reply)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._recent_hits.clear()
+
+    def stats(self) -> Dict:
+        """
+        Cache counters.
+
+        Returns:
+            Dict with entries, hits, misses, hitRate and
+            llmCallsSavedPerMinute (hits over the last 60 seconds)
+        """
+        now = time.time()
+
+        with self._lock:
+            while self._recent_hits and self._recent_hits[0] < now - 60:
+                self._recent_hits.popleft()
+
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "llmCallsSavedPerMinute": len(self._recent_hits)
+            }
+
+
+# Cache shared by every request in this process
+reply_cache = ReplyCache()
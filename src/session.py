@@ -1,17 +1,74 @@
 """
 Session management for multi-turn conversations.
 
-This module stores and manages conversation sessions in memory.
+This module stores and manages conversation sessions.
 Each session tracks:
 - Conversation history
 - Scam detection status
 - Extracted intelligence
+
+Sessions live in a SessionStore (see src/session_store.py) picked by
+SESSION_BACKEND: in worker memory by default, or in a SQLite database
+shared by every worker on the node.
+
+The store is bounded: sessions idle for longer than SESSION_IDLE_TTL are
+expired, and the least recently used sessions are evicted once the store
+holds more than SESSION_MAX_COUNT sessions or SESSION_MAX_BYTES of
+(approximate) data. Evicted sessions are passed to the eviction hook so
+their final callback is not lost.
+
+Intelligence merged by update_session is also recorded in the index
+across sessions (see src/intel_index.py), which outlives the sessions.
 """
 
-from typing import Dict, List, Optional
-from dataclasses import dataclass, field
+import threading
+import time
+from collections.abc import MutableSet
+from typing import Callable, Dict, Iterable, List, Optional
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 
+from src.config import Config
+from src.intel_index import canonical_intelligence, get_intel_index
+from src.log import get_logger
+from src.metrics import SESSIONS_CREATED, SESSIONS_EVICTED
+
+log = get_logger(__name__)
+
+
+class OrderedSet(MutableSet):
+    """
+    Set that remembers insertion order (backed by a dict).
+    
+    Membership tests and adds are O(1), and iteration yields values in
+    the order they were first added, so it can stand in for the
+    de-duplicated lists sessions used to keep. Convert with list() before
+    serializing.
+    """
+    
+    __slots__ = ("_items",)
+    
+    def __init__(self, values: Iterable = ()):
+        self._items = dict.fromkeys(values)
+    
+    def __contains__(self, value) -> bool:
+        return value in self._items
+    
+    def __iter__(self):
+        return iter(self._items)
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def add(self, value) -> None:
+        self._items[value] = None
+    
+    def discard(self, value) -> None:
+        self._items.pop(value, None)
+    
+    def __repr__(self) -> str:
+        return f"OrderedSet({list(self._items)!r})"
+
 
 @dataclass
 class SessionData:
@@ -22,19 +79,146 @@ class SessionData:
     scam_detected: bool = False
     confidence: float = 0.0
     conversation_history: List[Dict] = field(default_factory=list)
-    extracted_intelligence: Dict = field(default_factory=lambda: {
-        "upiIds": [],
-        "bankAccounts": [],
-        "phoneNumbers": [],
-        "ifscCodes": [],
-        "phishingLinks": [],
-        "suspiciousKeywords": []
+    # Intelligence categories and indicators are OrderedSets
+    extracted_intelligence: Dict[str, OrderedSet] = field(default_factory=lambda: {
+        "upiIds": OrderedSet(),
+        "bankAccounts": OrderedSet(),
+        "phoneNumbers": OrderedSet(),
+        "ifscCodes": OrderedSet(),
+        "phishingLinks": OrderedSet(),
+        "suspiciousKeywords": OrderedSet()
     })
-    indicators: List[str] = field(default_factory=list)
+    indicators: OrderedSet = field(default_factory=OrderedSet)
+    # Per-message extraction results, keyed by message content hash
+    message_extractions: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    # LLM reply that missed its turn's deadline:
+    # {"messageCount": count when the turn started, "text": reply}
+    late_reply: Optional[Dict] = None
+    # Rolling summary of turns older than the prompt window (see
+    # src/context.py): {"upTo": messages folded, "lines": [...]}
+    history_summary: Optional[Dict] = None
+    # Bookkeeping for eviction
+    last_active: float = field(default_factory=time.time)
+    approx_bytes: int = 0
+
+    def __post_init__(self):
+        # Accept plain lists (from callers, tests and stored sessions)
+        self.extracted_intelligence = {
+            key: values if isinstance(values, OrderedSet) else OrderedSet(values)
+            for key, values in self.extracted_intelligence.items()
+        }
+        if not isinstance(self.indicators, OrderedSet):
+            self.indicators = OrderedSet(self.indicators)
+    
+    def intelligence_lists(self) -> Dict[str, List[str]]:
+        """Extracted intelligence as plain lists, for JSON responses"""
+        return {
+            key: list(values)
+            for key, values in self.extracted_intelligence.items()
+        }
+    
+    def to_dict(self) -> Dict:
+        """JSON-serializable copy, for stores that persist sessions"""
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat()
+        data["extracted_intelligence"] = self.intelligence_lists()
+        data["indicators"] = list(self.indicators)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SessionData":
+        """Inverse of to_dict"""
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+# Process-wide store, created on first use
+_store = None
+_store_lock = threading.Lock()
+_eviction_hook: Optional[Callable[[SessionData, str], None]] = None
 
 
-# In-memory storage (simple dictionary)
-_sessions: Dict[str, SessionData] = {}
+def _approx_size(value) -> int:
+    """Rough size in bytes of a JSON-like value"""
+    if isinstance(value, str):
+        return 49 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(_approx_size(v) for v in value)
+    return 28
+
+
+def get_store():
+    """
+    Get the session store, creating the configured backend on first use.
+    
+    Returns:
+        The process-wide SessionStore
+    """
+    global _store
+    
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                # Imported here: session_store depends on SessionData
+                from src.session_store import create_store
+                _store = create_store(on_evict=_run_eviction_hook)
+    return _store
+
+
+def set_store(store):
+    """
+    Replace the session store (tests and benchmarks).
+    
+    Args:
+        store: SessionStore to use, or None to recreate the configured
+            backend on next use
+    
+    Returns:
+        The previous store
+    """
+    global _store
+    
+    with _store_lock:
+        previous, _store = _store, store
+        if store is not None:
+            store.on_evict = _run_eviction_hook
+    return previous
+
+
+def set_eviction_hook(
+    hook: Optional[Callable[[SessionData, str], None]]
+) -> Optional[Callable[[SessionData, str], None]]:
+    """
+    Register a function called for every evicted session.
+    
+    Args:
+        hook: Called as hook(session, reason) with reason one of
+            "ttl", "count" or "memory", outside the store lock
+    
+    Returns:
+        The previously registered hook
+    """
+    global _eviction_hook
+    previous, _eviction_hook = _eviction_hook, hook
+    return previous
+
+
+def _run_eviction_hook(evicted: List[tuple]) -> None:
+    """Hand evicted (session, reason) pairs to the hook"""
+    for _, reason in evicted:
+        SESSIONS_EVICTED.inc(reason=reason)
+
+    if not _eviction_hook:
+        return
+    
+    for session, reason in evicted:
+        try:
+            _eviction_hook(session, reason)
+        except Exception as e:
+            log.warning("eviction hook failed", session=session.session_id, error=str(e))
 
 
 def get_session(session_id: str) -> Optional[SessionData]:
@@ -47,7 +231,7 @@ def get_session(session_id: str) -> Optional[SessionData]:
     Returns:
         SessionData if found, None otherwise
     """
-    return _sessions.get(session_id, None)
+    return get_store().get(session_id)
 
 
 def create_session(session_id: str) -> SessionData:
@@ -60,12 +244,8 @@ def create_session(session_id: str) -> SessionData:
     Returns:
         Newly created SessionData
     """
-    session = SessionData(
-        session_id=session_id,
-        created_at=datetime.now()
-    )
-    _sessions[session_id] = session
-    return session
+    SESSIONS_CREATED.inc()
+    return get_store().create(session_id)
 
 
 def update_session(
@@ -75,12 +255,24 @@ def update_session(
     confidence: float = None,
     new_message: Dict = None,
     extracted_intelligence: Dict = None,
-    indicators: List[str] = None
+    indicators: List[str] = None,
+    message_extractions: Dict[str, Dict[str, List[str]]] = None,
+    new_messages: List[Dict] = None,
+    late_reply: Dict = None,
+    history_summary: Dict = None,
+    add_message_count: int = None,
+    detected: bool = None,
+    min_confidence: float = None
 ) -> Optional[SessionData]:
     """
     Update existing session.
     Only updates fields that are not None.
     
+    All changes are applied as one atomic update, so a turn's messages
+    and results land together even when several workers share the store.
+    The intelligence it brings is then recorded in the intelligence
+    index (see index_intelligence).
+    
     Args:
         session_id: Session to update
         message_count: New message count
@@ -89,14 +281,80 @@ def update_session(
         new_message: New message to add to history
         extracted_intelligence: New intelligence to merge
         indicators: New indicators to add
+        message_extractions: Per-message extraction results to record
+            (see record_message_extractions)
+        new_messages: Several messages to add to history, in order
+        late_reply: LLM reply that arrived after its turn was answered
+        history_summary: Rolling summary of older turns (replaces the
+            stored one if it covers more messages)
+        add_message_count: Messages to add to the stored count
+        detected: Mark the session as a scam if True (never unmarks it)
+        min_confidence: Raise the stored confidence to at least this
+    
+    Use the last three for a turn's results: they apply to the session
+    as stored when the update runs, so concurrent turns of a session
+    (possible with a shared store) don't overwrite each other's counts.
     
     Returns:
         Updated SessionData, or None if session not found
     """
-    session = _sessions.get(session_id)
+    messages = [new_message] if new_message is not None else []
+    messages.extend(new_messages or [])
+    reported: List[Dict] = []
+    
+    session = get_store().update(
+        session_id,
+        lambda session: _apply_update(
+            session,
+            message_count,
+            scam_detected,
+            confidence,
+            messages,
+            extracted_intelligence,
+            indicators,
+            message_extractions,
+            late_reply,
+            history_summary,
+            reported,
+            add_message_count,
+            detected,
+            min_confidence
+        )
+    )
+    
+    if session is not None and reported:
+        index_intelligence(session_id, reported)
+    
+    return session
+
+
+def _apply_update(
+    session: SessionData,
+    message_count: Optional[int],
+    scam_detected: Optional[bool],
+    confidence: Optional[float],
+    new_messages: List[Dict],
+    extracted_intelligence: Optional[Dict],
+    indicators: Optional[List[str]],
+    message_extractions: Optional[Dict[str, Dict[str, List[str]]]],
+    late_reply: Optional[Dict] = None,
+    history_summary: Optional[Dict] = None,
+    reported: Optional[List[Dict]] = None,
+    add_message_count: Optional[int] = None,
+    detected: Optional[bool] = None,
+    min_confidence: Optional[float] = None
+) -> int:
+    """
+    Apply update_session's changes to a session.
+    
+    Args:
+        reported: If given, collects the intelligence this update brings
+            (messages already recorded don't count again)
     
-    if not session:
-        return None
+    Returns:
+        Approximate number of bytes added to the session
+    """
+    added_bytes = 0
     
     # Update message count
     if message_count is not None:
@@ -110,26 +368,125 @@ def update_session(
     if confidence is not None:
         session.confidence = confidence
     
-    # Add new message to history
-    if new_message is not None:
+    # Apply a turn's results to the stored values
+    if add_message_count is not None:
+        session.message_count += add_message_count
+    if detected:
+        session.scam_detected = True
+    if min_confidence is not None:
+        session.confidence = max(session.confidence, min_confidence)
+    
+    # Add new messages to history
+    for new_message in new_messages:
         session.conversation_history.append(new_message)
+        added_bytes += _approx_size(new_message)
     
     # Merge extracted intelligence
     if extracted_intelligence is not None:
-        for key, values in extracted_intelligence.items():
-            if key in session.extracted_intelligence:
-                # Add new values without duplicates
-                for value in values:
-                    if value not in session.extracted_intelligence[key]:
-                        session.extracted_intelligence[key].append(value)
+        added_bytes += merge_intelligence(session, extracted_intelligence)
+        if reported is not None:
+            reported.append(extracted_intelligence)
+    
+    # Record per-message extraction results
+    if message_extractions is not None:
+        if reported is not None:
+            reported.extend(
+                extracted for key, extracted in message_extractions.items()
+                if key not in session.message_extractions
+            )
+        added_bytes += record_message_extractions(session, message_extractions)
     
     # Add new indicators
     if indicators is not None:
         for indicator in indicators:
             if indicator not in session.indicators:
-                session.indicators.append(indicator)
+                session.indicators.add(indicator)
+                added_bytes += _approx_size(indicator)
     
-    return session
+    # Keep the latest late reply
+    if late_reply is not None:
+        added_bytes += _approx_size(late_reply) - _approx_size(session.late_reply or {})
+        session.late_reply = late_reply
+    
+    # Keep the most advanced summary (turns can race on shared stores)
+    if history_summary is not None:
+        stored = session.history_summary or {"upTo": 0, "lines": []}
+        if history_summary["upTo"] > stored["upTo"]:
+            added_bytes += _approx_size(history_summary) - _approx_size(stored)
+            session.history_summary = history_summary
+    
+    return added_bytes
+
+
+def merge_intelligence(session: SessionData, extracted_intelligence: Dict) -> int:
+    """
+    Merge extracted intelligence into the session, skipping duplicates.
+    
+    Args:
+        session: Session to update
+        extracted_intelligence: Dict of category -> list of values
+    
+    Returns:
+        Approximate number of bytes added to the session
+    """
+    added_bytes = 0
+    
+    for key, values in extracted_intelligence.items():
+        if key in session.extracted_intelligence:
+            # Add new values without duplicates
+            merged = session.extracted_intelligence[key]
+            for value in values:
+                if value not in merged:
+                    merged.add(value)
+                    added_bytes += _approx_size(value)
+    
+    return added_bytes
+
+
+def record_message_extractions(
+    session: SessionData,
+    message_extractions: Dict[str, Dict[str, List[str]]]
+) -> int:
+    """
+    Store per-message extraction results on the session and merge them
+    into its running intelligence aggregate.
+    
+    Messages already recorded are skipped, so their intelligence is
+    never merged twice.
+    
+    Args:
+        session: Session to update
+        message_extractions: Message content hash -> extraction result
+    
+    Returns:
+        Approximate number of bytes added to the session
+    """
+    added_bytes = 0
+    
+    for key, extracted in message_extractions.items():
+        if key in session.message_extractions:
+            continue
+        session.message_extractions[key] = extracted
+        added_bytes += _approx_size(key) + _approx_size(extracted)
+        added_bytes += merge_intelligence(session, extracted)
+    
+    return added_bytes
+
+
+def index_intelligence(session_id: str, reported: List[Dict]) -> None:
+    """
+    Record a session's newly reported intelligence in the index across
+    sessions.
+    
+    Args:
+        session_id: Reporting session
+        reported: Extraction results (category -> list of values)
+    """
+    pairs = list(dict.fromkeys(
+        pair for extracted in reported for pair in canonical_intelligence(extracted)
+    ))
+    if pairs:
+        get_intel_index().record(session_id, pairs, int(time.time() * 1000))
 
 
 def should_send_callback(session: SessionData) -> bool:
@@ -151,19 +508,33 @@ def should_send_callback(session: SessionData) -> bool:
         return True
     
     # Count total extracted items
+    if _intelligence_count(session) >= 2:
+        return True
+    
+    return False
+
+
+def near_callback(session: SessionData) -> bool:
+    """
+    Check if the session's next turn could complete it.
+    
+    True if the turn's two messages reach the message limit, or one more
+    extracted item would reach the intelligence limit (see
+    should_send_callback). Admission control sheds these turns last.
+    """
+    return session.message_count + 2 >= 10 or _intelligence_count(session) >= 1
+
+
+def _intelligence_count(session: SessionData) -> int:
+    """Total extracted items, not counting suspicious keywords"""
     intel = session.extracted_intelligence
-    total_items = (
+    return (
         len(intel.get("upiIds", [])) +
         len(intel.get("bankAccounts", [])) +
         len(intel.get("phoneNumbers", [])) +
         len(intel.get("ifscCodes", [])) +
         len(intel.get("phishingLinks", []))
     )
-    
-    if total_items >= 2:
-        return True
-    
-    return False
 
 
 def delete_session(session_id: str) -> bool:
@@ -176,10 +547,7 @@ def delete_session(session_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    if session_id in _sessions:
-        del _sessions[session_id]
-        return True
-    return False
+    return get_store().delete(session_id)
 
 
 def get_all_sessions() -> Dict[str, SessionData]:
@@ -189,11 +557,22 @@ def get_all_sessions() -> Dict[str, SessionData]:
     Returns:
         Dictionary of all sessions
     """
-    return _sessions.copy()
+    return get_store().all()
+
+
+def get_store_stats() -> Dict:
+    """
+    Get session store counters.
+    
+    Returns:
+        Dict with backend name, resident session count, approximate
+        resident bytes and eviction counts by reason
+    """
+    return get_store().stats()
 
 
 def clear_all_sessions() -> None:
     """
     Clear all sessions (for testing).
     """
-    _sessions.clear()
\ No newline at end of file
+    get_store().clear()
@@ -0,0 +1,468 @@
+"""
+Session storage backends.
+
+The functions in src/session.py delegate to one SessionStore per process,
+chosen by SESSION_BACKEND:
+
+- "memory": sessions live in a dict inside the worker process (default).
+  Fastest, but each gunicorn worker sees only its own sessions.
+- "sqlite": sessions live in a SQLite database in WAL mode that every
+  worker on the node opens, so any worker can serve any turn.
+
+Both backends apply the same idle TTL, LRU count cap and memory cap, and
+hand evicted sessions to the on_evict callback.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.config import Config
+from src.session import SessionData
+
+# (session, reason) pairs, reason one of "ttl", "count", "memory"
+Evicted = List[Tuple[SessionData, str]]
+
+# Rough size of an empty in-memory session (object, dicts and lists)
+BASE_SESSION_BYTES = 1500
+
+
+class SessionStore(ABC):
+    """
+    Interface behind get_session, create_session, update_session and
+    delete_session.
+
+    update() is the only way to change a stored session: the store runs
+    the mutation atomically with respect to other updates of the same
+    session, in this process or (for shared backends) in other workers.
+    """
+
+    def __init__(self, on_evict: Callable[[Evicted], None] = None):
+        """
+        Args:
+            on_evict: Called with evicted (session, reason) pairs after
+                the store has released its locks
+        """
+        self.on_evict = on_evict
+        self.evictions = {"ttl": 0, "count": 0, "memory": 0}
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionData]:
+        """Return the session, or None if missing or expired"""
+
+    @abstractmethod
+    def create(self, session_id: str) -> SessionData:
+        """Create (or replace) a session"""
+
+    @abstractmethod
+    def update(
+        self,
+        session_id: str,
+        mutate: Callable[[SessionData], int]
+    ) -> Optional[SessionData]:
+        """
+        Atomically apply mutate(session) to a stored session.
+
+        Args:
+            session_id: Session to update
+            mutate: Changes the session in place and returns the
+                approximate number of bytes it added
+
+        Returns:
+            The updated session, or None if not found
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session; True if it existed"""
+
+    @abstractmethod
+    def all(self) -> Dict[str, SessionData]:
+        """Snapshot of all sessions"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete all sessions and reset counters"""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Resident session count, approximate bytes and evictions"""
+
+    def _notify(self, evicted: Evicted) -> None:
+        """Count evictions and pass them to on_evict"""
+        for _, reason in evicted:
+            self.evictions[reason] += 1
+        if evicted and self.on_evict:
+            self.on_evict(evicted)
+
+
+# ============================================
+# IN-MEMORY BACKEND
+# ============================================
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions in a per-process dict, least recently used first.
+
+    Sessions returned are the stored objects themselves.
+    """
+
+    def __init__(self, on_evict: Callable[[Evicted], None] = None):
+        super().__init__(on_evict)
+        self._sessions: "OrderedDict[str, SessionData]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._resident_bytes = 0
+
+    def get(self, session_id: str) -> Optional[SessionData]:
+        now = time.time()
+
+        with self._lock:
+            evicted = self._evict(now)
+            session = self._sessions.get(session_id)
+            if session:
+                session.last_active = now
+                self._sessions.move_to_end(session_id)
+
+        self._notify(evicted)
+        return session
+
+    def create(self, session_id: str) -> SessionData:
+        session = SessionData(
+            session_id=session_id,
+            created_at=datetime.now(),
+            approx_bytes=BASE_SESSION_BYTES
+        )
+
+        with self._lock:
+            replaced = self._sessions.pop(session_id, None)
+            if replaced:
+                self._resident_bytes -= replaced.approx_bytes
+            self._sessions[session_id] = session
+            self._resident_bytes += session.approx_bytes
+            evicted = self._evict(session.last_active)
+
+        self._notify(evicted)
+        return session
+
+    def update(
+        self,
+        session_id: str,
+        mutate: Callable[[SessionData], int]
+    ) -> Optional[SessionData]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return None
+
+            added_bytes = mutate(session)
+            session.approx_bytes += added_bytes
+            self._resident_bytes += added_bytes
+            session.last_active = time.time()
+            self._sessions.move_to_end(session_id)
+            evicted = self._evict(session.last_active)
+
+        self._notify(evicted)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session:
+                self._resident_bytes -= session.approx_bytes
+                return True
+        return False
+
+    def all(self) -> Dict[str, SessionData]:
+        with self._lock:
+            return dict(self._sessions)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._resident_bytes = 0
+            for reason in self.evictions:
+                self.evictions[reason] = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "residentBytes": self._resident_bytes,
+                "evictions": dict(self.evictions)
+            }
+
+    def _evict(self, now: float) -> Evicted:
+        """Remove idle and over-limit sessions (caller holds _lock)"""
+        evicted = []
+        ttl = Config.SESSION_IDLE_TTL
+
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+
+            if ttl and oldest.last_active < now - ttl:
+                reason = "ttl"
+            elif Config.SESSION_MAX_COUNT and len(self._sessions) > Config.SESSION_MAX_COUNT:
+                reason = "count"
+            elif Config.SESSION_MAX_BYTES and self._resident_bytes > Config.SESSION_MAX_BYTES:
+                reason = "memory"
+            else:
+                break
+
+            del self._sessions[session_id]
+            self._resident_bytes -= oldest.approx_bytes
+            evicted.append((oldest, reason))
+
+        return evicted
+
+
+# ============================================
+# SQLITE BACKEND
+# ============================================
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite database (WAL mode) shared by all workers on a
+    node.
+
+    Each session is one row holding its JSON document. Updates run in a
+    BEGIN IMMEDIATE transaction, so concurrent read-modify-write cycles
+    on a session - from threads or from other processes - never lose
+    each other's changes. Reads take no write lock: last_active is set
+    by create() and update() (every turn updates its session), so LRU
+    order here is by last update. Sessions returned are copies.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            approx_bytes INTEGER NOT NULL,
+            last_active REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_last_active
+            ON sessions (last_active);
+    """
+
+    def __init__(
+        self,
+        path: str = Config.SESSION_DB_PATH,
+        on_evict: Callable[[Evicted], None] = None
+    ):
+        """
+        Args:
+            path: Database file; created (with its directory) if missing
+            on_evict: See SessionStore
+        """
+        super().__init__(on_evict)
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self._SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, reopened after a fork"""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path,
+                timeout=Config.SESSION_DB_BUSY_TIMEOUT,
+                isolation_level=None  # explicit BEGIN/COMMIT below
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], object]):
+        """Run work(connection) in a write transaction"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(connection)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    @staticmethod
+    def _write(connection: sqlite3.Connection, session: SessionData) -> None:
+        """Insert or replace one session row"""
+        data = json.dumps(session.to_dict())
+        session.approx_bytes = len(data)
+        connection.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+            (session.session_id, data, session.approx_bytes, session.last_active)
+        )
+
+    @staticmethod
+    def _read(connection: sqlite3.Connection, session_id: str) -> Optional[SessionData]:
+        """Load one session row"""
+        row = connection.execute(
+            "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return SessionData.from_dict(json.loads(row[0])) if row else None
+
+    def get(self, session_id: str) -> Optional[SessionData]:
+        # Step 1: Plain read, no write lock
+        session = self._read(self._connection(), session_id)
+        ttl = Config.SESSION_IDLE_TTL
+        if session is None or not ttl or session.last_active >= time.time() - ttl:
+            return session
+
+        # Step 2: Expired - delete it, unless another worker updated it
+        # meanwhile (rare, so the write lock is only taken here)
+        def work(connection):
+            expired = self._read(connection, session_id)
+            if expired is None or expired.last_active >= time.time() - ttl:
+                return expired, []
+            connection.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+            return None, [(expired, "ttl")]
+
+        session, evicted = self._transaction(work)
+        self._notify(evicted)
+        return session
+
+    def create(self, session_id: str) -> SessionData:
+        session = SessionData(session_id=session_id, created_at=datetime.now())
+
+        def work(connection):
+            self._write(connection, session)
+            return self._evict(connection, session.last_active)
+
+        evicted = self._transaction(work)
+        self._notify(evicted)
+        return session
+
+    def update(
+        self,
+        session_id: str,
+        mutate: Callable[[SessionData], int]
+    ) -> Optional[SessionData]:
+        def work(connection):
+            session = self._read(connection, session_id)
+            if session is None:
+                return None
+            mutate(session)
+            session.last_active = time.time()
+            self._write(connection, session)
+            return session, self._evict(connection, session.last_active)
+
+        result = self._transaction(work)
+        if result is None:
+            return None
+
+        session, evicted = result
+        self._notify(evicted)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        cursor = self._connection().execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return cursor.rowcount > 0
+
+    def all(self) -> Dict[str, SessionData]:
+        rows = self._connection().execute("SELECT data FROM sessions").fetchall()
+        sessions = [SessionData.from_dict(json.loads(row[0])) for row in rows]
+        return {session.session_id: session for session in sessions}
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM sessions")
+        for reason in self.evictions:
+            self.evictions[reason] = 0
+
+    def stats(self) -> Dict:
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(approx_bytes), 0) FROM sessions"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": count,
+            "residentBytes": total,
+            "evictions": dict(self.evictions)
+        }
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> Evicted:
+        """Remove idle and over-limit sessions, oldest first"""
+        evicted = []
+
+        def remove(rows, reason):
+            for session_id, data in rows:
+                connection.execute(
+                    "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+                )
+                evicted.append((SessionData.from_dict(json.loads(data)), reason))
+
+        # Step 1: Idle sessions
+        if Config.SESSION_IDLE_TTL:
+            remove(connection.execute(
+                "SELECT session_id, data FROM sessions WHERE last_active < ?",
+                (now - Config.SESSION_IDLE_TTL,)
+            ).fetchall(), "ttl")
+
+        count, total = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(approx_bytes), 0) FROM sessions"
+        ).fetchone()
+
+        # Step 2: Least recently used sessions over the count cap
+        excess = count - Config.SESSION_MAX_COUNT if Config.SESSION_MAX_COUNT else 0
+        if excess > 0:
+            rows = connection.execute(
+                "SELECT session_id, data, approx_bytes FROM sessions "
+                "ORDER BY last_active LIMIT ?", (excess,)
+            ).fetchall()
+            total -= sum(row[2] for row in rows)
+            remove([row[:2] for row in rows], "count")
+
+        # Step 3: Least recently used sessions over the memory cap
+        if Config.SESSION_MAX_BYTES and total > Config.SESSION_MAX_BYTES:
+            oldest = []
+            for session_id, data, size in connection.execute(
+                "SELECT session_id, data, approx_bytes FROM sessions ORDER BY last_active"
+            ):
+                if total <= Config.SESSION_MAX_BYTES:
+                    break
+                oldest.append((session_id, data))
+                total -= size
+            remove(oldest, "memory")
+
+        return evicted
+
+
+def create_store(
+    backend: str = None,
+    on_evict: Callable[[Evicted], None] = None
+) -> SessionStore:
+    """
+    Build the configured session store.
+
+    Args:
+        backend: "memory" or "sqlite" (defaults to SESSION_BACKEND)
+        on_evict: See SessionStore
+
+    Raises:
+        ValueError: For an unknown backend name
+    """
+    backend = (backend or Config.SESSION_BACKEND).lower()
+
+    if backend == "memory":
+        return MemorySessionStore(on_evict=on_evict)
+    if backend == "sqlite":
+        return SQLiteSessionStore(Config.SESSION_DB_PATH, on_evict=on_evict)
+
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,100 @@
+"""
+Template replies for when the LLM can't answer in time.
+
+Replies stay in the agent's persona (a trusting, confused elderly
+person) and follow the conversation: worried questions at the opening,
+asking what to do early on, fumbling with payment details later. When
+the scammer's latest tactic has templates of its own (asking for an
+OTP, sending a link, demanding a payment) those come first. Replies
+already used in the conversation are skipped while others remain.
+"""
+
+from typing import Dict, List
+
+from src.reply_cache import conversation_stage
+
+# Persona replies by conversation stage (see reply_cache.STAGES)
+STAGE_TEMPLATES: Dict[str, List[str]] = {
+    "opening": [
+        "Oh dear, this is very worrying! What happened to my account?",
+        "Who is this? Is something wrong with my bank account?",
+        "I just saw your message. Is my money safe?",
+    ],
+    "early": [
+        "I don't understand these technical things. Can you explain more simply?",
+        "My grandson usually helps me with this. What should I do?",
+        "This sounds urgent! How can I fix this problem?",
+        "Should I go to the bank? Or can I do it on my phone?",
+    ],
+    "middle": [
+        "I'm confused. Where should I send the money?",
+        "Let me write this down. What was that number again?",
+        "I'm not good with computers. Can you guide me step by step?",
+        "Thank you for helping me. What information do you need?",
+    ],
+    "late": [
+        "The app is showing some error. Do you have another account number I can try?",
+        "Oh my! I hope I don't lose my savings. Can you give me your number so I can call you?",
+        "My glasses are not here. Can you send the details once more, slowly?",
+        "It is asking for the IFSC code also. What should I type there?",
+    ],
+}
+
+# Replies for specific tactics (scam indicator categories)
+INDICATOR_TEMPLATES: Dict[str, List[str]] = {
+    "credential_request": [
+        "The OTP message has not come yet. Should I wait or will you send again?",
+        "I can't find where the PIN is written. Can you hold on a little?",
+    ],
+    "payment_request": [
+        "Which UPI ID should I send it to? Please spell it for me.",
+        "Is it okay if I pay by bank transfer? Tell me the account number.",
+    ],
+    "phishing_link": [
+        "The link is not opening on my phone. Is there another link?",
+        "I clicked it but nothing happened. Can you send it again?",
+    ],
+}
+
+
+def used_replies(conversation_history: List[Dict]) -> List[str]:
+    """Our own replies so far in a conversation"""
+    return [
+        message.get("text")
+        for message in conversation_history or []
+        if isinstance(message, dict) and message.get("sender") in ("agent", "user")
+    ]
+
+
+def template_reply(
+    conversation_history: List[Dict],
+    scam_indicators: List[str] = None
+) -> str:
+    """
+    Picks a persona-consistent template reply.
+
+    Args:
+        conversation_history: Messages exchanged so far
+        scam_indicators: Detected scam types for the latest message
+
+    Returns:
+        Template reply for the conversation's stage and the scammer's
+        tactic, preferring one the conversation hasn't used yet
+    """
+    history = conversation_history or []
+    used = set(used_replies(history))
+
+    tactic = []
+    for indicator in scam_indicators or []:
+        tactic.extend(INDICATOR_TEMPLATES.get(indicator, []))
+    stage = STAGE_TEMPLATES[conversation_stage(len(history))]
+
+    # Rotate with the conversation so retries of a turn are stable
+    turn = len(history) // 2
+
+    for candidates in (tactic, stage):
+        fresh = [reply for reply in candidates if reply not in used]
+        if fresh:
+            return fresh[turn % len(fresh)]
+
+    return stage[turn % len(stage)]
@@ -0,0 +1,69 @@
+"""
+Warm-up for server processes.
+
+Work the first request would otherwise pay for, in two parts:
+
+- warm_up(): state that is the same in every process and only read once
+  built: the groq SDK and httpx imports, the scam model (memory-mapped),
+  and one sample message through detection and extraction so patterns,
+  the keyword automaton and the regex cache are ready. Run it in the
+  gunicorn master with preload_app (see gunicorn.conf.py) and forked
+  workers share these pages copy-on-write instead of each building its
+  own.
+- open_connections(): per-process resources that must not cross a fork:
+  the pooled LLM and callback HTTP clients, the callback dispatcher's
+  threads, the session store and the intelligence index. Run it in each
+  worker after the fork.
+
+Both are optional: everything here is also created on first use.
+"""
+
+import time
+
+from src.callback import get_http_session
+from src.config import Config
+from src.detector import detect_scam, get_scam_model
+from src.dispatcher import get_dispatcher
+from src.extractor import extract_intelligence
+from src.intel_index import get_intel_index
+from src.jsonio import dumps
+from src.llm import get_client, load_sdk
+from src.log import get_logger
+from src.session import get_store
+
+log = get_logger(__name__)
+
+# Exercises every pattern and the keyword automaton
+SAMPLE_MESSAGE = (
+    "URGENT: Your SBI account will be blocked today. Verify KYC at "
+    "http://sbi-kyc.example.com or pay Rs 10 to verify@paytm. Account "
+    "123456789012, IFSC SBIN0001234, call 9876543210."
+)
+
+
+def warm_up() -> None:
+    """Load shared, read-only state (before forking workers)"""
+    started = time.perf_counter()
+
+    # Step 1: Import the LLM SDK
+    load_sdk()
+
+    # Step 2: Load the scam model, if configured
+    model = get_scam_model()
+
+    # Step 3: One message through detection, extraction and encoding
+    detect_scam(SAMPLE_MESSAGE)
+    dumps(extract_intelligence(SAMPLE_MESSAGE))
+
+    log.info("warmed up", ms=round((time.perf_counter() - started) * 1000, 1), model=model is not None)
+
+
+def open_connections() -> None:
+    """Create this process's clients, threads, store and index (after a fork)"""
+    # Without a key the agent never calls the LLM (see src/agent.py)
+    if Config.GROQ_API_KEY:
+        get_client()
+    get_http_session()
+    get_dispatcher()
+    get_store()
+    get_intel_index()
@@ -0,0 +1,346 @@
+"""
+API scenario shared by the Flask and ASGI app tests.
+
+run_api_scenario drives the honeypot API through any client with
+Flask test client semantics: get(path, headers=...) and
+post(path, json=..., headers=...) returning a response with
+status_code and data.
+"""
+
+import json
+
+from src.config import Config
+from src.intel_index import get_intel_index
+from src.session import clear_all_sessions, get_session
+from src.dispatcher import get_dispatcher
+
+
+def run_api_scenario(client):
+    """Test the API endpoints through the given client"""
+    
+    # Clear sessions (and the intelligence they indexed) before testing
+    clear_all_sessions()
+    get_intel_index().clear()
+    
+    # ========================================
+    # Test 1: Health Check
+    # ========================================
+    print("Testing health endpoint...")
+    response = client.get('/health')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'healthy'
+    print("✅ Health check passed")
+    
+    # ========================================
+    # Test 2: Honeypot without API key
+    # ========================================
+    print("\nTesting honeypot without API key...")
+    response = client.post('/honeypot', json={
+        "sessionId": "test-1",
+        "message": {"sender": "scammer", "text": "Hello"}
+    })
+    assert response.status_code == 401
+    print("✅ Unauthorized test passed")
+    
+    # ========================================
+    # Test 3: Honeypot with valid API key
+    # ========================================
+    print("\nTesting honeypot with valid request...")
+    response = client.post(
+        '/honeypot',
+        json={
+            "sessionId": "test-session-123",
+            "message": {
+                "sender": "scammer",
+                "text": "Your bank account is blocked! Verify immediately.",
+                "timestamp": 1234567890
+            },
+            "conversationHistory": [],
+            "metadata": {
+                "channel": "SMS",
+                "language": "English",
+                "locale": "IN"
+            }
+        },
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'success'
+    assert 'reply' in data
+    print(f"✅ Honeypot response: {data['reply'][:50]}...")
+    
+    # ========================================
+    # Test 4: Check session was created
+    # ========================================
+    print("\nTesting session endpoint...")
+    response = client.get(
+        '/session/test-session-123',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['session']['messageCount'] == 2  # scammer + agent
+    assert data['session']['scamDetected'] == True
+    print(f"✅ Session info: messages={data['session']['messageCount']}, scam={data['session']['scamDetected']}")
+    
+    # ========================================
+    # Test 5: Multiple messages in session
+    # ========================================
+    print("\nTesting multiple messages...")
+    response = client.post(
+        '/honeypot',
+        json={
+            "sessionId": "test-session-123",
+            "message": {
+                "sender": "scammer",
+                "text": "Send money to this UPI: fraud@paytm",
+                "timestamp": 1234567891
+            },
+            "conversationHistory": []
+        },
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    print(f"✅ Second message reply: {data['reply'][:50]}...")
+    
+    # Check session updated
+    response = client.get(
+        '/session/test-session-123',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    data = json.loads(response.data)
+    assert data['session']['messageCount'] == 4
+    assert 'fraud@paytm' in data['session']['extractedIntelligence']['upiIds']
+    print(f"✅ UPI extracted: {data['session']['extractedIntelligence']['upiIds']}")
+    
+    # ========================================
+    # Test 6: Client history - only unseen turns are extracted
+    # ========================================
+    print("\nTesting client-supplied history...")
+    response = client.post(
+        '/honeypot',
+        json={
+            "sessionId": "test-history-456",
+            "message": {
+                "sender": "scammer",
+                "text": "Hurry, time is running out",
+                "timestamp": 1234567892
+            },
+            "conversationHistory": [
+                {"sender": "scammer", "text": "Call our officer on 9876543210"},
+                {"sender": "user", "text": "Who is this?"}
+            ]
+        },
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    reply = json.loads(response.data)['reply']
+    response = client.get(
+        '/session/test-history-456',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    data = json.loads(response.data)
+    assert data['session']['extractedIntelligence']['phoneNumbers'] == ['9876543210']
+    print(f"✅ Phone from history: {data['session']['extractedIntelligence']['phoneNumbers']}")
+    
+    # The session had none of the history: it was adopted
+    assert data['session']['messageCount'] == 4
+    assert data['session']['conversationLength'] == 4
+    
+    # Next turn repeats the history (our reply with the client's
+    # timestamp); nothing is adopted twice
+    response = client.post(
+        '/honeypot',
+        json={
+            "sessionId": "test-history-456",
+            "message": {"sender": "scammer", "text": "Reply fast", "timestamp": 1234567894},
+            "conversationHistory": [
+                {"sender": "scammer", "text": "Call our officer on 9876543210"},
+                {"sender": "user", "text": "Who is this?"},
+                {"sender": "scammer", "text": "Hurry, time is running out", "timestamp": 1234567892},
+                {"sender": "user", "text": reply, "timestamp": 1234567893}
+            ]
+        },
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    response = client.get(
+        '/session/test-history-456',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    data = json.loads(response.data)
+    assert data['session']['messageCount'] == 6
+    assert data['session']['conversationLength'] == 6
+    print("✅ Client history reconciled with the session")
+    
+    # ========================================
+    # Test 7: Callback queued, session completed
+    # ========================================
+    print("\nTesting callback trigger...")
+    response = client.post(
+        '/honeypot',
+        json={
+            "sessionId": "test-session-123",
+            "message": {
+                "sender": "scammer",
+                "text": "Or call 9876543210",
+                "timestamp": 1234567893
+            }
+        },
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    response = client.get(
+        '/session/test-session-123',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 404
+    assert get_dispatcher().stats()['enqueued'] >= 1
+    print("✅ Callback queued and session completed")
+    
+    # ========================================
+    # Test 7b: Service stats
+    # ========================================
+    response = client.get('/stats', headers={'x-api-key': 'test_secret_123'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert set(data) >= {"sessions", "replyCache", "callbacks"}
+    assert client.get('/stats').status_code == 401
+    print(f"✅ Stats: replyCache={data['replyCache']}")
+    
+    # ========================================
+    # Test 7c: Batch of turns for several sessions
+    # ========================================
+    print("\nTesting batch endpoint...")
+    opener = "Your bank account is blocked! Verify immediately."
+    response = client.post(
+        '/honeypot/batch',
+        json=[
+            {"sessionId": "batch-a", "message": {"sender": "scammer", "text": opener}},
+            {"sessionId": "batch-b", "message": {"sender": "scammer", "text": opener}},
+            {"message": {"text": "no session"}},
+            {"sessionId": "batch-a", "message": {"sender": "scammer", "text": "Pay to fraud@ybl now"}}
+        ],
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [result['status'] for result in data['results']] == ['success', 'success', 'error', 'success']
+    assert [result.get('sessionId') for result in data['results']] == ['batch-a', 'batch-b', None, 'batch-a']
+    assert data['succeeded'] == 3 and data['failed'] == 1
+    
+    # A session's items ran in order, each as its own turn
+    response = client.get('/session/batch-a', headers={'x-api-key': 'test_secret_123'})
+    data = json.loads(response.data)
+    assert data['session']['messageCount'] == 4
+    assert data['session']['extractedIntelligence']['upiIds'] == ['fraud@ybl']
+    
+    response = client.post(
+        '/honeypot/batch',
+        json={"sessionId": "not-a-batch"},
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 400
+    assert client.post('/honeypot/batch', json=[]).status_code == 401
+    print("✅ Batch results per item, in session order")
+    
+    # ========================================
+    # Test 7f: Intelligence lookup across sessions
+    # ========================================
+    response = client.get('/intel/lookup?value=FRAUD%40ybl', headers={'x-api-key': 'test_secret_123'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [(match['type'], match['indicator']) for match in data['matches']] == [('upiIds', 'fraud@ybl')]
+    assert data['matches'][0]['sessions'] == ['batch-a'] and data['matches'][0]['sessionCount'] == 1
+    assert data['matches'][0]['firstSeen'] <= data['matches'][0]['lastSeen']
+    
+    # Completed (deleted) sessions stay linked
+    response = client.get(
+        '/intel/lookup?value=%2B91%2098765%2043210&type=phoneNumbers',
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    data = json.loads(response.data)
+    assert data['matches'][0]['indicator'] == '9876543210'
+    assert 'test-session-123' in data['matches'][0]['sessions']
+    
+    response = client.get('/intel/lookup?value=nobody%40upi', headers={'x-api-key': 'test_secret_123'})
+    assert json.loads(response.data)['matches'] == []
+    assert client.get('/intel/lookup?type=upiIds', headers={'x-api-key': 'test_secret_123'}).status_code == 400
+    assert client.get('/intel/lookup?value=x&type=emails', headers={'x-api-key': 'test_secret_123'}).status_code == 400
+    assert client.get('/intel/lookup?value=fraud%40ybl').status_code == 401
+    print("✅ Intelligence lookup")
+    
+    # ========================================
+    # Test 7d: Prometheus metrics
+    # ========================================
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    text = response.data.decode("utf-8")
+    for stage in ("auth", "parse", "admit", "session", "detect", "extract", "reply", "update", "callback", "respond"):
+        assert f'honeypot_stage_seconds_count{{stage="{stage}"}}' in text, stage
+    assert 'honeypot_requests_total{route="/honeypot",status="200"}' in text
+    assert 'honeypot_requests_total{route="/session/<session_id>",status="404"}' in text
+    assert "honeypot_sessions_created_total" in text and "honeypot_sessions_live" in text
+    print("✅ Metrics cover every turn stage")
+    
+    # ========================================
+    # Test 7e: Per-key rate limit
+    # ========================================
+    print("\nTesting rate limit...")
+    original = Config.API_KEYS, Config.API_RATE_PER_SEC, Config.API_RATE_BURST
+    Config.API_KEYS, Config.API_RATE_PER_SEC, Config.API_RATE_BURST = "partner:partner-key", 0.01, 1
+    try:
+        turn = {"sessionId": "rate-1", "message": {"sender": "scammer", "text": "Hello"}}
+        response = client.post('/honeypot', json=turn, headers={'x-api-key': 'partner-key'})
+        assert response.status_code == 200
+        
+        # Bucket empty: refused
+        response = client.post('/honeypot', json=turn, headers={'x-api-key': 'partner-key'})
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+        assert json.loads(response.data)['status'] == 'error'
+        
+        # Other keys have their own buckets
+        response = client.post('/honeypot', json=turn, headers={'x-api-key': 'test_secret_123'})
+        assert response.status_code == 200
+        text = client.get('/metrics').data.decode("utf-8")
+        assert 'honeypot_rate_limited_total{key="partner",reason="rate"}' in text
+        
+        # A batch needs a token per item before any of it runs
+        Config.API_RATE_BURST = 3
+        batch = [{"sessionId": f"rate-batch-{n}", "message": {"sender": "scammer", "text": "Hello"}}
+                 for n in range(4)]
+        response = client.post('/honeypot/batch', json=batch, headers={'x-api-key': 'partner-key'})
+        assert response.status_code == 413
+        response = client.post('/honeypot/batch', json=batch[:3], headers={'x-api-key': 'partner-key'})
+        assert response.status_code == 429 and int(response.headers['Retry-After']) >= 1
+        assert not any(get_session(f"rate-batch-{n}") for n in range(4))
+    finally:
+        Config.API_KEYS, Config.API_RATE_PER_SEC, Config.API_RATE_BURST = original
+    print(f"✅ 429 with Retry-After: {response.status_code}")
+    
+    # ========================================
+    # Test 8: Missing required fields
+    # ========================================
+    print("\nTesting missing fields...")
+    response = client.post(
+        '/honeypot',
+        json={"message": {"text": "test"}},  # Missing sessionId
+        headers={'x-api-key': 'test_secret_123'}
+    )
+    assert response.status_code == 400
+    print("✅ Missing field validation passed")
+    
+    # ========================================
+    # Test 9: 404 endpoint
+    # ========================================
+    print("\nTesting 404...")
+    response = client.get('/nonexistent')
+    assert response.status_code == 404
+    print("✅ 404 handling passed")
+    
+    # Clean up
+    clear_all_sessions()
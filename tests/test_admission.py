@@ -0,0 +1,155 @@
+"""
+Test admission control module
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import admission
+from src.admission import CLOSING, NEW, ONGOING, AdmissionController, Overloaded, turn_priority
+from src.config import Config
+from src.metrics import REPLIES
+from src.pipeline import handle_turn
+from src.session import clear_all_sessions, create_session, get_session, update_session
+
+
+def test_admission():
+    """Test priorities, degrading, shedding and the pipeline's use of them"""
+
+    original = (
+        Config.ADMISSION_MAX_IN_FLIGHT, Config.ADMISSION_DEGRADE_AT,
+        Config.ADMISSION_TARGET_MS, Config.GROQ_API_KEY, Config.ADMISSION_QUEUE_WAIT_MS
+    )
+    Config.ADMISSION_MAX_IN_FLIGHT, Config.ADMISSION_DEGRADE_AT, Config.ADMISSION_TARGET_MS = 4, 0.5, 1000
+    Config.ADMISSION_QUEUE_WAIT_MS = 1000
+    clear_all_sessions()
+
+    try:
+        # Test 1: Priority from the session
+        assert turn_priority(None) == NEW
+        session = create_session("admission-1")
+        assert turn_priority(session) == ONGOING
+        session = update_session("admission-1", message_count=8)
+        assert turn_priority(session) == CLOSING
+        create_session("admission-2")
+        session = update_session("admission-2", extracted_intelligence={"upiIds": ["fraud@paytm"]})
+        assert turn_priority(session) == CLOSING
+        print("✅ Priorities")
+
+        # Test 2: Full, then degraded, then new sessions shed first
+        controller = AdmissionController()
+        tickets = [controller.admit(NEW), controller.admit(NEW)]
+        assert not tickets[0].degraded and not tickets[1].degraded
+        tickets += [controller.admit(ONGOING), controller.admit(ONGOING)]
+        assert tickets[2].degraded and tickets[3].degraded
+        try:
+            controller.admit(NEW)
+            assert False, "expected Overloaded"
+        except Overloaded as e:
+            body, status = e.response()
+            assert status == 503 and body["retryAfter"] >= 1
+        tickets += [controller.admit(ONGOING), controller.admit(ONGOING)]
+        try:
+            controller.admit(ONGOING)
+            assert False, "expected Overloaded"
+        except Overloaded:
+            pass
+        tickets += [controller.admit(CLOSING), controller.admit(CLOSING)]
+        try:
+            controller.admit(CLOSING)
+            assert False, "expected Overloaded"
+        except Overloaded:
+            pass
+        assert controller.in_flight == 8
+        print(f"✅ Shed by priority at {controller.in_flight} in flight")
+
+        # Releasing (twice is harmless) frees the slots
+        for ticket in tickets:
+            ticket.release()
+            ticket.release()
+        assert controller.in_flight == 0
+        assert not controller.admit(NEW).degraded
+
+        # Test 3: Slow turns degrade everything, then shed new sessions;
+        # the average decays while nothing finishes
+        controller = AdmissionController()
+        controller.finish(3.0)
+        controller.finish(30.0)
+        assert controller.pressure()[1] >= 2
+        assert controller.admit(ONGOING).degraded
+        try:
+            controller.admit(NEW)
+            assert False, "expected Overloaded"
+        except Overloaded as e:
+            assert e.retry_after >= 2
+        controller._updated -= 10 * admission.LATENCY_HALF_LIFE
+        assert controller.pressure()[1] < 0.01
+        print("✅ Latency average")
+
+        # Queue wait: requests waiting for a thread (one in flight at a
+        # time, as behind a busy gunicorn worker) degrade, then shed
+        controller = AdmissionController()
+        ticket = controller.admit(NEW, queued=0.4)
+        assert not ticket.degraded and controller.in_flight == 1
+        ticket.release()
+        assert controller.latency >= 0.04  # the wait counts as latency
+        Config.ADMISSION_TARGET_MS = 60000
+        decisions = []
+        try:
+            for _ in range(50):
+                ticket = controller.admit(NEW, queued=1.2)
+                decisions.append("degraded" if ticket.degraded else "full")
+                ticket.release()
+        except Overloaded:
+            decisions.append("shed")
+        Config.ADMISSION_TARGET_MS = 1000
+        assert decisions[0] == "full" and "degraded" in decisions and decisions[-1] == "shed"
+        assert controller.in_flight == 0 and controller.pressure()[0] >= 1
+        controller._waited -= 10 * admission.LATENCY_HALF_LIFE
+        assert controller.pressure()[0] < 0.01
+        print(f"✅ Queue wait: shed after {len(decisions)} turns, none in flight")
+
+        # X-Request-Start in seconds, milliseconds or microseconds
+        now = 1_700_000_010.0
+        for header in ("t=1700000009.5", "1700000009500", "t=1700000009500000"):
+            assert abs(admission.request_queue_wait(header, now) - 0.5) < 1e-6, header
+        assert admission.request_queue_wait(None) == 0
+        assert admission.request_queue_wait("t=soon") == 0
+        assert admission.request_queue_wait(f"t={time.time() + 5}") == 0
+        print("✅ X-Request-Start")
+
+        # Test 4: Off when ADMISSION_MAX_IN_FLIGHT is 0
+        Config.ADMISSION_MAX_IN_FLIGHT = 0
+        assert not AdmissionController().admit(NEW).degraded
+        Config.ADMISSION_MAX_IN_FLIGHT = 4
+
+        # Test 5: The pipeline sheds with 503 (nothing stored), and
+        # degraded turns never reach the LLM
+        admission.controller.reset()
+        admission.controller.in_flight = 4
+        body, status = handle_turn({"sessionId": "admission-new", "message": {"text": "Pay now"}})
+        assert status == 503 and body["retryAfter"] >= 1
+        assert get_session("admission-new") is None
+
+        admission.controller.in_flight = 3
+        Config.GROQ_API_KEY = "unused"  # the LLM path would fail and log
+        templates = REPLIES.samples().get(("template",), 0)
+        body, status = handle_turn({"sessionId": "admission-1", "message": {"text": "Pay now"}})
+        assert status == 200 and body["reply"]
+        assert REPLIES.samples().get(("template",), 0) == templates + 1
+        assert admission.controller.in_flight == 3
+        print("✅ Pipeline sheds and degrades")
+
+    finally:
+        (Config.ADMISSION_MAX_IN_FLIGHT, Config.ADMISSION_DEGRADE_AT,
+         Config.ADMISSION_TARGET_MS, Config.GROQ_API_KEY, Config.ADMISSION_QUEUE_WAIT_MS) = original
+        admission.controller.reset()
+        clear_all_sessions()
+
+    print("\n🎉 All admission tests passed!")
+
+
+if __name__ == '__main__':
+    test_admission()
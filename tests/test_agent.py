@@ -0,0 +1,276 @@
+"""
+Test agent module against a local fake OpenAI-compatible LLM server
+"""
+
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src import llm
+from src.agent import (
+    MAX_REPLY_WORDS,
+    build_messages,
+    clean_reply,
+    generate_agent_reply,
+    generate_agent_reply_async,
+    get_reply_executor
+)
+from src.config import Config
+from src.pipeline import late_reply_recorder, previous_late_reply
+from src.session import clear_all_sessions, create_session, update_session
+from src.reply_cache import reply_cache, reply_cache_key
+from src.templates import template_reply
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """
+    Streams chat completions as server-sent events.
+
+    The n-th request waits `delays[n]` seconds before its first token
+    (the last delay repeats), to simulate LLM stalls.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive, chunked streaming
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+        with server.lock:
+            index = server.requests
+            server.requests += 1
+            server.client_ports.add(self.client_address[1])
+        delay = server.delays[min(index, len(server.delays) - 1)]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        try:
+            time.sleep(delay)
+            for token in server.reply.split():
+                self.write_event({
+                    "id": f"chatcmpl-{index}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": token + " "},
+                        "finish_reason": None
+                    }]
+                })
+            self.write_chunk(b"data: [DONE]\n\n")
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up on this attempt
+
+    def write_event(self, data):
+        self.write_chunk(f"data: {json.dumps(data)}\n\n".encode())
+
+    def write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_llm(delays, reply="Oh dear, which bank did you say?") -> ThreadingHTTPServer:
+    """Start a fake LLM server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeLLMHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.delays = delays
+    server.reply = reply
+    server.client_ports = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def use_fake_llm(server, budget_ms: int, hedge_after_ms: int) -> None:
+    """Point the LLM client at a fake server"""
+    Config.GROQ_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    Config.REPLY_LATENCY_BUDGET_MS = budget_ms
+    Config.GROQ_HEDGE_AFTER_MS = hedge_after_ms
+    llm.reset_clients()
+    reply_cache.clear()
+
+
+def test_agent():
+    """Test agent reply generation"""
+
+    history = [
+        {"sender": "scammer", "text": "Your account is blocked"},
+        {"sender": "agent", "text": "Oh no, what happened?"}
+    ]
+
+    # Test 1: Chat messages map senders to roles
+    messages = build_messages("Send OTP now", history, ["urgency"])
+    print(f"✅ Roles: {[m['role'] for m in messages]}")
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "user"]
+    assert "urgency" in messages[0]["content"]
+    assert messages[-1]["content"] == "Send OTP now"
+
+    # Test 2: Replies are trimmed
+    long_reply = " ".join(["word"] * (MAX_REPLY_WORDS + 20))
+    assert len(clean_reply(long_reply).split()) == MAX_REPLY_WORDS
+    assert clean_reply('  "Oh no!" ') == "Oh no!"
+    print("✅ Reply trimming")
+
+    original = (
+        Config.GROQ_API_KEY, Config.GROQ_BASE_URL,
+        Config.REPLY_LATENCY_BUDGET_MS, Config.GROQ_HEDGE_AFTER_MS,
+        Config.REPLY_DEADLINE_MS
+    )
+    try:
+        # Test 3: Without an API key, both variants use templates
+        Config.GROQ_API_KEY = ""
+        reply = generate_agent_reply("Hello", history)
+        async_reply = asyncio.run(generate_agent_reply_async("Hello", history))
+        print(f"✅ Template reply: {reply}")
+        assert reply == async_reply == template_reply(history)
+
+        # Test 4: Streamed replies over one pooled connection
+        Config.GROQ_API_KEY = "test-key"
+        Config.REPLY_DEADLINE_MS = 0
+        server = start_fake_llm(delays=[0])
+        use_fake_llm(server, budget_ms=2000, hedge_after_ms=0)
+        for n in range(3):
+            reply = generate_agent_reply(f"Pay the fine {n}", history)
+        print(f"✅ Streamed reply: {reply}")
+        assert reply == "Oh dear, which bank did you say?"
+        assert server.requests == 3 and len(server.client_ports) == 1
+
+        # Test 5: A stalled first attempt is hedged
+        server = start_fake_llm(delays=[3, 0])
+        use_fake_llm(server, budget_ms=2000, hedge_after_ms=200)
+        before = llm.llm_stats()
+        started = time.monotonic()
+        reply = generate_agent_reply("Send OTP now", history)
+        elapsed = time.monotonic() - started
+        stats = llm.llm_stats()
+        print(f"✅ Hedged reply in {elapsed:.2f}s: {stats}")
+        assert reply == "Oh dear, which bank did you say?"
+        assert elapsed < 1.5
+        assert stats["hedgeWins"] == before["hedgeWins"] + 1
+
+        # Test 6: Past the deadline, the template is used
+        server = start_fake_llm(delays=[3])
+        use_fake_llm(server, budget_ms=600, hedge_after_ms=200)
+        started = time.monotonic()
+        reply = generate_agent_reply("Send OTP now", history)
+        elapsed = time.monotonic() - started
+        print(f"✅ Deadline fallback in {elapsed:.2f}s: {reply}")
+        assert reply == template_reply(history)
+        assert elapsed < 1.0
+        assert llm.llm_stats()["timeouts"] == stats["timeouts"] + 1
+
+        # Test 7: The async client hedges too
+        server = start_fake_llm(delays=[3, 0])
+        use_fake_llm(server, budget_ms=2000, hedge_after_ms=200)
+        started = time.monotonic()
+        reply = asyncio.run(generate_agent_reply_async("Send OTP now", history))
+        elapsed = time.monotonic() - started
+        print(f"✅ Async hedged reply in {elapsed:.2f}s")
+        assert reply == "Oh dear, which bank did you say?"
+        assert elapsed < 1.5
+
+        # An empty completion is a reply, not a stall to hedge
+        server = start_fake_llm(delays=[0], reply="")
+        use_fake_llm(server, budget_ms=2000, hedge_after_ms=200)
+        hedged = llm.llm_stats()["hedged"]
+        messages = [{"role": "user", "content": "Send OTP now"}]
+        assert llm.complete(messages) == ""
+        assert asyncio.run(llm.complete_async(messages)) == ""
+        assert server.requests == 2 and llm.llm_stats()["hedged"] == hedged
+        print("✅ Empty completions are not hedged")
+
+        # Test 8: Past the soft deadline the turn gets a template, and the
+        # LLM reply is handed back (and cached) when it arrives
+        server = start_fake_llm(delays=[0.5])
+        use_fake_llm(server, budget_ms=3000, hedge_after_ms=0)
+        Config.REPLY_DEADLINE_MS = 100
+        late = []
+        arrived = threading.Event()
+        started = time.monotonic()
+        reply = generate_agent_reply(
+            "Pay the fine now", history, ["payment_request"],
+            on_late_reply=lambda text: (late.append(text), arrived.set())
+        )
+        elapsed = time.monotonic() - started
+        print(f"✅ Soft deadline template in {elapsed:.2f}s: {reply}")
+        assert reply == template_reply(history, ["payment_request"])
+        assert elapsed < 0.4
+        assert arrived.wait(3)
+        print(f"✅ Late reply: {late}")
+        assert late == ["Oh dear, which bank did you say?"]
+        key = reply_cache_key("Pay the fine now", ["payment_request"], len(history))
+        assert reply_cache._entries[key][1] == late
+
+        # A reply still queued for a busy reply thread at its deadline
+        # is dropped, not sent to the LLM late
+        server = start_fake_llm(delays=[0])
+        use_fake_llm(server, budget_ms=300, hedge_after_ms=0)
+        release = threading.Event()
+        executor = get_reply_executor()
+        blockers = [executor.submit(release.wait) for _ in range(Config.GROQ_POOL_SIZE)]
+        reply = generate_agent_reply("Pay the fine today", history)
+        assert reply == template_reply(history)
+        time.sleep(0.4)
+        release.set()
+        for blocker in blockers:
+            blocker.result()
+        executor.submit(lambda: None).result()  # the queued reply has run
+        assert server.requests == 0
+        print("✅ Replies queued past their deadline are dropped")
+
+        # Test 9: The late reply is saved on the session for its next turn
+        clear_all_sessions()
+        session = create_session("late-reply")
+        late_reply_recorder(session)("Which bank was it, beta?")
+        session = update_session("late-reply", message_count=2)
+        assert previous_late_reply(session) == "Which bank was it, beta?"
+        messages = build_messages("Hurry", history, late_reply=previous_late_reply(session))
+        assert "Which bank was it, beta?" in messages[0]["content"]
+        session = update_session("late-reply", message_count=4)
+        assert previous_late_reply(session) is None  # only for the next turn
+        print("✅ Late reply shapes the next turn only")
+
+        # Test 10: Replies to prompts with a session's intelligence are
+        # never cached, so another session can't be sent them
+        server = start_fake_llm(delays=[0], reply="Is fraud@ybl your UPI ID, beta?")
+        use_fake_llm(server, budget_ms=2000, hedge_after_ms=0)
+        Config.REPLY_DEADLINE_MS = 0
+        for upi_id in ("fraud@ybl", "other@okaxis", "third@paytm"):
+            generate_agent_reply("Pay now", history, extracted_intelligence={"upiIds": [upi_id]})
+        assert server.requests == 3
+        assert reply_cache_key("Pay now", None, len(history)) not in reply_cache._entries
+        asyncio.run(generate_agent_reply_async("Pay now", history, summary={"upTo": 2, "lines": ["x"]}))
+        assert server.requests == 4 and not reply_cache._entries
+        generate_agent_reply("Pay now", history)
+        assert reply_cache_key("Pay now", None, len(history)) in reply_cache._entries
+        print("✅ Session-specific replies stay out of the cache")
+    finally:
+        (
+            Config.GROQ_API_KEY, Config.GROQ_BASE_URL,
+            Config.REPLY_LATENCY_BUDGET_MS, Config.GROQ_HEDGE_AFTER_MS,
+            Config.REPLY_DEADLINE_MS
+        ) = original
+        llm.reset_clients()
+        reply_cache.clear()
+        clear_all_sessions()
+
+    print("\n🎉 All agent tests passed!")
+
+
+if __name__ == '__main__':
+    test_agent()
@@ -0,0 +1,132 @@
+"""
+Test ASGI application
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set environment variables before importing app
+os.environ['API_SECRET_KEY'] = 'test_secret_123'
+os.environ['GUVI_CALLBACK_URL'] = 'http://127.0.0.1:9/callback'  # nothing listens here
+os.environ['CALLBACK_SPOOL_DIR'] = tempfile.mkdtemp()
+
+# Keys are read once; another test may have loaded the config already.
+# No rate limit, except in the scenario's own rate limit test
+from src.config import Config
+Config.API_SECRET_KEY = os.environ['API_SECRET_KEY']
+Config.API_RATE_PER_SEC = 0
+
+import httpx
+from src.asgi import app
+from src.session import clear_all_sessions, set_store
+from src.session_store import MemorySessionStore
+from tests.api_scenario import run_api_scenario
+
+
+class SlowStore(MemorySessionStore):
+    """Updates wait like a contended SQLite write transaction"""
+
+    def update(self, session_id, mutate):
+        time.sleep(0.5)
+        return super().update(session_id, mutate)
+
+
+class ASGITestClient:
+    """Flask-test-client-style wrapper that calls the ASGI app in process"""
+
+    def __init__(self, asgi_app):
+        self.loop = asyncio.new_event_loop()
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=asgi_app),
+            base_url="http://testserver"
+        )
+
+    def request(self, method: str, path: str, **kwargs):
+        response = self.loop.run_until_complete(
+            self.client.request(method, path, **kwargs)
+        )
+        response.data = response.content
+        return response
+
+    def get(self, path: str, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+
+def test_asgi():
+    """Test ASGI application endpoints"""
+
+    client = ASGITestClient(app)
+    try:
+        # Same scenario as the Flask app (tests/test_app.py)
+        run_api_scenario(client)
+
+        # ASGI-only: method and body checks done by our router
+        response = client.get('/honeypot')
+        assert response.status_code == 405
+        response = client.post(
+            '/honeypot',
+            content=b"{not json",
+            headers={'x-api-key': 'test_secret_123'}
+        )
+        assert response.status_code == 400
+        print("✅ Method and malformed body handling passed")
+
+        # Concurrent turns on one event loop
+        async def turns():
+            return await asyncio.gather(*[
+                client.client.post(
+                    '/honeypot',
+                    json={
+                        "sessionId": f"async-{n}",
+                        "message": {"sender": "scammer", "text": "Your KYC is pending"}
+                    },
+                    headers={'x-api-key': 'test_secret_123'}
+                )
+                for n in range(20)
+            ])
+
+        responses = client.loop.run_until_complete(turns())
+        assert all(response.status_code == 200 for response in responses)
+        print(f"✅ Concurrent turns: {len(responses)}")
+
+        # A turn waiting on the store doesn't hold up the event loop
+        async def health_during_turn():
+            turn = asyncio.ensure_future(client.client.post(
+                '/honeypot',
+                json={"sessionId": "slow-store", "message": {"sender": "scammer", "text": "Pay now"}},
+                headers={'x-api-key': 'test_secret_123'}
+            ))
+            started = time.perf_counter()
+            await asyncio.sleep(0.05)
+            health = await client.client.get('/health')
+            elapsed = time.perf_counter() - started
+            return (await turn).status_code, health.status_code, elapsed
+
+        previous = set_store(SlowStore())
+        try:
+            turn_status, health_status, elapsed = client.loop.run_until_complete(health_during_turn())
+        finally:
+            set_store(previous)
+        assert turn_status == health_status == 200
+        assert elapsed < 0.3, elapsed
+        print(f"✅ Event loop free during store waits ({elapsed * 1000:.0f} ms)")
+    finally:
+        client.close()
+        clear_all_sessions()
+
+    print("\n🎉 All ASGI tests passed!")
+
+
+if __name__ == '__main__':
+    test_asgi()
@@ -6,8 +6,13 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import hashlib
+import time
+
 from flask import Flask
-from src.auth import validate_api_key
+from src.app import create_app
+from src.auth import RateLimited, authenticate, get_key_registry, load_keys, parse_keys, validate_api_key
+from src.config import Config
 
 
 def test_auth():
@@ -16,8 +21,13 @@ def test_auth():
     # Create test Flask app
     app = Flask(__name__)
     
-    # Set test secret key
+    # Set test secret key (keys are read from Config once, see get_key_registry)
     os.environ['API_SECRET_KEY'] = 'test_secret_123'
+    original = (
+        Config.API_SECRET_KEY, Config.API_KEYS,
+        Config.API_RATE_PER_SEC, Config.API_RATE_BURST, Config.API_MAX_CONCURRENT
+    )
+    Config.API_SECRET_KEY = 'test_secret_123'
     
     with app.test_request_context(headers={'x-api-key': 'test_secret_123'}):
         from flask import request
@@ -37,6 +47,91 @@ def test_auth():
         print(f"✅ Missing key test: {result}")  # Should be False
         assert result == False
     
+    try:
+        # Several keys, one given by its SHA-256
+        digest = hashlib.sha256(b"partner-secret").hexdigest()
+        Config.API_KEYS = f"guvi:guvi-secret, partner:sha256:{digest}"
+        for provided, name in [("test_secret_123", "default"), ("guvi-secret", "guvi"),
+                               ("partner-secret", "partner"), ("sha256:" + digest, None)]:
+            with app.test_request_context(headers={'x-api-key': provided}):
+                from flask import request
+                key = authenticate(request)
+                assert (key.name if key else None) == name, provided
+        assert len(get_key_registry()) == 3
+        print("✅ Multiple keys, plain and hashed")
+        
+        for bad in ("nameonly", ":secret", "partner:sha256:abcd"):
+            try:
+                parse_keys("", bad)
+                assert False, "expected ValueError"
+            except ValueError:
+                pass
+        
+        # Token bucket: burst, then 429 until refilled
+        Config.API_KEYS, Config.API_RATE_PER_SEC, Config.API_RATE_BURST = "", 20, 2
+        key = get_key_registry().lookup("test_secret_123")
+        for _ in range(2):
+            key.admit()
+            key.release()
+        try:
+            key.admit()
+            assert False, "expected RateLimited"
+        except RateLimited as e:
+            assert e.reason == "rate" and e.retry_after == 1
+            body, status = e.response()
+            assert status == 429 and body["retryAfter"] == 1
+        time.sleep(0.06)
+        key.admit()
+        key.release()
+        print("✅ Token bucket")
+        
+        # A batch's extra items need tokens now; nothing is taken if
+        # they aren't there, and a batch over the burst never fits
+        time.sleep(0.1)
+        key.admit()
+        key.release()
+        key.charge(1)
+        try:
+            key.charge(1)
+            assert False, "expected RateLimited"
+        except RateLimited as e:
+            assert e.reason == "rate" and e.response()[1] == 429
+        try:
+            key.charge(2)
+            assert False, "expected RateLimited"
+        except RateLimited as e:
+            assert e.reason == "batch" and e.retry_after is None and e.response()[1] == 413
+        time.sleep(0.06)
+        key.charge(1)
+        print("✅ Batch charge")
+        
+        # A malformed API_KEYS fails at startup (create_app), not per request
+        Config.API_KEYS = "nameonly"
+        try:
+            create_app(warm=False)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        Config.API_KEYS = ""
+        assert load_keys() == 1
+        
+        # Concurrency cap, independent of the bucket
+        Config.API_RATE_PER_SEC, Config.API_MAX_CONCURRENT = 0, 2
+        key = get_key_registry().lookup("test_secret_123")
+        key.admit()
+        key.admit()
+        try:
+            key.admit()
+            assert False, "expected RateLimited"
+        except RateLimited as e:
+            assert e.reason == "concurrency"
+        key.release()
+        key.admit()
+        print("✅ Concurrency cap")
+    finally:
+        (Config.API_SECRET_KEY, Config.API_KEYS,
+         Config.API_RATE_PER_SEC, Config.API_RATE_BURST, Config.API_MAX_CONCURRENT) = original
+    
     print("\n🎉 All auth tests passed!")
 
 
@@ -0,0 +1,70 @@
+"""
+Test bulk scoring CLI
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bulk import main, message_text
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_bulk():
+    """Test corpus reading, pool scoring and NDJSON output"""
+    directory = tempfile.mkdtemp()
+    corpus = os.path.join(directory, "corpus.jsonl.gz")
+    output = os.path.join(directory, "results.ndjson")
+
+    records = []
+    for n in range(200):
+        if n % 2:
+            records.append({"id": f"m{n}", "text": "Your bank account is blocked! Pay to fraud@ybl now."})
+        else:
+            records.append({"message": {"text": "Hi, are we meeting for lunch?"}})
+
+    with gzip.open(corpus, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write("not json\n")
+
+    # Test 1: Text from either field
+    assert message_text({"text": "a"}) == "a"
+    assert message_text({"message": {"text": "b"}}) == "b"
+    assert message_text({"body": {"sms": "c"}}, "body.sms") == "c"
+
+    # Test 2: Ordered results over a pool, one per line
+    assert main([corpus, "-o", output, "--workers", "2", "--chunk-size", "16"]) == 0
+    results = read_results(output)
+    assert len(results) == 201
+    assert results[1]["id"] == "m1" and results[1]["isScam"] == True
+    assert results[1]["extractedIntelligence"]["upiIds"] == ["fraud@ybl"]
+    assert results[0]["id"] == 1 and results[0]["isScam"] == False
+    assert results[-1] == {"id": 201, "error": results[-1]["error"]}
+    print(f"✅ Ordered: {len(results)} results")
+
+    # Test 3: Unordered output has the same results
+    assert main([corpus, "-o", output, "--workers", "2", "--chunk-size", "7", "--unordered"]) == 0
+    unordered = read_results(output)
+    key = lambda result: json.dumps(result, sort_keys=True)
+    assert sorted(unordered, key=key) == sorted(results, key=key)
+    print("✅ Unordered")
+
+    # Test 4: Without a pool
+    assert main([corpus, "-o", output, "--workers", "0"]) == 0
+    assert read_results(output) == results
+    assert main([os.path.join(directory, "missing.jsonl"), "-o", output]) == 1
+    print("✅ In-process scoring and missing input")
+
+    print("\n🎉 All bulk tests passed!")
+
+
+if __name__ == '__main__':
+    test_bulk()
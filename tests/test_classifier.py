@@ -0,0 +1,90 @@
+"""
+Test hashed n-gram classifier
+"""
+
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.classifier import NgramClassifier, main
+from src.config import Config
+from src.detector import detect_scam, detect_scam_batch, get_scam_model
+
+SCAMS = [
+    "Your bank account is blocked! Verify KYC immediately",
+    "Send the OTP now or your account will be suspended",
+    "Pay Rs 99 verification fee to fraud@ybl to unblock",
+    "Click http://sbi-kyc.xyz to claim your cashback prize",
+    "aapka khata band ho jayega turant OTP bhejo",
+]
+NORMAL = [
+    "Hi, are we meeting for lunch?",
+    "Call me when you reach home",
+    "The meeting is moved to 3pm tomorrow",
+    "Happy birthday! Have a great day",
+    "Can you send me the notes from class",
+]
+
+
+def test_classifier():
+    """Test training, batch scoring, weight files and detector use"""
+    directory = tempfile.mkdtemp()
+
+    # Test 1: A model trained on labeled examples separates them
+    model = NgramClassifier.train(SCAMS + NORMAL, [1] * 5 + [0] * 5, bits=16, epochs=50)
+    probabilities = model.predict_proba(SCAMS + NORMAL)
+    assert (probabilities[:5] > 0.5).all() and (probabilities[5:] < 0.5).all()
+    assert model.predict_proba(["your account will be blocked, share the OTP"])[0] > 0.5
+    print(f"✅ Trained: {probabilities.round(2)}")
+
+    # Test 2: Batch scores equal one-by-one scores
+    single = [model.predict_proba([message])[0] for message in SCAMS + NORMAL]
+    assert np.allclose(single, probabilities)
+    assert len(model.predict_proba([])) == 0
+
+    # Test 3: Weights round-trip through a memory-mapped .npy file
+    path = os.path.join(directory, "model.npy")
+    model.save(path)
+    loaded = NgramClassifier.from_file(path)
+    assert isinstance(loaded.weights, np.memmap) and loaded.bits == 16
+    assert np.allclose(loaded.predict_proba(SCAMS + NORMAL), probabilities)
+    print("✅ Memory-mapped weights")
+
+    # Test 4: detect_scam uses the model when configured
+    original = Config.SCAM_MODEL_FILE
+    Config.SCAM_MODEL_FILE = path
+    try:
+        is_scam, confidence, indicators = detect_scam(SCAMS[0])
+        assert is_scam == True and confidence == min(round(float(probabilities[0]), 2), 0.99)
+        assert "account_threat" in indicators
+        assert detect_scam(NORMAL[0])[0] == False
+        assert detect_scam_batch(SCAMS + NORMAL) == [detect_scam(m) for m in SCAMS + NORMAL]
+
+        Config.SCAM_MODEL_FILE = os.path.join(directory, "missing.npy")
+        assert get_scam_model() is None
+    finally:
+        Config.SCAM_MODEL_FILE = original
+    assert get_scam_model() is None
+    print("✅ Detector uses the model, falls back to the lexicon")
+
+    # Test 5: Training script writes a weights file
+    labeled = os.path.join(directory, "labeled.jsonl")
+    with open(labeled, "w", encoding="utf-8") as f:
+        for message in SCAMS * 4:
+            f.write(json.dumps({"text": message, "label": 1}) + "\n")
+        for message in NORMAL * 4:
+            f.write(json.dumps({"message": {"text": message}, "label": 0}) + "\n")
+    output = os.path.join(directory, "trained.npy")
+    assert main([labeled, "-o", output, "--bits", "12", "--epochs", "30"]) == 0
+    assert NgramClassifier.from_file(output).bits == 12
+    print("✅ Training script")
+
+    print("\n🎉 All classifier tests passed!")
+
+
+if __name__ == '__main__':
+    test_classifier()
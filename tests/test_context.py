@@ -0,0 +1,103 @@
+"""
+Test prompt context module
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import build_messages
+from src.config import Config
+from src.context import build_context, compact_intelligence, fold_history, message_tokens
+
+
+def conversation(turns):
+    """Alternating scammer/agent messages for `turns` turns"""
+    history = []
+    for n in range(turns):
+        history.append({"sender": "scammer", "text": f"Scammer message {n}: pay the fee to unblock your account now"})
+        history.append({"sender": "agent", "text": f"Agent reply {n}: oh dear, what should I do?"})
+    return history
+
+
+def test_context():
+    """Test history folding, token budget and compact intelligence"""
+
+    # Test 1: Short conversations are sent verbatim, no summary
+    history = conversation(2)
+    summary = fold_history(None, history, keep_turns=4)
+    assert summary == {"upTo": 0, "lines": []}
+    messages = build_context("system", "latest", history, summary)
+    assert [m["content"] for m in messages[1:-1]] == [m["text"] for m in history]
+    print("✅ Short conversation kept verbatim")
+
+    # Test 2: Older turns fold into the summary, incrementally
+    history = conversation(10)
+    summary = fold_history(None, history[:12], keep_turns=4)
+    assert summary["upTo"] == 4 and len(summary["lines"]) == 4
+    assert summary["lines"][0].startswith("They said: Scammer message 0")
+    assert summary["lines"][1].startswith("You said: Agent reply 0")
+
+    extended = fold_history(summary, history, keep_turns=4)
+    assert extended["upTo"] == 12 and extended["lines"][:4] == summary["lines"]
+    assert fold_history(extended, history, keep_turns=4) is extended
+    print(f"✅ Rolling summary: {len(extended['lines'])} lines up to message {extended['upTo']}")
+
+    # Test 3: Only messages after the summary are verbatim
+    messages = build_context("system", "latest", history, extended)
+    assert "Earlier in this conversation:" in messages[0]["content"]
+    assert [m["content"] for m in messages[1:-1]] == [m["text"] for m in history[12:]]
+    assert messages[-1] == {"role": "user", "content": "latest"}
+
+    # Test 4: The summary is capped, keeping the opening line
+    original = Config.SUMMARY_TOKEN_BUDGET
+    Config.SUMMARY_TOKEN_BUDGET = 40
+    try:
+        capped = fold_history(None, conversation(30), keep_turns=4)
+    finally:
+        Config.SUMMARY_TOKEN_BUDGET = original
+    assert capped["upTo"] == 52
+    assert capped["lines"][0].startswith("They said: Scammer message 0")
+    assert capped["lines"][-1].startswith("You said: Agent reply 25")
+    assert len(capped["lines"]) < 52
+    print(f"✅ Summary capped to {len(capped['lines'])} lines")
+
+    # Test 5: Verbatim history is trimmed to the token budget, newest first
+    history = conversation(50)
+    messages = build_context("system", "latest", history, token_budget=200)
+    assert message_tokens(messages) <= 200
+    assert messages[-2]["content"] == history[-1]["text"]
+    assert len(messages) < len(history)
+
+    # Test 6: Intelligence already collected is listed compactly
+    intel = {"upiIds": ["fraud@ybl"], "phoneNumbers": ["9876543210"], "bankAccounts": []}
+    assert compact_intelligence(intel) == "UPI IDs: fraud@ybl; phone numbers: 9876543210"
+    assert compact_intelligence({}) == ""
+    messages = build_messages("Send now", [], extracted_intelligence=intel)
+    assert "fraud@ybl" in messages[0]["content"]
+    print("✅ Token budget and compact intelligence")
+
+    # Test 7: System prompt, summary and intelligence count against the budget
+    intel = {"upiIds": [f"payee{n}@ybl" for n in range(40)]}
+    assert compact_intelligence(intel) == (
+        "UPI IDs: payee35@ybl, payee36@ybl, payee37@ybl, payee38@ybl, payee39@ybl and 35 more"
+    )
+    history = conversation(40)
+    summary = fold_history(None, history, keep_turns=4)
+    system = "You are a retired teacher. " * 40
+    messages = build_context(system, "latest", history, summary, intel, token_budget=500)
+    assert message_tokens(messages) <= 500
+    assert "payee39@ybl" in messages[0]["content"]
+    assert summary["lines"][0] in messages[0]["content"]
+    assert summary["lines"][1] not in messages[0]["content"]
+    print(f"✅ Whole prompt within budget: {message_tokens(messages)} of 500 tokens")
+
+    # Only the system prompt and current message when nothing else fits
+    messages = build_context(system, "latest", history, summary, intel, token_budget=100)
+    assert [m["content"] for m in messages] == [system, "latest"]
+
+    print("\n🎉 All context tests passed!")
+
+
+if __name__ == '__main__':
+    test_context()
@@ -0,0 +1,73 @@
+"""
+Test scam detection module
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.keywords import KeywordAutomaton, KeywordEntry, SCAM_LEXICON
+from src.patterns import find_scam_keywords
+from src.detector import detect_scam, detect_scam_batch
+
+
+def test_detector():
+    """Test keyword automaton and scam detection"""
+
+    # Test 1: Automaton reports every hit with offsets
+    automaton = KeywordAutomaton([
+        KeywordEntry("blocked", "account_threat", 0.3),
+        KeywordEntry("account blocked", "account_threat", 0.5),
+        KeywordEntry("pin", "credential_request", 0.3),
+        KeywordEntry("he", "test", 0.1),
+        KeywordEntry("she", "test", 0.1),
+    ])
+    hits = automaton.find_all("Your ACCOUNT BLOCKED, share PIN")
+    print(f"✅ Automaton hits: {hits}")
+    assert [hit.keyword for hit in hits] == ["account blocked", "blocked", "pin"]
+    assert hits[0].start == 5 and hits[0].end == 20
+    assert hits[2].start == 28
+
+    # Test 2: Phrases only match on word boundaries
+    assert automaton.find_all("went shopping, no spine") == []
+    assert [hit.keyword for hit in automaton.find_all("she said")] == ["she"]
+    print("✅ Word boundaries respected")
+
+    # Test 3: Shared lexicon covers English and Hinglish
+    keywords = find_scam_keywords("Turant OTP batao warna khata band!")
+    print(f"✅ Lexicon keywords: {keywords}")
+    assert "otp batao" in keywords
+    assert "khata band" in keywords
+    assert "otp" in keywords
+    assert len(SCAM_LEXICON.keywords) > 0
+
+    # Test 4: Scam message is detected with indicators
+    is_scam, confidence, indicators = detect_scam(
+        "Your bank account is blocked! Verify immediately."
+    )
+    print(f"✅ Scam message: {is_scam}, {confidence}, {indicators}")
+    assert is_scam == True
+    assert 0.5 <= confidence < 1.0
+    assert "account_threat" in indicators
+    assert "urgency" in indicators
+
+    # Test 5: Normal message is not a scam
+    is_scam, confidence, indicators = detect_scam("Hi, are we meeting for lunch?")
+    print(f"✅ Normal message: {is_scam}, {confidence}, {indicators}")
+    assert is_scam == False
+    assert indicators == []
+
+    # Test 6: Batch detection matches one-by-one detection, in order
+    messages = [
+        "Your bank account is blocked! Verify immediately.",
+        "Hi, are we meeting for lunch?",
+        "Your bank account is blocked! Verify immediately."
+    ]
+    assert detect_scam_batch(messages) == [detect_scam(message) for message in messages]
+    print("✅ Batch detection")
+
+    print("\n🎉 All detector tests passed!")
+
+
+if __name__ == '__main__':
+    test_detector()
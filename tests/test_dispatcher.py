@@ -0,0 +1,242 @@
+"""
+Test background callback dispatcher against a local stub GUVI server
+"""
+
+import os
+import sys
+import glob
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.callback import post_callback, post_callback_batch
+from src.config import Config
+from src.dispatcher import CallbackDispatcher
+
+
+class StubGuviHandler(BaseHTTPRequestHandler):
+    """Records callback payloads; fails the first `fail_first` requests"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+        with server.lock:
+            server.requests += 1
+            server.client_ports.add(self.client_address[1])
+            failing = server.requests <= server.fail_first
+            if not failing:
+                server.payloads.extend(body if isinstance(body, list) else [body])
+
+        self.send_response(500 if failing else 200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(fail_first: int = 0) -> ThreadingHTTPServer:
+    """Start a stub GUVI server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGuviHandler)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.fail_first = fail_first
+    server.payloads = []
+    server.client_ports = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_dispatcher():
+    """Test queueing, retries, spool recovery and queue bounds"""
+
+    server = start_stub_server(fail_first=2)
+    url = f"http://127.0.0.1:{server.server_address[1]}/callback"
+    spool_dir = tempfile.mkdtemp()
+
+    def post(payload):
+        return post_callback(payload, callback_url=url, timeout=2)
+
+    # Test 1: Delivery succeeds after retries with backoff
+    dispatcher = CallbackDispatcher(
+        post=post, workers=2, backoff_base=0.01, backoff_max=0.05,
+        spool_dir=spool_dir
+    )
+    dispatcher.start()
+    assert dispatcher.enqueue({"sessionId": "dispatch-1"}) == True
+    assert dispatcher.wait_idle(timeout=5)
+    stats = dispatcher.stats()
+    print(f"✅ Delivered after retries: {stats}")
+    assert [p["sessionId"] for p in server.payloads] == ["dispatch-1"]
+    assert stats["sent"] == 1
+    assert stats["retried"] == 2
+    assert stats["queue_depth"] == 0
+    dispatcher.stop()
+
+    # Test 2: Pending callbacks survive a restart via the spool
+    down = CallbackDispatcher(
+        post=lambda payload: False, workers=1, max_attempts=100,
+        backoff_base=60, spool_dir=spool_dir
+    )
+    down.start()
+    down.enqueue({"sessionId": "dispatch-2"})
+    down.enqueue({"sessionId": "dispatch-3"})
+    down.wait_idle(timeout=0.2)
+    down.stop()
+    print(f"✅ Spooled while receiver was down: {down.stats()}")
+
+    restarted = CallbackDispatcher(
+        post=post, workers=2, backoff_base=0.01, spool_dir=spool_dir
+    )
+    restarted.start()
+    assert restarted.wait_idle(timeout=5)
+    stats = restarted.stats()
+    delivered = sorted(p["sessionId"] for p in server.payloads)
+    print(f"✅ Recovered after restart: {delivered}")
+    assert delivered == ["dispatch-1", "dispatch-2", "dispatch-3"]
+    assert stats["recovered"] == 2
+    restarted.stop()
+
+    # A spool that is never empty is compacted instead of growing
+    busy_dir = tempfile.mkdtemp()
+    busy = CallbackDispatcher(
+        post=lambda payload: payload["sessionId"] != "stuck", workers=2,
+        max_attempts=100, backoff_base=60, spool_dir=busy_dir,
+        spool_compact_records=20
+    )
+    busy.start()
+    busy.enqueue({"sessionId": "stuck"})
+    for index in range(100):
+        busy.enqueue({"sessionId": f"busy-{index}"})
+    deadline = time.time() + 5
+    while busy.stats()["sent"] < 100 and time.time() < deadline:
+        time.sleep(0.01)
+    busy.stop()
+    spools = glob.glob(os.path.join(busy_dir, "*"))
+    with open(spools[0], encoding="utf-8") as f:
+        records = f.readlines()
+    print(f"✅ Busy spool compacted: {len(records)} records for 201 writes")
+    assert len(spools) == 1 and len(records) <= 20
+
+    recovered = []
+    restarted = CallbackDispatcher(
+        post=lambda payload: recovered.append(payload) or True, spool_dir=busy_dir
+    )
+    restarted.start()
+    assert restarted.wait_idle(timeout=5)
+    assert [p["sessionId"] for p in recovered] == ["stuck"]
+    restarted.stop()
+
+    # A compaction cut short by a crash leaves a .compact file; the
+    # spool it was replacing is recovered and the file removed
+    crashed = os.path.join(busy_dir, "callbacks-1-crashed.jsonl")
+    with open(crashed, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "add", "id": "c1", "payload": {"sessionId": "crashed"}}) + "\n")
+    with open(crashed + ".compact", "w", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": "c1", "pay')
+    recovered = []
+    restarted = CallbackDispatcher(
+        post=lambda payload: recovered.append(payload) or True, spool_dir=busy_dir
+    )
+    restarted.start()
+    assert restarted.wait_idle(timeout=5)
+    assert [p["sessionId"] for p in recovered] == ["crashed"]
+    assert not glob.glob(os.path.join(busy_dir, "*.compact"))
+    restarted.stop()
+    print("✅ Interrupted compaction cleaned up")
+
+    # Test 3: Bounded queue rejects overflow
+    bounded = CallbackDispatcher(post=post, queue_size=1, spool_dir=None)
+    assert bounded.enqueue({"sessionId": "dispatch-4"}) == True
+    assert bounded.enqueue({"sessionId": "dispatch-5"}) == False
+    print(f"✅ Queue full rejected: {bounded.stats()['dropped_queue_full']}")
+
+    # Test 4: Gives up after max attempts
+    failing = CallbackDispatcher(
+        post=lambda payload: False, max_attempts=3, backoff_base=0.01,
+        spool_dir=None
+    )
+    failing.start()
+    failing.enqueue({"sessionId": "dispatch-6"})
+    assert failing.wait_idle(timeout=5)
+    stats = failing.stats()
+    print(f"✅ Dead after max attempts: {stats}")
+    assert stats["dead"] == 1
+    assert stats["failed_attempts"] == 3
+    failing.stop()
+
+    # By default a callback is retried for hours, not a number of times
+    assert CallbackDispatcher(spool_dir=None).max_attempts == 0
+    assert Config.CALLBACK_RETRY_SECONDS >= 3600
+    failing = CallbackDispatcher(
+        post=lambda payload: False, max_attempts=0, retry_seconds=0.3,
+        backoff_base=0.01, backoff_max=0.02, spool_dir=None
+    )
+    failing.start()
+    started = time.monotonic()
+    failing.enqueue({"sessionId": "dispatch-7"})
+    assert failing.wait_idle(timeout=5)
+    stats = failing.stats()
+    print(f"✅ Dead after retry time: {stats['failed_attempts']} attempts")
+    assert stats["dead"] == 1 and stats["failed_attempts"] > 3
+    assert time.monotonic() - started >= 0.3
+    failing.stop()
+
+    server.shutdown()
+
+    # Test 5: Pooled client reuses one keep-alive connection
+    server = start_stub_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}/callback"
+    for index in range(5):
+        assert post_callback({"sessionId": f"pooled-{index}"}, callback_url=url)
+    print(f"✅ 5 callbacks over {len(server.client_ports)} connection(s)")
+    assert len(server.client_ports) == 1
+
+    # Test 6: Batching coalesces callbacks into fewer requests
+    batching = CallbackDispatcher(
+        post=post,
+        post_batch=lambda payloads: post_callback(payloads, callback_url=url),
+        workers=1, batch_size=10, batch_window=0.2, spool_dir=None
+    )
+    batching.start()
+    for index in range(6):
+        batching.enqueue({"sessionId": f"batched-{index}"})
+    assert batching.wait_idle(timeout=5)
+    stats = batching.stats()
+    print(f"✅ Batched: {stats['sent']} callbacks in {stats['requests']} request(s)")
+    assert stats["sent"] == 6
+    assert stats["requests"] < 6
+    assert len(server.payloads) == 11
+    batching.stop()
+
+    # Batches are never posted to GUVI_CALLBACK_URL: without
+    # CALLBACK_BATCH_URL the default dispatcher posts one at a time
+    original = Config.CALLBACK_BATCH_URL
+    try:
+        Config.CALLBACK_BATCH_URL = ""
+        try:
+            post_callback_batch([{"sessionId": "batched-x"}])
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        assert CallbackDispatcher(batch_size=10, spool_dir=None).batch_size == 1
+        Config.CALLBACK_BATCH_URL = url
+        assert CallbackDispatcher(batch_size=10, spool_dir=None).batch_size == 10
+    finally:
+        Config.CALLBACK_BATCH_URL = original
+    print("✅ Batching needs CALLBACK_BATCH_URL")
+
+    server.shutdown()
+    print("\n🎉 All dispatcher tests passed!")
+
+
+if __name__ == '__main__':
+    test_dispatcher()
@@ -0,0 +1,129 @@
+"""
+Test intelligence extraction module
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.patterns import (
+    scan_intelligence,
+    find_upi_ids,
+    find_bank_accounts,
+    find_phone_numbers,
+    find_ifsc_codes,
+    find_urls
+)
+from src.extractor import (
+    extract_batch,
+    extract_intelligence,
+    extract_from_conversation,
+    extract_new_messages,
+    message_key
+)
+from src.session import create_session, update_session, clear_all_sessions
+
+
+def test_extractor():
+    """Test single-pass scanner and extraction functions"""
+
+    message = (
+        "Your account is blocked! Pay to fraud@paytm or call 9876543210. "
+        "Account 123456789012, IFSC sbin0001234. "
+        "Verify at https://fake-bank.com/kyc?u=a@bcde"
+    )
+
+    # Test 1: Every category classified in one scan
+    result = scan_intelligence(message)
+    print(f"✅ Scan result: {result}")
+    assert result["upiIds"] == ["fraud@paytm"]
+    assert result["phoneNumbers"] == ["9876543210"]
+    assert result["bankAccounts"] == ["123456789012"]
+    assert result["ifscCodes"] == ["SBIN0001234"]
+    assert result["phishingLinks"] == ["https://fake-bank.com/kyc?u=a@bcde"]
+
+    # Test 2: find_* helpers agree with the scanner
+    assert find_upi_ids(message) == result["upiIds"]
+    assert find_bank_accounts(message) == result["bankAccounts"]
+    assert find_phone_numbers(message) == result["phoneNumbers"]
+    assert find_ifsc_codes(message) == result["ifscCodes"]
+    assert find_urls(message) == result["phishingLinks"]
+
+    # Links glued to the word before them
+    for glued in ("visithttps://evil.com now", "pay at hhttp://x.in", "ref9https://a.b/c"):
+        assert find_urls(glued) == scan_intelligence(glued)["phishingLinks"] != [], glued
+    print("✅ find_* helpers match scanner")
+
+    # Test 3: Identifiers after punctuation and repeated values
+    result = scan_intelligence("Rs.9123456789 or _x@ybl, again _x@ybl")
+    print(f"✅ Punctuation/duplicates: {result}")
+    assert result["phoneNumbers"] == ["9123456789"]
+    assert result["upiIds"] == ["_x@ybl"]
+
+    # Test 4: Plain text and empty text
+    assert scan_intelligence("Hello, how are you?")["upiIds"] == []
+    assert scan_intelligence("")["phoneNumbers"] == []
+    print("✅ Plain/empty text has no intelligence")
+
+    # Test 5: extract_intelligence adds keywords
+    extracted = extract_intelligence(message)
+    print(f"✅ Extracted: {extracted}")
+    assert "fraud@paytm" in extracted["upiIds"]
+    assert "blocked" in extracted["suspiciousKeywords"]
+
+    # Test 6: Conversation aggregate is deduplicated
+    history = [
+        {"sender": "scammer", "text": "Send to fraud@paytm"},
+        {"sender": "user", "text": "Which UPI?"},
+        {"sender": "scammer", "text": "fraud@paytm, or call 9876543210"}
+    ]
+    aggregated = extract_from_conversation(history)
+    print(f"✅ Conversation aggregate: {aggregated}")
+    assert aggregated["upiIds"] == ["fraud@paytm"]
+    assert aggregated["phoneNumbers"] == ["9876543210"]
+
+    # Test 7: Session memo - only unseen messages are scanned
+    clear_all_sessions()
+    session = create_session("extract-memo")
+    aggregated = extract_from_conversation(history, session)
+    assert aggregated["upiIds"] == ["fraud@paytm"]
+    assert len(session.message_extractions) == 3
+    assert extract_new_messages(history, session.message_extractions) == {}
+    print("✅ Scanned history is memoized on the session")
+
+    history.append({"sender": "scammer", "text": "Or pay scam@ybl"})
+    scanned = extract_new_messages(history, session.message_extractions)
+    assert len(scanned) == 1
+    update_session("extract-memo", message_extractions=scanned)
+    assert list(session.extracted_intelligence["upiIds"]) == ["fraud@paytm", "scam@ybl"]
+    assert list(session.extracted_intelligence["phoneNumbers"]) == ["9876543210"]
+    print(f"✅ New message merged: {session.extracted_intelligence['upiIds']}")
+    clear_all_sessions()
+
+    # Test 8: Batch results are reused instead of scanning again
+    known = extract_batch(["Pay fraud@paytm", "Pay fraud@paytm", "Hello"])
+    assert len(known) == 2
+    assert known[message_key("Pay fraud@paytm")]["upiIds"] == ["fraud@paytm"]
+    marker = {"upiIds": ["from-batch@ybl"]}
+    scanned = extract_new_messages(
+        [{"text": "Pay fraud@paytm"}], {}, {message_key("Pay fraud@paytm"): marker}
+    )
+    assert list(scanned.values()) == [marker]
+    print("✅ Batch extraction reused")
+
+    # Test 9: Our own replies echoed back by the client are not intelligence
+    echoed = [
+        {"sender": "agent", "text": "Is it pay@ybl or call 9123456789?"},
+        {"sender": "scammer", "text": "Pay fraud@paytm"}
+    ]
+    scanned = extract_new_messages(echoed, {})
+    assert list(scanned) == [message_key("Pay fraud@paytm")]
+    aggregated = extract_from_conversation(echoed)
+    assert aggregated["upiIds"] == ["fraud@paytm"] and aggregated["phoneNumbers"] == []
+    print("✅ Agent replies skipped")
+
+    print("\n🎉 All extractor tests passed!")
+
+
+if __name__ == '__main__':
+    test_extractor()
@@ -0,0 +1,112 @@
+"""
+Test intelligence index module
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.extractor import message_key
+from src.intel_index import (
+    MemoryIntelIndex,
+    SQLiteIntelIndex,
+    canonical_intelligence,
+    canonicalize,
+    lookup_indicator,
+    set_intel_index
+)
+from src.session import clear_all_sessions, create_session, delete_session, update_session
+
+
+def test_intel_index():
+    """Test canonical indicators, both index backends and update_session"""
+
+    # Test 1: Canonical forms
+    assert canonicalize("upiIds", " Fraud@PayTM ") == "fraud@paytm"
+    assert canonicalize("upiIds", "9876543210") is None
+    assert canonicalize("phoneNumbers", "+91 98765-43210") == "9876543210"
+    assert canonicalize("phoneNumbers", "12345") is None
+    assert canonicalize("bankAccounts", "1234 5678 9012") == "123456789012"
+    assert canonicalize("ifscCodes", "sbin0001234") == "SBIN0001234"
+    assert canonicalize("phishingLinks", "https://WWW.Evil-KYC.com:8080/verify?x=1") == "evil-kyc.com"
+    assert canonicalize("phishingLinks", "evil-kyc.com.") == "evil-kyc.com"
+    assert canonicalize("suspiciousKeywords", "urgent") is None
+    assert canonical_intelligence({
+        "upiIds": ["A@ybl", "a@YBL"], "suspiciousKeywords": ["urgent"]
+    }) == [("upiIds", "a@ybl")]
+    print("✅ Canonical indicators")
+
+    # Test 2: Both backends record sessions, first and last seen
+    directory = tempfile.mkdtemp()
+    for index in (MemoryIntelIndex(), SQLiteIntelIndex(os.path.join(directory, "intel.db"))):
+        index.record("s1", [("upiIds", "a@ybl"), ("phoneNumbers", "9876543210")], 1000)
+        index.record("s2", [("upiIds", "a@ybl")], 2000)
+        index.record("s1", [("upiIds", "a@ybl")], 3000)
+        match = index.lookup("upiIds", "a@ybl")
+        assert match["firstSeen"] == 1000 and match["lastSeen"] == 3000
+        assert match["sessionCount"] == 2 and match["sessions"] == ["s1", "s2"]
+        assert index.lookup("upiIds", "b@ybl") is None
+        index.clear()
+        assert index.lookup("phoneNumbers", "9876543210") is None
+        print(f"✅ {type(index).__name__}")
+
+    # A second SQLite index on the file (another worker) sees the same rows
+    path = os.path.join(directory, "shared.db")
+    SQLiteIntelIndex(path).record("s3", [("ifscCodes", "SBIN0001234")], 5000)
+    assert SQLiteIntelIndex(path).lookup("ifscCodes", "SBIN0001234")["sessions"] == ["s3"]
+    print("✅ SQLite index shared")
+
+    # Test 3: Memory limits - most recent sessions listed, least recently
+    # seen indicators dropped
+    original = (Config.INTEL_INDEX_MAX_INDICATORS, Config.INTEL_INDEX_MAX_SESSIONS)
+    Config.INTEL_INDEX_MAX_INDICATORS, Config.INTEL_INDEX_MAX_SESSIONS = 2, 2
+    try:
+        index = MemoryIntelIndex()
+        for number in range(3):
+            index.record(f"s{number}", [("upiIds", "a@ybl")], number)
+        match = index.lookup("upiIds", "a@ybl")
+        assert match["sessions"] == ["s2", "s1"] and match["sessionCount"] == 3
+        index.record("s9", [("upiIds", "b@ybl"), ("upiIds", "c@ybl")], 10)
+        assert index.lookup("upiIds", "a@ybl") is None
+        assert index.lookup("upiIds", "c@ybl") is not None
+    finally:
+        Config.INTEL_INDEX_MAX_INDICATORS, Config.INTEL_INDEX_MAX_SESSIONS = original
+    print("✅ Memory limits")
+
+    # Test 4: update_session indexes new intelligence, which outlives
+    # the session
+    previous = set_intel_index(MemoryIntelIndex())
+    clear_all_sessions()
+    try:
+        create_session("intel-1")
+        create_session("intel-2")
+        update_session("intel-1", extracted_intelligence={"upiIds": ["Fraud@Paytm"]})
+        scanned = {message_key("Call +91 98765 43210"): {"phoneNumbers": ["9876543210"]}}
+        update_session("intel-2", message_extractions=scanned)
+        update_session("intel-2", extracted_intelligence={"upiIds": ["fraud@paytm"]})
+        last_seen = lookup_indicator("9876543210")[0]["lastSeen"]
+
+        # A message already recorded is not reported again
+        update_session("intel-2", message_extractions=scanned)
+        assert lookup_indicator("9876543210", "phoneNumbers")[0]["lastSeen"] == last_seen
+
+        delete_session("intel-1")
+        matches = lookup_indicator("FRAUD@paytm")
+        assert [match["type"] for match in matches] == ["upiIds"]
+        assert matches[0]["sessions"] == ["intel-2", "intel-1"]
+
+        # Unknown sessions index nothing
+        assert update_session("intel-missing", extracted_intelligence={"upiIds": ["x@ybl"]}) is None
+        assert lookup_indicator("x@ybl") == []
+        print("✅ update_session keeps the index")
+    finally:
+        clear_all_sessions()
+        set_intel_index(previous)
+
+    print("\n🎉 All intelligence index tests passed!")
+
+
+if __name__ == '__main__':
+    test_intel_index()
@@ -0,0 +1,82 @@
+"""
+Test JSON backend module
+"""
+
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import jsonio
+from src.session import OrderedSet
+
+
+def test_jsonio():
+    """Test both backends encode alike, decode errors, and the Flask provider"""
+
+    print(f"Backend in use: {jsonio.BACKEND}")
+    backends = [("stdlib", jsonio._stdlib_dumps, json.loads)]
+    try:
+        backends.append(jsonio._load_orjson())
+    except ImportError:
+        print("⚠️ orjson not installed, testing stdlib only")
+
+    value = {
+        "sessionId": "abc-123",
+        "message": {"sender": "scammer", "text": "खाता बंद होगा, pay now ₹99", "timestamp": 1770005528731},
+        "upiIds": OrderedSet(["fraud@paytm", "scam@ybl"]),
+        "confidence": 0.93,
+        "ok": True,
+        "missing": None,
+    }
+
+    # Test 1: Compact UTF-8, insertion order, sets as lists - same bytes either way
+    outputs = set()
+    for name, dumps, loads in backends:
+        encoded = dumps(value)
+        assert isinstance(encoded, bytes)
+        assert "खाता".encode("utf-8") in encoded
+        assert encoded.startswith(b'{"sessionId":"abc-123","message":{')
+        decoded = loads(encoded)
+        assert decoded["upiIds"] == ["fraud@paytm", "scam@ybl"]
+        assert loads(encoded.decode("utf-8")) == decoded
+        outputs.add(encoded)
+        print(f"✅ {name}: {len(encoded)} bytes")
+    assert len(outputs) == 1
+
+    # Test 2: Integers beyond 64 bits still encode
+    assert json.loads(jsonio.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+    # Test 3: Unknown types and malformed input raise the usual errors
+    try:
+        jsonio.dumps({"bad": object()})
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+    for bad in (b"", b"{not json", b'{"a": 1'):
+        try:
+            jsonio.loads(bad)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    print("✅ Errors")
+
+    # Test 4: Flask parses and answers with the provider
+    from src.app import app, FastJSONProvider
+    assert isinstance(app.json, FastJSONProvider)
+    with app.test_request_context(
+        "/honeypot", method="POST",
+        data=jsonio.dumps(value), content_type="application/json"
+    ):
+        from flask import jsonify, request
+        assert request.get_json()["message"]["timestamp"] == 1770005528731
+        response = jsonify({"status": "success", "reply": "कौन सा खाता?"})
+        assert response.mimetype == "application/json"
+        assert json.loads(response.get_data()) == {"status": "success", "reply": "कौन सा खाता?"}
+    print("✅ Flask provider")
+
+    print("\n🎉 All JSON tests passed!")
+
+
+if __name__ == '__main__':
+    test_jsonio()
@@ -0,0 +1,109 @@
+"""
+Test structured logging module
+"""
+
+import io
+import json
+import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log import ROOT, configure, counts, get_logger, shutdown
+
+
+class Expensive:
+    """Field that counts how often it is formatted"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "expensive"
+
+
+def read_lines(stream):
+    """Records written so far, one per line"""
+    shutdown()
+    return [line for line in stream.getvalue().splitlines() if line]
+
+
+def test_log():
+    """Test JSON and text output, level gating, sampling and redaction"""
+
+    original_level = logging.getLogger(ROOT).level
+    log = get_logger("src.pipeline")
+
+    try:
+        # Test 1: One JSON object per record, written by the listener
+        stream = io.StringIO()
+        configure(level="DEBUG", format="json", stream=stream)
+        log.info("callback queued", session="abc-123", messages=4)
+        log.warning("callback queue full", session="abc-123")
+
+        lines = [json.loads(line) for line in read_lines(stream)]
+        assert [line["event"] for line in lines] == ["callback queued", "callback queue full"]
+        assert lines[0]["level"] == "info"
+        assert lines[0]["logger"] == "honeypot.pipeline"
+        assert lines[0]["session"] == "abc-123"
+        assert lines[0]["messages"] == 4
+        assert lines[0]["ts"].endswith("Z")
+        print(f"✅ JSON line: {lines[0]}")
+
+        # Test 2: Disabled levels are dropped before anything is formatted
+        stream = io.StringIO()
+        configure(level="WARNING", stream=stream)
+        field = Expensive()
+        log.debug("turn analyzed", detail=field)
+        log.info("callback queued", detail=field)
+        log.sampled("turn analyzed", rate=1, detail=field)
+        assert not log.enabled(logging.INFO)
+        assert read_lines(stream) == []
+        assert field.calls == 0
+        print("✅ Disabled levels skipped")
+
+        # Test 3: Sampled lines keep `rate` of the calls
+        stream = io.StringIO()
+        configure(level="DEBUG", stream=stream)
+        for _ in range(50):
+            log.sampled("never", rate=0)
+            log.sampled("always", rate=1)
+        lines = [json.loads(line) for line in read_lines(stream)]
+        assert len(lines) == 50
+        assert all(line["event"] == "always" and line["sampleRate"] == 1 for line in lines)
+        print("✅ Sampling")
+
+        # Test 4: Text format
+        stream = io.StringIO()
+        configure(level="DEBUG", format="text", stream=stream)
+        log.error("batch turn failed", session="s-1", error="boom")
+        line, = read_lines(stream)
+        assert " error " in line
+        assert line.endswith("honeypot.pipeline batch turn failed session=s-1 error=boom")
+        print(f"✅ Text line: {line}")
+
+        # Test 5: Intelligence is logged as counts, not values
+        extracted = counts({
+            "upiIds": ["fraud@paytm"],
+            "phoneNumbers": ["+919876543210", "9123456789"],
+            "phishingLinks": []
+        })
+        assert extracted == {"upiIds": 1, "phoneNumbers": 2}
+
+        stream = io.StringIO()
+        configure(level="DEBUG", stream=stream)
+        log.sampled("turn analyzed", rate=1, extracted=extracted)
+        line, = read_lines(stream)
+        assert "fraud@paytm" not in line
+        assert json.loads(line)["extracted"] == {"upiIds": 1, "phoneNumbers": 2}
+        print("✅ Counts instead of values")
+
+    finally:
+        configure(level=logging.getLevelName(original_level))
+
+    print("\n🎉 All log tests passed!")
+
+
+if __name__ == '__main__':
+    test_log()
@@ -0,0 +1,118 @@
+"""
+Test metrics module
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    REGISTRY,
+    clear_snapshots,
+    collect,
+    render,
+    write_snapshot
+)
+
+# Test metrics, registered once per process
+JOBS = Counter("test_jobs_total", "Jobs by result", ["result"])
+JOB_SECONDS = Histogram("test_job_seconds", "Job latency", buckets=(0.1, 1.0))
+QUEUE = Gauge("test_queue_depth", "Queued jobs")
+SHARED = Gauge("test_shared_size", "Size every process sees", aggregate="max")
+
+
+def worker(directory):
+    """A second process: count, write its snapshot, exit"""
+    Config.METRICS_DIR = directory
+    JOBS.inc(2, result="ok")
+    JOB_SECONDS.observe(0.5)
+    QUEUE.set(7)
+    SHARED.set(10)
+    write_snapshot()
+
+
+def test_metrics():
+    """Test metric types, text format and multi-process aggregation"""
+
+    # Test 1: Counters, histograms and gauges render in the text format
+    JOBS.inc(result="ok")
+    JOBS.inc(result='bad "quoted"')
+    with JOB_SECONDS.time():
+        pass
+    JOB_SECONDS.observe(5)
+    QUEUE.set(3)
+    SHARED.set(10)
+
+    text = render()
+    assert "# TYPE test_jobs_total counter" in text
+    assert 'test_jobs_total{result="ok"} 1' in text
+    assert 'test_jobs_total{result="bad \\"quoted\\""} 1' in text
+    assert 'test_job_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_job_seconds_bucket{le="1"} 1' in text
+    assert 'test_job_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_job_seconds_count 2" in text
+    assert "test_queue_depth 3" in text
+    print("✅ Text format")
+
+    # Test 2: Wrong labels and duplicate names are rejected
+    for call in (lambda: JOBS.inc(), lambda: JOBS.inc(result="ok", extra="x")):
+        try:
+            call()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    try:
+        Counter("test_jobs_total", "again")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    registry = Registry()
+    assert registry.snapshot() == {}
+
+    # Test 3: Another process's snapshot is added in
+    original = Config.METRICS_DIR
+    directory = tempfile.mkdtemp()
+    Config.METRICS_DIR = directory
+    try:
+        child = multiprocessing.get_context("fork").Process(target=worker, args=(directory,))
+        child.start()
+        child.join()
+        assert child.exitcode == 0
+
+        # The child exited: its counters still count, its gauges don't
+        combined = collect()
+        assert combined["test_jobs_total"][("ok",)] == 3
+        assert combined["test_job_seconds"][()][-1] > 5.4
+        assert combined["test_queue_depth"][()] == 3
+
+        # A live process's gauges are summed (or maxed)
+        with open(os.path.join(directory, f"{child.pid}.json"), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        with open(os.path.join(directory, f"{os.getppid()}.json"), "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        combined = collect()
+        assert combined["test_queue_depth"][()] == 10
+        assert combined["test_shared_size"][()] == 10
+        assert combined["test_jobs_total"][("ok",)] == 5
+        print(f"✅ Aggregated across processes: {combined['test_jobs_total']}")
+
+        clear_snapshots()
+        assert os.listdir(directory) == []
+    finally:
+        Config.METRICS_DIR = original
+
+    assert any(metric.name == "honeypot_stage_seconds" for metric in REGISTRY.metrics())
+
+    print("\n🎉 All metrics tests passed!")
+
+
+if __name__ == '__main__':
+    test_metrics()
@@ -0,0 +1,78 @@
+"""
+Test history reconciliation module
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import reconcile
+from src.reconcile import reconcile_history
+
+
+def test_reconcile():
+    """Test matching client history against the stored session"""
+
+    client = [
+        {"sender": "scammer", "text": "Your account is blocked", "timestamp": 1000},
+        {"sender": "user", "text": "Which account?", "timestamp": 1500},
+        {"sender": "scammer", "text": "Pay to fraud@paytm", "timestamp": 2000},
+        {"sender": "user", "text": "ok", "timestamp": 2500},
+    ]
+
+    # Test 1: A lost session adopts the whole history, in order
+    adopted = reconcile_history([], client)
+    assert [message["text"] for message in adopted] == [message["text"] for message in client]
+    print(f"✅ Adopted {len(adopted)} messages into an empty session")
+
+    # Test 2: Stored messages match by hash, even with our own timestamps
+    stored = [
+        {"sender": "scammer", "text": "Your account is blocked", "timestamp": 1000},
+        {"sender": "agent", "text": "Which account?", "timestamp": 1777000000000},
+    ]
+    adopted = reconcile_history(stored, client)
+    assert [message["text"] for message in adopted] == ["Pay to fraud@paytm", "ok"]
+    assert reconcile_history(stored + adopted, client) == []
+    print("✅ Only missing messages adopted")
+
+    # Test 3: Repeated texts match one stored copy each
+    repeated = client + [
+        {"sender": "scammer", "text": "Send OTP", "timestamp": 3000},
+        {"sender": "user", "text": "ok", "timestamp": 3500},
+    ]
+    adopted = reconcile_history(client, repeated)
+    assert [(m["text"], m["timestamp"]) for m in adopted] == [("Send OTP", 3000), ("ok", 3500)]
+    print("✅ Repeated texts")
+
+    # Test 4: Invalid entries are skipped, adopted ones keep only known fields
+    adopted = reconcile_history([], [
+        "not a message",
+        {"sender": "scammer"},
+        {"text": 42},
+        {"text": "Call 9876543210", "extra": "x" * 1000},
+    ])
+    assert adopted == [{"sender": "scammer", "text": "Call 9876543210", "timestamp": 0}]
+    assert reconcile_history(client, []) == []
+    print("✅ Invalid entries skipped")
+
+    # Test 5: When stored is a prefix of the client's history, nothing
+    # is hashed; otherwise every message is matched by hash
+    hashed = []
+    original_key = reconcile.message_key
+    reconcile.message_key = lambda text: hashed.append(text) or original_key(text)
+    try:
+        long_client = [{"sender": "scammer", "text": f"message {n}", "timestamp": n} for n in range(500)]
+        adopted = reconcile_history(long_client[:499], long_client)
+        assert [m["text"] for m in adopted] == ["message 499"] and hashed == []
+        assert reconcile_history(long_client, long_client) == [] and hashed == []
+        adopted = reconcile_history(long_client[1:3], long_client[:4])
+        assert [m["text"] for m in adopted] == ["message 0", "message 3"] and hashed
+    finally:
+        reconcile.message_key = original_key
+    print("✅ Prefix fast path")
+
+    print("\n🎉 All reconcile tests passed!")
+
+
+if __name__ == '__main__':
+    test_reconcile()
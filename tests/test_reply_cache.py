@@ -0,0 +1,60 @@
+"""
+Test reply cache module
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.reply_cache import ReplyCache, conversation_stage, reply_cache_key
+
+
+def test_reply_cache():
+    """Test reply cache keys, variants, LRU and TTL"""
+
+    # Test 1: Keys ignore case, punctuation and indicator order
+    first = reply_cache_key("Your account is BLOCKED!! Verify KYC now.", ["urgency", "kyc"], 0)
+    second = reply_cache_key("your account is blocked - verify kyc now", ["kyc", "urgency"], 1)
+    print(f"✅ Normalized key: {first}")
+    assert first == second
+    assert first != reply_cache_key("your account is blocked verify kyc now", ["kyc"], 0)
+    assert conversation_stage(0) == "opening" and conversation_stage(20) == "late"
+    assert first != reply_cache_key("your account is blocked verify kyc now", ["kyc", "urgency"], 8)
+
+    # Test 2: Misses until a key has all its variants, then hits
+    cache = ReplyCache(max_entries=10, ttl=0, variants=2)
+    assert cache.get(first) is None
+    cache.add(first, "Oh no! Which account?")
+    assert cache.get(first) is None
+    cache.add(first, "Blocked? What do I do now?")
+    assert cache.get(first) in ("Oh no! Which account?", "Blocked? What do I do now?")
+
+    # Test 3: Variants the conversation already used are skipped
+    assert cache.get(first, avoid=["Oh no! Which account?"]) == "Blocked? What do I do now?"
+    assert cache.get(first, avoid=["Oh no! Which account?", "Blocked? What do I do now?"]) is None
+    stats = cache.stats()
+    print(f"✅ Stats: {stats}")
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["hitRate"] == 0.4 and stats["llmCallsSavedPerMinute"] == 2
+
+    # Test 4: Least recently used keys are dropped
+    cache = ReplyCache(max_entries=2, ttl=0, variants=1)
+    for n in range(3):
+        cache.add(("message", n), f"reply {n}")
+    assert cache.get(("message", 0)) is None
+    assert cache.get(("message", 2)) == "reply 2"
+    assert cache.stats()["entries"] == 2
+
+    # Test 5: Entries expire after the TTL
+    cache = ReplyCache(max_entries=10, ttl=60, variants=1)
+    cache.add(first, "Oh no!")
+    created, replies = cache._entries[first]
+    cache._entries[first] = (created - 120, replies)
+    assert cache.get(first) is None
+    print("✅ LRU and TTL eviction")
+
+    print("\n🎉 All reply cache tests passed!")
+
+
+if __name__ == '__main__':
+    test_reply_cache()
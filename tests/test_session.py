@@ -13,8 +13,11 @@ from src.session import (
     update_session,
     should_send_callback,
     delete_session,
-    clear_all_sessions
+    clear_all_sessions,
+    get_store_stats,
+    set_eviction_hook
 )
+from src.config import Config
 
 
 def test_session():
@@ -73,6 +76,18 @@ def test_session():
     print(f"✅ Should send callback (count=5, items=2): {should_send}")
     assert should_send == True  # Now 2 items
     
+    # Test 6b: Repeated values are de-duplicated in first-seen order
+    update_session(
+        "test-123",
+        extracted_intelligence={"upiIds": ["other@upi", "test@upi", "other@upi"]},
+        indicators=["urgency", "kyc_verification"]
+    )
+    session = get_session("test-123")
+    print(f"✅ Ordered de-duplication: {session.extracted_intelligence['upiIds']}")
+    assert list(session.extracted_intelligence["upiIds"]) == ["test@upi", "other@upi"]
+    assert list(session.indicators) == ["urgency", "kyc_verification"]
+    assert session.intelligence_lists()["upiIds"] == ["test@upi", "other@upi"]
+    
     # Test 7: Should send callback - message count
     clear_all_sessions()
     session = create_session("test-456")
@@ -92,6 +107,55 @@ def test_session():
     print(f"✅ Delete non-existent: {deleted}")
     assert deleted == False
     
+    # Test 10: LRU eviction by session count, with hook
+    clear_all_sessions()
+    evicted = []
+    previous_hook = set_eviction_hook(
+        lambda session, reason: evicted.append((session.session_id, reason))
+    )
+    original = (Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL)
+    Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = 2, 0, 0
+    try:
+        create_session("lru-1")
+        create_session("lru-2")
+        get_session("lru-1")  # lru-2 is now least recently used
+        create_session("lru-3")
+        print(f"✅ Count eviction: {evicted}")
+        assert evicted == [("lru-2", "count")]
+        assert get_session("lru-1") is not None
+        assert get_session("lru-2") is None
+        
+        # Test 11: Idle TTL expiry
+        clear_all_sessions()
+        evicted.clear()
+        Config.SESSION_MAX_COUNT, Config.SESSION_IDLE_TTL = 0, 60
+        session = create_session("idle-1")
+        session.last_active -= 120  # idle for two minutes
+        assert get_session("idle-1") is None
+        print(f"✅ TTL eviction: {evicted}")
+        assert evicted == [("idle-1", "ttl")]
+        
+        # Test 12: Memory cap and resident size
+        clear_all_sessions()
+        evicted.clear()
+        Config.SESSION_IDLE_TTL = 0
+        create_session("mem-1")
+        update_session("mem-1", new_message={"sender": "scammer", "text": "x" * 5000})
+        stats = get_store_stats()
+        assert stats["residentBytes"] > 5000
+        Config.SESSION_MAX_BYTES = stats["residentBytes"] + 100
+        create_session("mem-2")
+        stats = get_store_stats()
+        print(f"✅ Memory eviction: {evicted}, stats={stats}")
+        assert evicted == [("mem-1", "memory")]
+        assert stats["sessions"] == 1
+        assert stats["evictions"]["memory"] == 1
+        assert stats["residentBytes"] <= Config.SESSION_MAX_BYTES
+    finally:
+        Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = original
+        set_eviction_hook(previous_hook)
+        clear_all_sessions()
+    
     print("\n🎉 All session tests passed!")
 
 
@@ -0,0 +1,167 @@
+"""
+Test session store backends
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import get_context
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.session import SessionData, _apply_update
+from src.session_store import MemorySessionStore, SQLiteSessionStore, create_store
+from src.config import Config
+
+
+def _append(session, text):
+    """Mutation used by the concurrency tests"""
+    return _apply_update(
+        session, None, None, None,
+        [{"sender": "scammer", "text": text}],
+        None, None, None,
+        add_message_count=1
+    )
+
+
+def _append_from_process(path, worker, count):
+    """Appends from a separate process with its own store instance"""
+    store = SQLiteSessionStore(path)
+    for i in range(count):
+        store.update("shared", lambda session: _append(session, f"p{worker}-{i}"))
+
+
+def test_session_store():
+    """Test memory and SQLite session stores"""
+
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+
+    # Test 1: Backend selection
+    assert isinstance(create_store("memory"), MemorySessionStore)
+    try:
+        create_store("redis")
+        assert False, "unknown backend accepted"
+    except ValueError:
+        pass
+    print("✅ Backend selection")
+
+    # Test 2: Round trip through the SQLite store
+    first = SQLiteSessionStore(path)
+    created = first.create("round-trip")
+    first.update("round-trip", lambda session: _apply_update(
+        session, 2, True, 0.8,
+        [{"sender": "scammer", "text": "Pay to fraud@ybl"}],
+        {"upiIds": ["fraud@ybl"]}, ["urgency"], None
+    ))
+    loaded = first.get("round-trip")
+    print(f"✅ SQLite round trip: {loaded.extracted_intelligence['upiIds']}")
+    assert loaded.created_at == created.created_at
+    assert loaded.message_count == 2 and loaded.scam_detected
+    assert list(loaded.indicators) == ["urgency"]
+    assert SessionData.from_dict(loaded.to_dict()) == loaded
+
+    # Test 3: A second instance (another worker) sees the same sessions
+    second = SQLiteSessionStore(path)
+    assert second.get("round-trip").conversation_history == loaded.conversation_history
+    assert second.delete("round-trip")
+    assert first.get("round-trip") is None
+    print("✅ Shared between store instances")
+
+    # Reads don't wait for another worker's write transaction
+    first.create("reader")
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        assert second.get("reader") is not None
+        assert time.perf_counter() - started < 1
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    print("✅ Reads without the write lock")
+
+    # Test 4: Concurrent appends from threads and processes are atomic
+    first.create("shared")
+    threads = [
+        threading.Thread(
+            target=lambda n=n: [
+                first.update("shared", lambda s, i=i: _append(s, f"t{n}-{i}"))
+                for i in range(25)
+            ]
+        )
+        for n in range(4)
+    ]
+    processes = [
+        get_context("spawn").Process(target=_append_from_process, args=(path, n, 25))
+        for n in range(2)
+    ]
+    for worker in threads + processes:
+        worker.start()
+    for worker in threads + processes:
+        worker.join()
+
+    shared = second.get("shared")
+    history = shared.conversation_history
+    print(f"✅ Concurrent appends: {len(history)} messages")
+    assert len(history) == 150
+    # Counts are added to the stored value, so no increment is lost
+    assert shared.message_count == 150
+    assert len({message["text"] for message in history}) == 150
+
+    # Test 5: Count eviction and hook on the SQLite store
+    evicted = []
+    store = SQLiteSessionStore(
+        os.path.join(tempfile.mkdtemp(), "evict.db"),
+        on_evict=lambda pairs: evicted.extend((s.session_id, r) for s, r in pairs)
+    )
+    original = (Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL)
+    Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = 2, 0, 0
+    try:
+        store.create("lru-1")
+        store.create("lru-2")
+        store.update("lru-1", lambda session: 0)  # lru-2 is now least recently used
+        store.create("lru-3")
+        stats = store.stats()
+        print(f"✅ SQLite eviction: {evicted}, stats={stats}")
+        assert evicted == [("lru-2", "count")]
+        assert stats["sessions"] == 2 and stats["evictions"]["count"] == 1
+
+        # Expired sessions are evicted when read
+        Config.SESSION_IDLE_TTL = 60
+        store.update("lru-1", lambda session: 0)
+        store._connection().execute("UPDATE sessions SET data = json_set(data, '$.last_active', 0)")
+        assert store.get("lru-1") is None
+        assert ("lru-1", "ttl") in evicted
+    finally:
+        Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = original
+
+    # Test 6: A session growing through updates enforces the byte cap
+    evicted = []
+    store = SQLiteSessionStore(
+        os.path.join(tempfile.mkdtemp(), "grow.db"),
+        on_evict=lambda pairs: evicted.extend((s.session_id, r) for s, r in pairs)
+    )
+    original = (Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL)
+    try:
+        Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = 0, 0, 0
+        store.create("idle")
+        store.create("growing")
+        Config.SESSION_MAX_BYTES = store.stats()["residentBytes"] + 100
+
+        grown = store.update("growing", lambda session: _append(session, "x" * 500))
+        stats = store.stats()
+        print(f"✅ SQLite byte cap on update: {evicted}, stats={stats}")
+        assert grown is not None and grown.message_count == 1
+        assert evicted == [("idle", "memory")]
+        assert stats["residentBytes"] <= Config.SESSION_MAX_BYTES
+        assert store.get("growing") is not None
+    finally:
+        Config.SESSION_MAX_COUNT, Config.SESSION_MAX_BYTES, Config.SESSION_IDLE_TTL = original
+
+    print("\n🎉 All session store tests passed!")
+
+
+if __name__ == '__main__':
+    test_session_store()
@@ -0,0 +1,52 @@
+"""
+Test template reply engine
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.templates import INDICATOR_TEMPLATES, STAGE_TEMPLATES, template_reply
+
+
+def test_templates():
+    """Test stage- and tactic-aware template replies"""
+
+    def conversation(turns):
+        history = []
+        for n in range(turns):
+            history.append({"sender": "scammer", "text": f"message {n}"})
+            history.append({"sender": "agent", "text": f"reply {n}"})
+        return history
+
+    # Test 1: Replies follow the conversation stage
+    assert template_reply([]) in STAGE_TEMPLATES["opening"]
+    assert template_reply(conversation(2)) in STAGE_TEMPLATES["early"]
+    assert template_reply(conversation(4)) in STAGE_TEMPLATES["middle"]
+    assert template_reply(conversation(8)) in STAGE_TEMPLATES["late"]
+    print(f"✅ Late stage: {template_reply(conversation(8))}")
+
+    # Test 2: The scammer's tactic comes first
+    reply = template_reply(conversation(1), ["urgency", "credential_request"])
+    print(f"✅ Tactic reply: {reply}")
+    assert reply in INDICATOR_TEMPLATES["credential_request"]
+
+    # Test 3: Replies already used are skipped while others remain
+    history = conversation(3)
+    seen = set()
+    for _ in range(len(STAGE_TEMPLATES["middle"])):
+        reply = template_reply(history)
+        assert reply not in seen
+        seen.add(reply)
+        history[-1] = {"sender": "agent", "text": reply}
+        history.append({"sender": "agent", "text": reply})
+    print(f"✅ No repeats across {len(seen)} replies")
+
+    # Test 4: Same conversation, same reply (retries are stable)
+    assert template_reply(conversation(5)) == template_reply(conversation(5))
+
+    print("\n🎉 All template tests passed!")
+
+
+if __name__ == '__main__':
+    test_templates()
@@ -0,0 +1,92 @@
+"""
+Test app factory, warm-up and gunicorn settings
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('CALLBACK_SPOOL_DIR', tempfile.mkdtemp())
+
+from src.app import create_app
+from src.config import Config
+from src.dispatcher import get_dispatcher
+from src.warmup import open_connections, warm_up
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def gunicorn_settings() -> dict:
+    """Settings and hooks defined by gunicorn.conf.py"""
+    settings = {}
+    with open(os.path.join(ROOT, "gunicorn.conf.py"), encoding="utf-8") as f:
+        exec(f.read(), settings)
+    return settings
+
+
+def test_warmup():
+    """Test lazy imports, create_app() and the warm-up phases"""
+
+    # Test 1: Importing the app leaves the LLM SDK and numpy for later
+    loaded = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, src.app; print(sorted(m for m in ('groq', 'httpx', 'numpy') if m in sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert loaded == "[]", loaded
+    print("✅ Lazy imports")
+
+    # Test 2: Each create_app() builds an app serving the routes
+    app = create_app(warm=False)
+    assert app is not create_app(warm=False)
+    client = app.test_client()
+    assert client.get("/health").get_json() == {"status": "healthy"}
+    assert client.get("/missing").status_code == 404
+    assert client.post("/honeypot", json={}).status_code == 401
+    print("✅ create_app")
+
+    # Test 3: Warm-up loads the SDK; connections are opened per process
+    warm_up()
+    assert "groq" in sys.modules and "httpx" in sys.modules
+    open_connections()
+    dispatcher = get_dispatcher()
+    open_connections()
+    assert get_dispatcher() is dispatcher
+    print("✅ Warm-up")
+
+    # Test 4: The gunicorn config preloads the factory
+    settings = gunicorn_settings()
+    assert settings["preload_app"] and settings["wsgi_app"] == "src.app:create_app()"
+    assert settings["worker_class"] == "src.gunicorn_worker.QueueTimedWorker"
+    for hook in ("on_starting", "when_ready", "post_fork"):
+        assert callable(settings[hook])
+
+    # Several workers only with the shared session store
+    original = (Config.SESSION_BACKEND, os.environ.get("WEB_CONCURRENCY"))
+    try:
+        Config.SESSION_BACKEND = "memory"
+        os.environ.pop("WEB_CONCURRENCY", None)
+        assert gunicorn_settings()["workers"] == 1
+        os.environ["WEB_CONCURRENCY"] = "3"
+        try:
+            gunicorn_settings()
+            assert False, "expected RuntimeError"
+        except RuntimeError:
+            pass
+        Config.SESSION_BACKEND = "sqlite"
+        assert gunicorn_settings()["workers"] == 3
+    finally:
+        Config.SESSION_BACKEND = original[0]
+        if original[1] is None:
+            os.environ.pop("WEB_CONCURRENCY", None)
+        else:
+            os.environ["WEB_CONCURRENCY"] = original[1]
+    print("✅ gunicorn.conf.py")
+
+    print("\n🎉 All warm-up tests passed!")
+
+
+if __name__ == '__main__':
+    test_warmup()